@@ -1,11 +1,20 @@
 import os
 import time
+import hashlib
 import logging
+import threading
 import pandas as pd
-from flask import Flask, render_template, Response, request, redirect, url_for, send_file, jsonify, send_from_directory
+from flask import Flask, render_template, Response, request, redirect, url_for, send_file, jsonify
 from waitress import serve
+from werkzeug.utils import safe_join
 from send2trash import send2trash
-from src.camera import EmployeeTrackerEngine
+from src.catalog import catalog
+from src.events import action_stream
+from src.sse import sse_server
+from src.media import send_video, ensure_faststart_async
+from src.capture import capture_service, validate_source
+from src.cache import query_cache
+from src.timeseries import occupancy_store
 
 # Import các thành phần đã được tinh chỉnh chuẩn chuyên gia
 from config import Config
@@ -13,14 +22,22 @@ from src.database import (
     init_db, 
     create_new_session,
     get_latest_actions, 
-    get_all_sessions, 
-    get_employee_name_map, 
+    get_employees_page,
     update_employee_name, 
-    import_employee_list,
+    import_employees_from_file,
     get_latest_session_id,
     get_report_data,
-    get_db_connection,
     get_session_by_id,
+    get_sessions_page,
+    get_last_action_id,
+    get_session_actions,
+    get_daily_summary,
+    get_summary_totals,
+    get_summary_report,
+    summarize_pending_sessions,
+    EMPLOYEES_NS,
+    SESSIONS_NS,
+    SUMMARY_NS,
 )
 
 # 1. Cấu hình Logging tập trung
@@ -33,8 +50,77 @@ logging.getLogger('waitress').setLevel(logging.WARNING)
 app = Flask(__name__)
 app.config.from_object(Config)
 
-# Khởi tạo Engine AI với Class mới: EmployeeTrackerEngine
-analytics = EmployeeTrackerEngine(model_path=app.config['MODEL_PATH'])
+# Engine AI (EmployeeTrackerEngine) được tạo lười ở request đầu tiên cần đến nó.
+# Tiến trình con của frame ring (spawn) import lại file này dưới tên __mp_main__:
+# ở mức module không được nạp model, warm-up hay truy vấn DB.
+# Mỗi engine giữ trạng thái của đúng 1 luồng (frame_count, occupancy, tracker, session):
+# mỗi camera có engine riêng, video file / xử lý offline mượn 1 engine rảnh trong pool.
+_engines = {}
+_busy_engines = set()
+_building = {}            # key -> Event set when the engine of `key` is built (or failed)
+_engines_lock = threading.Lock()
+
+def engine_factory():
+    """Builds one engine (loads and warms up the model). Tools may replace it, see scripts/load_test.py."""
+    from src.camera import EmployeeTrackerEngine
+    return EmployeeTrackerEngine(model_path=app.config['MODEL_PATH'])
+
+def get_engine(key):
+    """
+    Engine for `key`, created on first use.
+    The model is loaded outside _engines_lock (it takes seconds), so acquire/release of other
+    streams never wait on it; concurrent callers for the same key wait for the one build.
+    """
+    while True:
+        with _engines_lock:
+            engine = _engines.get(key)
+            if engine is not None:
+                return engine
+            built = _building.get(key)
+            if built is None:
+                built = _building[key] = threading.Event()
+                break
+        built.wait()  # Built by another request (or it failed: try again ourselves)
+    try:
+        engine = engine_factory()
+        with _engines_lock:
+            _engines[key] = engine
+        return engine
+    finally:
+        with _engines_lock:
+            _building.pop(key).set()
+
+def acquire_engine(key=None):
+    """
+    Reserves an engine for one stream or job: the engine of `key` ("camera:<id>"),
+    or with key=None an idle pooled engine (already built ones first, at most ENGINE_POOL_SIZE).
+    Returns:
+        tuple: (key, engine), or None when `key` (or every pooled engine) is busy.
+    """
+    with _engines_lock:
+        if key is None:
+            idle = [k for k in (f"pool:{i}" for i in range(app.config['ENGINE_POOL_SIZE'])) if k not in _busy_engines]
+            if not idle:
+                return None
+            key = next((k for k in idle if k in _engines), idle[0])
+        elif key in _busy_engines:
+            return None
+        _busy_engines.add(key)
+    try:
+        return key, get_engine(key)
+    except Exception:
+        release_engine(key)
+        raise
+
+def release_engine(key):
+    with _engines_lock:
+        _busy_engines.discard(key)
+
+def _engine_response(key, stream):
+    """MJPEG response that frees the engine when the client disconnects (even before the first frame)."""
+    response = Response(stream, mimetype='multipart/x-mixed-replace; boundary=frame')
+    response.call_on_close(lambda: release_engine(key))
+    return response
 
 # --- 2. DASHBOARD & VIEW ROUTES ---
 
@@ -43,26 +129,22 @@ def index():
     """Main dashboard showing live status, logs, and file management."""
     try:
         # Đồng bộ Session ID hiện tại giữa AI Engine và Database
-        current_id = analytics.current_session_id or get_latest_session_id()
+        current_id = get_latest_session_id()
         
         actions = get_latest_actions(limit=20, session_id=current_id)
-        sessions = get_all_sessions()
-        emp_map = get_employee_name_map() 
 
-        # Quét thư mục để hiển thị danh sách video
-        uploaded_files = [f for f in os.listdir(app.config['UPLOAD_FOLDER']) 
-                          if f.endswith(('.mp4', '.avi', '.mov'))]
-        
-        result_files = [f for f in os.listdir(app.config['OUTPUT_FOLDER']) 
-                        if f.startswith('result_') and f.endswith(('.mp4', '.avi'))]
+        # Danh sách video lấy từ catalog (không quét thư mục); các trang sau tải qua /api/*
+        page_size = app.config['DASHBOARD_PAGE_SIZE']
+        uploaded_files = catalog.names('uploads')[:page_size]
+        result_files = catalog.names('outputs')[:page_size]
         
         return render_template('index.html', 
                                actions=actions, 
-                               sessions=sessions,
-                               emp_map=emp_map,
                                uploaded_files=uploaded_files,
                                result_files=result_files,
+                               page_size=page_size,
                                current_session_id=current_id,
+                               events_url=_events_url(),
                                timestamp=int(time.time()))
     except Exception as e:
         logger.error(f"Error rendering dashboard: {e}")
@@ -82,14 +164,62 @@ def video_feed(filename):
     """Starts AI stream and initializes a new monitoring session."""
     video_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
     if os.path.exists(video_path):
-        # Tạo session mới mỗi khi bấm xem video
-        new_id = create_new_session(filename)
-        analytics.start_new_analysis(video_path, session_id=new_id) 
+        reserved = acquire_engine()
+        if reserved is None:
+            return "All analysis engines are busy, try again later", 503
+        key, engine = reserved
+        try:
+            # Tạo session mới mỗi khi bấm xem video
+            new_id = create_new_session(filename)
+            engine.start_new_analysis(video_path, session_id=new_id)
+        except Exception:
+            release_engine(key)
+            raise
         
-        return Response(analytics.generate_stream(video_path),
-                        mimetype='multipart/x-mixed-replace; boundary=frame')
+        return _engine_response(key, engine.generate_stream(video_path))
     return "Video not found", 404
 
+@app.route('/camera_feed/<cam_id>')
+def camera_feed(cam_id):
+    """Live AI stream from a registered camera (RTSP/HTTP/device)."""
+    camera = capture_service.get(cam_id)
+    if camera is None:
+        return "Camera not found", 404
+    reserved = acquire_engine(f"camera:{cam_id}")
+    if reserved is None:
+        return "Camera is already being analyzed", 409
+    key, engine = reserved
+    new_id = create_new_session(cam_id)
+    return _engine_response(key, engine.generate_live_stream(camera, session_id=new_id))
+
+@app.route('/api/cameras', methods=['GET', 'POST'])
+def api_cameras():
+    """GET: per-camera drop/lag metrics. POST (cam_id, source): register a live source."""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or request.form
+        cam_id, source = data.get('cam_id'), data.get('source')
+        if not cam_id or not source:
+            return jsonify({"error": "cam_id and source are required"}), 400
+        try:
+            source = validate_source(source)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        capture_service.add(cam_id, source)
+    return jsonify(capture_service.metrics())
+
+@app.route('/api/cameras/<cam_id>', methods=['DELETE'])
+def api_remove_camera(cam_id):
+    capture_service.remove(cam_id)
+    return jsonify(capture_service.metrics())
+
+def start_configured_cameras():
+    """Registers cameras from Config.CAMERA_SOURCES ("id=source,id=source")."""
+    for item in filter(None, (p.strip() for p in app.config['CAMERA_SOURCES'].split(','))):
+        cam_id, _, source = item.partition('=')
+        if cam_id and source:
+            capture_service.add(cam_id.strip(), source.strip())
+            logger.info(f"Camera registered: {cam_id} -> {source}")
+
 # --- 3. VIDEO PROCESSING & LOG ANALYTICS ---
 
 @app.route('/process_offline/<filename>')
@@ -99,12 +229,19 @@ def process_offline(filename):
     if not os.path.exists(input_path):
         return "Input file missing", 404
 
-    session_id = create_new_session(filename)
-    output_filename = f"result_S{session_id}_{filename}"
-    output_path = os.path.join(app.config['OUTPUT_FOLDER'], output_filename)
-    
-    # Gọi hàm xử lý file đã được khôi phục và tinh chỉnh
-    analytics.process_video_file(input_path, output_path, session_id=session_id)
+    reserved = acquire_engine()
+    if reserved is None:
+        return "All analysis engines are busy, try again later", 503
+    key, engine = reserved
+    try:
+        session_id = create_new_session(filename)
+        output_filename = f"result_S{session_id}_{filename}"
+        output_path = os.path.join(app.config['OUTPUT_FOLDER'], output_filename)
+        # Gọi hàm xử lý file đã được khôi phục và tinh chỉnh
+        engine.process_video_file(input_path, output_path, session_id=session_id)
+    finally:
+        release_engine(key)
+    catalog.touch('outputs', output_filename)
     return redirect(url_for('index'))
 
 @app.route('/get_video_logs/<filename>')
@@ -113,13 +250,8 @@ def get_video_logs(filename):
     try:
         # Trích xuất session_id từ tên file (Ví dụ: result_S15_video.mp4)
         session_id = filename.split('_')[1].replace('S', '')
-        with get_db_connection() as conn:
-            actions = conn.execute('''
-                SELECT a.*, e.full_name FROM actions a 
-                LEFT JOIN employees e ON a.employee_id = e.emp_id 
-                WHERE a.session_id = ? ORDER BY a.timestamp ASC
-            ''', (session_id,)).fetchall()
-            return jsonify([dict(row) for row in actions])
+        # Phiên cũ đã lưu trữ sang Parquet vẫn đọc được (src/archive.py)
+        return jsonify(get_session_actions(session_id))
     except Exception as e:
         logger.error(f"Log retrieval error: {e}")
         return jsonify([])
@@ -139,6 +271,7 @@ def delete_output(session_id):
         
         if os.path.exists(path):
             send2trash(os.path.abspath(path))
+            catalog.remove('outputs', result_name)
             print(f"[SUCCESS] Đã đưa kết quả {result_name} vào thùng rác.")
             
     return redirect(url_for('index'))
@@ -154,6 +287,7 @@ def delete_raw_upload(filename):
         try:
             # Chỉ đưa file vào thùng rác, không đụng đến Database
             send2trash(os.path.abspath(file_path))
+            catalog.remove('uploads', filename)
             print(f"[SUCCESS] Đã đưa {filename} vào thùng rác.")
         except Exception as e:
             print(f"[ERROR] Không thể xóa tệp: {e}")
@@ -163,6 +297,192 @@ def delete_raw_upload(filename):
     # Quay lại trang chính
     return redirect(url_for('index'))
 
+# --- 3.1 JSON API (Dashboard lazy loading) ---
+
+def _page_args():
+    """Parses ?page=&per_page= with sane bounds."""
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', app.config['DASHBOARD_PAGE_SIZE'], type=int), 1),
+                   app.config['API_MAX_PAGE_SIZE'])
+    return page, per_page
+
+# Version counters restart at 0 with the process: salt ETags so a browser never gets a stale 304
+_ETAG_SALT = format(int(time.time()), 'x')
+
+def _query_digest():
+    """Stable short digest of the query string (same across processes and restarts, unlike hash())."""
+    return hashlib.sha1(request.query_string).hexdigest()[:16]
+
+def _conditional_json(build, etag):
+    """
+    JSON response with ETag / If-None-Match support.
+    `etag` is a cheap precomputed version tag (catalog/cache version, last id...),
+    so on a 304 the payload is not even built.
+    """
+    etag = f"{_ETAG_SALT}-{etag}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    response = jsonify(build())
+    response.headers['Cache-Control'] = 'no-cache'
+    response.set_etag(etag)
+    return response
+
+def _catalog_listing(kind):
+    page, per_page = _page_args()
+    def build():
+        items, total = catalog.page(kind, page, per_page)
+        return {"items": items, "page": page, "per_page": per_page, "total": total}
+    return _conditional_json(build, etag=f"{catalog.etag(kind)}-{page}-{per_page}")
+
+@app.route('/api/uploads')
+def api_uploads():
+    """Paginated list of uploaded videos with metadata."""
+    return _catalog_listing('uploads')
+
+@app.route('/api/outputs')
+def api_outputs():
+    """Paginated list of result videos with metadata and session id."""
+    return _catalog_listing('outputs')
+
+@app.route('/api/sessions')
+def api_sessions():
+    """Paginated list of monitoring sessions, newest first."""
+    page, per_page = _page_args()
+    def build():
+        rows, total = get_sessions_page(limit=per_page, offset=(page - 1) * per_page)
+        return {"items": [dict(r) for r in rows], "page": page, "per_page": per_page, "total": total}
+    return _conditional_json(build, etag=f"sessions-{query_cache.version(SESSIONS_NS)}-{page}-{per_page}")
+
+@app.route('/api/actions')
+def api_actions():
+    """Latest actions of a session (defaults to the engine's current session)."""
+    session_id = request.args.get('session_id', type=int) or get_latest_session_id()
+    limit = min(request.args.get('limit', 20, type=int), app.config['API_MAX_PAGE_SIZE'])
+    def build():
+        rows = get_latest_actions(limit=limit, session_id=session_id)
+        return {"session_id": session_id, "items": [dict(r) for r in rows]}
+    # Tên nhân viên được JOIN vào từng dòng nên ETag gồm cả version của employees
+    etag = f"actions-{session_id}-{get_last_action_id(session_id)}-{query_cache.version(EMPLOYEES_NS)}-{limit}"
+    return _conditional_json(build, etag=etag)
+
+@app.route('/api/employees')
+def api_employees():
+    """Paginated employee list (emp_id, full_name), ordered by id."""
+    page, per_page = _page_args()
+    def build():
+        items, total = get_employees_page(limit=per_page, offset=(page - 1) * per_page)
+        return {"items": items, "page": page, "per_page": per_page, "total": total}
+    return _conditional_json(build, etag=f"employees-{query_cache.version(EMPLOYEES_NS)}-{page}-{per_page}")
+
+@app.route('/api/cache')
+def api_cache_stats():
+    """Hit/miss/eviction counters of the DB read-through cache."""
+    return jsonify(query_cache.snapshot())
+
+def _utilization_args():
+    """
+    Parses ?start=YYYY-MM-DD&end=YYYY-MM-DD (local dates, end inclusive), ?zones=a,b and
+    ?sources=office_A,cam1 (video base names / camera ids).
+    """
+    def day(name, shift=0):
+        value = request.args.get(name)
+        return time.mktime(time.strptime(value, '%Y-%m-%d')) + shift if value else None
+    def names(name):
+        value = request.args.get(name)
+        return set(value.split(',')) if value else None
+    return day('start'), day('end', 86400), names('zones'), names('sources')
+
+def _utilization_json(build):
+    try:
+        start, end, zones, sources = _utilization_args()
+    except ValueError:
+        return jsonify({"error": "Ngày không hợp lệ (YYYY-MM-DD)"}), 400
+    etag = f"{occupancy_store.etag()}-{_query_digest()}"
+    return _conditional_json(lambda: build(start, end, zones, sources), etag=etag)
+
+@app.route('/api/utilization')
+def api_utilization():
+    """Share of its observed time each zone was occupied, per source, over every session in the date range."""
+    return _utilization_json(lambda *args: {"sources": occupancy_store.utilization(*args)})
+
+@app.route('/api/utilization/hourly')
+def api_utilization_hourly():
+    """Utilization per source and zone by hour of day, plus the top peak hours."""
+    def build(*args):
+        profile, observed = occupancy_store.hourly_profile(*args)
+        top = request.args.get('top', 3, type=int)
+        return {"sources": profile, "observed_seconds": observed,
+                "peak_hours": occupancy_store.peak_hours(*args, top=top)}
+    return _utilization_json(build)
+
+@app.route('/api/utilization/heatmap')
+def api_utilization_heatmap():
+    """7 x 24 matrix (Monday first) of utilization over the selected zones."""
+    return _utilization_json(lambda *args: {"heatmap": occupancy_store.heatmap(*args)})
+
+def _date_arg(name):
+    """?name=YYYY-MM-DD or None; raises ValueError on a malformed date."""
+    value = request.args.get(name)
+    if value:
+        time.strptime(value, '%Y-%m-%d')
+    return value or None
+
+@app.route('/api/summary')
+def api_summary():
+    """Paginated per-employee, per-day summary (first/last seen, seated seconds, departures)."""
+    page, per_page = _page_args()
+    try:
+        start, end = _date_arg('start'), _date_arg('end')
+    except ValueError:
+        return jsonify({"error": "Ngày không hợp lệ (YYYY-MM-DD)"}), 400
+    employee_id = request.args.get('employee_id') or None
+    def build():
+        items, total = get_daily_summary(start, end, employee_id, limit=per_page, offset=(page - 1) * per_page)
+        return {"items": items, "page": page, "per_page": per_page, "total": total}
+    return _conditional_json(build, etag=f"{query_cache.version(SUMMARY_NS)}-{_query_digest()}")
+
+@app.route('/api/summary/employees')
+def api_summary_employees():
+    """Per-employee totals over ?start=&end= (days present, seated time, departures)."""
+    try:
+        start, end = _date_arg('start'), _date_arg('end')
+    except ValueError:
+        return jsonify({"error": "Ngày không hợp lệ (YYYY-MM-DD)"}), 400
+    return _conditional_json(lambda: {"items": get_summary_totals(start, end)},
+                             etag=f"{query_cache.version(SUMMARY_NS)}-{_query_digest()}")
+
+# --- 3.2 SERVER-SENT EVENTS (Live activity log) ---
+
+# Luồng chính chạy trên server SSE riêng (src/sse.py) để không giữ luồng Waitress.
+# /api/events chỉ là đường dự phòng (khi chạy không có server SSE), giới hạn SSE_MAX_POOL_STREAMS luồng.
+_pool_streams = threading.BoundedSemaphore(app.config['SSE_MAX_POOL_STREAMS'])
+
+@app.route('/api/events')
+@app.route('/api/sessions/<int:session_id>/events')
+def action_events(session_id=None):
+    """
+    Fallback SSE feed of newly logged actions (all sessions, or one). Resumes from Last-Event-ID.
+    Returns 204 when the pool quota is used up: EventSource then stops and the page polls /api/actions.
+    """
+    if not _pool_streams.acquire(blocking=False):
+        return Response(status=204)
+    cursor = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    after_id = int(cursor) if cursor and cursor.isdigit() else None
+    response = Response(action_stream(session_id, after_id),
+                        mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Released by the WSGI close(), which also runs when the generator never started (client gone early)
+    response.call_on_close(_pool_streams.release)
+    return response
+
+def _events_url():
+    """Where the dashboard opens its EventSource: the dedicated SSE server if running, else the pool fallback."""
+    if sse_server.port:
+        return f"//{request.host.rsplit(':', 1)[0]}:{sse_server.port}/events"
+    return url_for('action_events')
+
 # --- 4. HUMAN RESOURCES & REPORTS ---
 
 @app.route('/import_employees', methods=['POST'])
@@ -170,20 +490,9 @@ def import_employees():
     """Bulk import employee data from CSV/Excel for recognition."""
     file = request.files.get('file')
     if file:
-        try:
-            df = pd.read_csv(file) if file.filename.endswith('.csv') else pd.read_excel(file)
-            data_to_import = []
-            for _, row in df.iterrows():
-                # Map các cột theo chuẩn template của Duy Tân
-                emp_id = row.get('Mã NV') or row.get('Ma NV')
-                full_name = row.get('Họ Tên') or row.get('Ho Ten')
-                if emp_id and full_name:
-                    data_to_import.append((str(emp_id), str(full_name), 'Staff'))
-            
-            if data_to_import:
-                import_employee_list(data_to_import)
-        except Exception as e:
-            logger.error(f"Bulk import failed: {e}")
+        # Đọc theo chunk + upsert theo lô; tên cột theo chuẩn template của Duy Tân
+        counts = import_employees_from_file(file.stream, file.filename, default_position='Staff')
+        logger.info(f"Employee import from {file.filename}: {counts}")
     return redirect(url_for('index'))
 
 # --- 2.1 THÊM ROUTE UPLOAD (Bị thiếu) ---
@@ -204,10 +513,82 @@ def upload_video():
         filename = file.filename
         save_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         file.save(save_path)
+        catalog.touch('uploads', filename)
+        catalog.probe_async('uploads', filename)
         logger.info(f"Video uploaded successfully: {filename}")
         return redirect(url_for('index'))
     return redirect(request.url)
 
+# --- 2.2 UPLOAD CÓ THỂ TIẾP TỤC (Chunked, resumable) ---
+# Giao thức offset:
+#   GET   /upload/<name>?size=N -> {"offset": số byte đã nhận, "complete"}
+#   PATCH /upload/<name>  (Upload-Offset, Upload-Length, body = 1 chunk) -> {"offset", "complete"}
+# Dữ liệu ghi thẳng vào <name>.part trong thư mục uploads, hoàn tất thì đổi tên (không copy).
+
+def _upload_paths(filename):
+    name = os.path.basename(filename)
+    if not name or name != filename or not name.lower().endswith(('.mp4', '.avi', '.mov')):
+        return None, None
+    final_path = os.path.join(app.config['UPLOAD_FOLDER'], name)
+    return final_path, final_path + '.part'
+
+@app.route('/upload/<filename>', methods=['GET', 'HEAD'])
+def upload_status(filename):
+    """Current offset of a (possibly interrupted) upload."""
+    final_path, part_path = _upload_paths(filename)
+    if not final_path:
+        return jsonify({"error": "invalid filename"}), 400
+    if request.args.get('size', type=int) == 0:
+        return jsonify({"error": "Tệp rỗng (0 byte)"}), 400
+    if os.path.exists(part_path):
+        offset, complete = os.path.getsize(part_path), False
+    elif os.path.exists(final_path) and os.path.getsize(final_path) == request.args.get('size', type=int):
+        # Cùng tên, cùng kích thước: đã tải xong trước đó
+        offset, complete = os.path.getsize(final_path), True
+    else:
+        offset, complete = 0, False
+    response = jsonify({"offset": offset, "complete": complete})
+    response.headers['Upload-Offset'] = str(offset)
+    return response
+
+@app.route('/upload/<filename>', methods=['PATCH'])
+def upload_chunk(filename):
+    """Appends one chunk at Upload-Offset; finalizes when Upload-Length is reached."""
+    final_path, part_path = _upload_paths(filename)
+    if not final_path:
+        return jsonify({"error": "invalid filename"}), 400
+    try:
+        offset = int(request.headers['Upload-Offset'])
+        total = int(request.headers['Upload-Length'])
+    except (KeyError, ValueError):
+        return jsonify({"error": "Upload-Offset and Upload-Length headers are required"}), 400
+    if total <= 0:
+        return jsonify({"error": "Tệp rỗng (0 byte)"}), 400
+
+    current = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if offset != current:
+        # Client and server disagree (lost response, retry...): tell the client where to resume
+        return jsonify({"error": "offset mismatch", "offset": current}), 409
+
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    chunk_size = 1024 * 1024
+    with open(part_path, 'ab') as f:
+        while True:
+            chunk = request.stream.read(chunk_size)
+            if not chunk:
+                break
+            f.write(chunk)
+        offset = f.tell()
+
+    complete = offset >= total
+    if complete:
+        os.replace(part_path, final_path)
+        catalog.touch('uploads', os.path.basename(final_path))
+        # fps/frame count/độ phân giải được đọc 1 lần ở luồng nền và cache lại
+        catalog.probe_async('uploads', os.path.basename(final_path))
+        logger.info(f"Video uploaded successfully: {filename} ({offset} bytes)")
+    return jsonify({"offset": offset, "complete": complete})
+
 @app.route('/export_report')
 def export_report():
     """Exports full activity history to an Excel report."""
@@ -215,26 +596,32 @@ def export_report():
     if df is not None:
         report_filename = f"Personnel_Report_{int(time.time())}.xlsx"
         report_path = os.path.join(app.config['REPORT_FOLDER'], report_filename)
-        df.to_excel(report_path, index=False, engine='openpyxl')
+        with pd.ExcelWriter(report_path, engine='openpyxl') as writer:
+            df.to_excel(writer, sheet_name='Actions', index=False)
+            summary = get_summary_report()
+            if summary is not None:
+                summary.to_excel(writer, sheet_name='Daily Summary', index=False)
         return send_file(report_path, as_attachment=True)
     return "No report data", 404
 
 
-# Route này dùng để PHÁT video trên trình duyệt
+# Route này dùng để PHÁT video trên trình duyệt (Range/ETag, fast-start)
 @app.route('/view_output/<filename>')
 def view_output(filename):
-    return send_from_directory(
-        app.config['OUTPUT_FOLDER'], 
-        filename, 
-        mimetype='video/mp4',
-        as_attachment=False  # QUAN TRỌNG: Để False để trình duyệt cho phép phát
-    )
+    file_path = safe_join(app.config['OUTPUT_FOLDER'], filename)
+    if not file_path or not os.path.isfile(file_path):
+        return "Not found", 404
+    # Kết quả cũ (trước khi có +faststart) được remux nền ở lần xem đầu
+    ensure_faststart_async(file_path)
+    return send_video(file_path, as_attachment=False)
 
 # Giữ nguyên route này nếu bạn vẫn muốn nút tải về hoạt động riêng
 @app.route('/download_output/<filename>')
 def download_output(filename):
-    file_path = os.path.join(app.config['OUTPUT_FOLDER'], filename)
-    return send_file(file_path, as_attachment=True) if os.path.exists(file_path) else ("Not found", 404)
+    file_path = safe_join(app.config['OUTPUT_FOLDER'], filename)
+    if not file_path or not os.path.isfile(file_path):
+        return "Not found", 404
+    return send_video(file_path, as_attachment=True)
 
 # --- 5. SYSTEM INITIALIZATION ---
 
@@ -245,14 +632,20 @@ def download_output(filename):
 if __name__ == '__main__':
     # Đảm bảo Database luôn sẵn sàng trước khi Server chạy
     init_db()
+    # Phiên bị ngắt giữa chừng (crash) chưa được tổng hợp
+    summarize_pending_sessions()
+    start_configured_cameras()
+    # Luồng SSE (nhật ký Live) chạy trên cổng riêng, không chiếm luồng Waitress
+    sse_server.start()
     
     # Terminal Header chuyên nghiệp cho buổi Demo
     print("\n" + "="*50)
     print("AI EMPLOYEE TRACKER - PRODUCTION SERVER")
     print("Status: RUNNING")
     print("Host: http://localhost:5000")
+    print(f"Events: http://localhost:{sse_server.port}/events")
     print("Engine: OpenVINO Optimized (Intel CPU)")
     print("="*50 + "\n")
     
-    # Triển khai bằng Waitress để đạt độ ổn định cao nhất (6 luồng)
-    serve(app, host='0.0.0.0', port=5000, threads=6)
\ No newline at end of file
+    # Triển khai bằng Waitress để đạt độ ổn định cao nhất (SERVER_THREADS luồng, mặc định 6)
+    serve(app, host='0.0.0.0', port=5000, threads=app.config['SERVER_THREADS'])
\ No newline at end of file
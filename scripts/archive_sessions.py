@@ -0,0 +1,30 @@
+import os
+import sys
+import argparse
+
+# Xac dinh thu muc goc cua du an (di len 1 cap tu scripts/)
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from config import Config
+from src.database import init_db, get_latest_session_id
+from src.archive import archive_old_sessions
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Chuyen actions cua cac phien cu sang Parquet (data/archive/) va thu gon employees.db.")
+    parser.add_argument('--days', type=int, default=Config.RETENTION_DAYS,
+                        help=f"Tuoi toi thieu cua phien (ngay), mac dinh {Config.RETENTION_DAYS}")
+    args = parser.parse_args()
+
+    init_db()
+    # Khong bao gio luu tru phien moi nhat (co the dang chay)
+    result = archive_old_sessions(args.days, exclude_session_ids=[get_latest_session_id()])
+
+    print(f"Da luu tru {result['actions']} actions tu {result['sessions']} phien.")
+    for path in result["files"]:
+        print(f"  -> {os.path.relpath(path, ROOT_DIR)}")
+
+if __name__ == "__main__":
+    main()
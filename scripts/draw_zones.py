@@ -137,8 +137,11 @@ def main():
             break
 
     cv2.destroyAllWindows()
-    with open(json_path, "w") as f:
+    # Ghi ra file tam roi os.replace de engine dang chay khong doc phai file ghi do
+    tmp_path = json_path + ".tmp"
+    with open(tmp_path, "w") as f:
         json.dump(zones, f, indent=4)
+    os.replace(tmp_path, json_path)
     print(f"\nDa luu thanh cong vao: {json_path}")
 
 if __name__ == "__main__":
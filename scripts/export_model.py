@@ -1,7 +1,13 @@
 import os
+import argparse
 from ultralytics import YOLO
 
 def main():
+    parser = argparse.ArgumentParser(description="Export yolov8n sang OpenVINO.")
+    parser.add_argument('--dynamic', action='store_true',
+                        help="Input shape dong: can khi profile camera (scripts/tune_camera.py) doi IMG_SIZE")
+    args = parser.parse_args()
+
     # 1. Khởi tạo đường dẫn
     model_path = "models/yolov8n.pt"
     
@@ -17,7 +23,7 @@ def main():
     # 3. Xuất sang OpenVINO
     # YOLO sẽ tự tạo thư mục 'yolov8n_openvino_model' ngay tại vị trí file .pt
     print("--- Step 2: Exporting to OpenVINO format ---")
-    model.export(format='openvino')
+    model.export(format='openvino', dynamic=args.dynamic)
 
     print(f"\nSuccess! Model is ready in: models/yolov8n_openvino_model/")
 
@@ -0,0 +1,439 @@
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import argparse
+import tempfile
+import threading
+import itertools
+import http.client
+from collections import defaultdict
+import cv2
+import numpy as np
+
+# Xac dinh thu muc goc cua du an (di len 1 cap tu scripts/)
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+BOUNDARY = b'--frame\r\n'
+
+class Recorder:
+    """Thread-safe latency / error / byte counters per request kind."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.bytes = defaultdict(int)
+        self.streams = []
+        self.sse = defaultdict(int)
+        self.sockets = set()
+
+    def add(self, kind, seconds, status, nbytes=0):
+        with self.lock:
+            self.latencies[kind].append(seconds * 1000)
+            self.statuses[kind][status] += 1
+            self.bytes[kind] += nbytes
+            if status >= 400 or status == 0:
+                self.errors[kind] += 1
+
+    def add_stream(self, stats):
+        with self.lock:
+            self.streams.append(stats)
+
+    def add_sse(self, **counts):
+        with self.lock:
+            for key, value in counts.items():
+                self.sse[key] += value
+
+    def track_socket(self, sock, open_=True):
+        """Long-lived connections are shut down at the end so their readers return immediately."""
+        with self.lock:
+            (self.sockets.add if open_ else self.sockets.discard)(sock)
+
+    def close_sockets(self):
+        with self.lock:
+            sockets, self.sockets = list(self.sockets), set()
+        for sock in sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+def request(port, method, path, body=None, headers=None, timeout=120):
+    """One HTTP request. Returns (status, body bytes, response headers); status 0 = connection error."""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    try:
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, response.read(), dict(response.getheaders())
+    except (OSError, http.client.HTTPException):
+        return 0, b'', {}
+    finally:
+        conn.close()
+
+def timed(recorder, kind, port, method, path, **kwargs):
+    t0 = time.perf_counter()
+    status, body, headers = request(port, method, path, **kwargs)
+    recorder.add(kind, time.perf_counter() - t0, status, len(body))
+    return status, body, headers
+
+# --- CLIENT PROFILES ---
+
+def mjpeg_viewer(recorder, port, path, kind, stop, target_fps):
+    """Reads a multipart MJPEG stream, reconnecting when it ends (new session), until `stop`."""
+    while not stop.is_set():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        t0 = time.perf_counter()
+        frames, gaps, buffer, last = 0, [], b'', None
+        try:
+            conn.request('GET', path)
+            response = conn.getresponse()
+            if response.status != 200:
+                recorder.add(kind, time.perf_counter() - t0, response.status)
+                stop.wait(1)
+                continue
+            while not stop.is_set():
+                chunk = response.read1(65536)
+                if not chunk:
+                    break
+                buffer += chunk
+                count = buffer.count(BOUNDARY)
+                if count:
+                    now = time.perf_counter()
+                    if last is None:
+                        recorder.add(kind + ' (first frame)', now - t0, 200)
+                    else:
+                        gaps.append((now - last) * 1000)
+                    last = now
+                    frames += count
+                    buffer = buffer[buffer.rfind(BOUNDARY) + len(BOUNDARY):]
+        except (OSError, http.client.HTTPException):
+            recorder.add(kind, time.perf_counter() - t0, 0)
+        finally:
+            conn.close()
+        elapsed = time.perf_counter() - t0
+        if frames:
+            expected = int(elapsed * target_fps)
+            recorder.add_stream({"kind": kind, "frames": frames, "seconds": elapsed,
+                                 "dropped": max(expected - frames, 0), "gaps_ms": gaps})
+
+def sse_listener(recorder, sse_port, stop, fallback, timeout=60):
+    """
+    Keeps the dashboard's EventSource open on the SSE server (src/sse.py), reconnecting with
+    Last-Event-ID when the server ends the stream. A 503 (SSE_MAX_CLIENTS reached) makes the
+    dashboard fall back to polling /api/actions, like static/js/script.js.
+    """
+    last_id = None
+    while not stop.is_set():
+        conn = http.client.HTTPConnection('127.0.0.1', sse_port, timeout=timeout)
+        t0, sock = time.perf_counter(), None
+        try:
+            conn.connect()
+            # http.client drops conn.sock once the (Connection: close) response starts; keep our own handle
+            sock = conn.sock
+            recorder.track_socket(sock)
+            conn.request('GET', '/events', headers={'Last-Event-ID': str(last_id)} if last_id else {})
+            response = conn.getresponse()
+            recorder.add('SSE /events (connect)', time.perf_counter() - t0, response.status)
+            if response.status == 503:
+                recorder.add_sse(rejected=1)
+                fallback.set()
+                return
+            if response.status != 200:
+                stop.wait(1)
+                continue
+            recorder.add_sse(connections=1)
+            while not stop.is_set():
+                line = response.fp.readline()
+                if not line:
+                    break
+                if line.startswith(b'id: '):
+                    last_id = int(line[4:])
+                    recorder.add_sse(events=1)
+        except (OSError, http.client.HTTPException, ValueError):
+            if not stop.is_set():
+                recorder.add('SSE /events (connect)', time.perf_counter() - t0, 0)
+        finally:
+            if sock is not None:
+                recorder.track_socket(sock, open_=False)
+            conn.close()
+        recorder.add_sse(stream_seconds=time.perf_counter() - t0)
+
+def dashboard_poller(recorder, port, stop, interval, session_id_fn, sse_port=None):
+    """
+    Polls the dashboard JSON API like static/js/script.js, with If-None-Match.
+    With `sse_port` the live action log comes from an SSE stream and /api/actions is only
+    polled if the stream is refused.
+    """
+    etags, fallback = {}, threading.Event()
+    timed(recorder, 'GET /', port, 'GET', '/')
+    if sse_port:
+        threading.Thread(target=sse_listener, args=(recorder, sse_port, stop, fallback), daemon=True).start()
+    while not stop.is_set():
+        session_id = session_id_fn()
+        paths = ['/api/uploads', '/api/outputs', '/api/employees', '/api/summary']
+        if not sse_port or fallback.is_set():
+            paths.insert(3, f'/api/actions?session_id={session_id or ""}')
+        for path in paths:
+            headers = {'If-None-Match': etags[path]} if path in etags else {}
+            status, _, resp_headers = timed(recorder, 'GET ' + path.split('?')[0], port, 'GET', path, headers=headers)
+            if resp_headers.get('ETag'):
+                etags[path] = resp_headers['ETag']
+        stop.wait(interval)
+
+def uploader(recorder, port, stop, source_path, chunk_mb, worker_id):
+    """Resumable PATCH uploads of `source_path` under new names, repeated until `stop`."""
+    with open(source_path, 'rb') as f:
+        data = f.read()
+    chunk = int(chunk_mb * 1024 * 1024)
+    total = len(data)
+    n = 0
+    while not stop.is_set():
+        name = f"loadtest_upload_{worker_id}_{n}.mp4"
+        offset = 0
+        t0 = time.perf_counter()
+        while offset < total and not stop.is_set():
+            body = data[offset:offset + chunk]
+            status, reply, _ = timed(recorder, 'PATCH /upload', port, 'PATCH', f'/upload/{name}', body=body,
+                                    headers={'Upload-Offset': str(offset), 'Upload-Length': str(total),
+                                             'Content-Type': 'application/octet-stream'})
+            if status != 200:
+                break
+            offset = json.loads(reply)['offset']
+        if offset >= total:
+            recorder.add('upload (whole file)', time.perf_counter() - t0, 200, total)
+        n += 1
+
+def exporter(recorder, port, stop, interval):
+    while not stop.is_set():
+        timed(recorder, 'GET /export_report', port, 'GET', '/export_report', timeout=300)
+        stop.wait(interval)
+
+def offline_worker(recorder, port, stop, filename):
+    while not stop.is_set():
+        timed(recorder, 'GET /process_offline', port, 'GET', f'/process_offline/{filename}', timeout=3600)
+
+def pool_sampler(server, threads, stop, samples, sse=None, period=0.1):
+    """Samples Waitress' dispatcher (busy worker threads, queued requests) and open SSE streams."""
+    dispatcher = server.task_dispatcher
+    while not stop.is_set():
+        samples.append((dispatcher.active_count, len(dispatcher.queue), sse.clients if sse else 0))
+        stop.wait(period)
+
+# --- REPORT ---
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else None
+
+def build_report(recorder, samples, threads, duration, camera_metrics):
+    report = {"duration_s": duration, "threads": threads, "requests": {}, "streams": {}, "pool": {}}
+    for kind, values in sorted(recorder.latencies.items()):
+        report["requests"][kind] = {
+            "count": len(values),
+            "errors": recorder.errors[kind],
+            "statuses": dict(recorder.statuses[kind]),
+            "rps": round(len(values) / duration, 2),
+            "mb_s": round(recorder.bytes[kind] / duration / 1e6, 2),
+            "p50_ms": percentile(values, 50), "p95_ms": percentile(values, 95),
+            "p99_ms": percentile(values, 99), "max_ms": max(values),
+        }
+
+    by_kind = defaultdict(list)
+    for s in recorder.streams:
+        by_kind[s["kind"]].append(s)
+    for kind, items in by_kind.items():
+        frames = sum(s["frames"] for s in items)
+        seconds = sum(s["seconds"] for s in items)
+        gaps = [g for s in items for g in s["gaps_ms"]]
+        report["streams"][kind] = {
+            "connections": len(items), "frames": frames,
+            "fps_per_viewer": round(frames / seconds, 2) if seconds else None,
+            "dropped_vs_target": sum(s["dropped"] for s in items),
+            "gap_p95_ms": percentile(gaps, 95), "gap_max_ms": max(gaps) if gaps else None,
+        }
+    if camera_metrics:
+        report["streams"]["cameras (capture side)"] = camera_metrics
+
+    if recorder.sse:
+        report["sse"] = {k: round(v, 1) for k, v in recorder.sse.items()}
+        report["sse"]["open_max"] = max((c for _, _, c in samples), default=0)
+
+    if samples:
+        busy = [b for b, _, _ in samples]
+        queued = [q for _, q, _ in samples]
+        report["pool"] = {
+            "busy_mean": round(sum(busy) / len(busy), 2), "busy_max": max(busy),
+            "saturated_pct": round(100 * sum(b >= threads for b in busy) / len(busy), 1),
+            "queue_mean": round(sum(queued) / len(queued), 2), "queue_max": max(queued),
+            "queued_pct": round(100 * sum(q > 0 for q in queued) / len(queued), 1),
+        }
+    return report
+
+def print_report(report):
+    print("\n" + "=" * 96)
+    print(f"KET QUA LOAD TEST ({report['duration_s']:.0f}s, {report['threads']} luong Waitress)")
+    print("=" * 96)
+    print(f"{'Request':<32}{'n':>7}{'err':>6}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)")
+    fmt = lambda v: f"{v:9.1f}" if v is not None else f"{'-':>9}"
+    for kind, r in report["requests"].items():
+        print(f"{kind:<32}{r['count']:>7}{r['errors']:>6}{r['rps']:>8}"
+              f"{fmt(r['p50_ms'])}{fmt(r['p95_ms'])}{fmt(r['p99_ms'])}{fmt(r['max_ms'])}")
+    for kind, s in report["streams"].items():
+        if isinstance(s, list):
+            for cam in s:
+                print(f"{'camera ' + cam['cam_id']:<32} doc {cam['frames_read']} frame, bo {cam['frames_dropped']}, "
+                      f"reconnect {cam['reconnects']}")
+            continue
+        print(f"{kind:<32} {s['connections']} ket noi, {s['frames']} frame, {s['fps_per_viewer']} fps/nguoi xem, "
+              f"thieu {s['dropped_vs_target']} frame so voi muc tieu, gap p95 {s['gap_p95_ms'] or 0:.0f} ms")
+    sse = report.get("sse")
+    if sse:
+        print(f"{'SSE /events':<32} {sse.get('connections', 0):.0f} ket noi (toi da {sse['open_max']} cung luc), "
+              f"{sse.get('events', 0):.0f} su kien, bi tu choi {sse.get('rejected', 0):.0f} (chuyen sang polling)")
+    pool = report["pool"]
+    if pool:
+        print(f"Thread pool: ban trung binh {pool['busy_mean']}/{report['threads']} (max {pool['busy_max']}), "
+              f"bao hoa {pool['saturated_pct']}% thoi gian, hang doi max {pool['queue_max']} "
+              f"(co request cho {pool['queued_pct']}% thoi gian)")
+    print("=" * 96)
+
+# --- SETUP ---
+
+def make_test_video(path, seconds, fps, width, height):
+    """Synthetic video (moving noise background) for the stub detector."""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    for i in range(int(seconds * fps)):
+        writer.write(np.roll(base, i * 4, axis=1))
+    writer.release()
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load test cuc bo: chay app voi detector gia (stub) va mo phong luu luong hon hop.")
+    parser.add_argument('--threads', type=int, help="So luong Waitress (mac dinh Config.SERVER_THREADS)")
+    parser.add_argument('--duration', type=float, default=60, help="Thoi gian chay (giay)")
+    parser.add_argument('--viewers', type=int, default=2, help="So nguoi xem /video_feed (MJPEG)")
+    parser.add_argument('--cameras', type=int, default=0, help="So camera gia (loop:<video>) va nguoi xem /camera_feed")
+    parser.add_argument('--pollers', type=int, default=5, help="So dashboard dang mo (poll JSON API + 1 luong SSE moi dashboard)")
+    parser.add_argument('--poll-interval', type=float, default=3, help="Chu ky poll cua dashboard (giay)")
+    parser.add_argument('--no-sse', action='store_true',
+                        help="Dashboard khong mo luong SSE (chi poll /api/actions nhu khi khong co server SSE)")
+    parser.add_argument('--uploaders', type=int, default=1, help="So client upload dong thoi")
+    parser.add_argument('--upload-file', help="File upload (mac dinh: video test)")
+    parser.add_argument('--chunk-mb', type=float, default=8, help="Kich thuoc moi PATCH (MB)")
+    parser.add_argument('--exporters', type=int, default=1, help="So client xuat Excel")
+    parser.add_argument('--export-interval', type=float, default=10)
+    parser.add_argument('--offline', type=int, default=0, help="So job /process_offline dong thoi")
+    parser.add_argument('--inference-ms', type=float, default=30, help="Do tre gia lap cua 1 lan inference")
+    parser.add_argument('--video', help="Video dau vao (mac dinh: tao video tong hop)")
+    parser.add_argument('--video-seconds', type=float, default=20)
+    parser.add_argument('--resolution', default='1280x720')
+    parser.add_argument('--data-dir', help="Thu muc data (mac dinh: thu muc tam, xoa sau khi chay)")
+    parser.add_argument('--json', help="Ghi ket qua ra file JSON")
+    args = parser.parse_args()
+
+    # Cau hinh phai duoc dat TRUOC khi import app/config
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix='tracker_loadtest_')
+    os.environ['TRACKER_DATA_DIR'] = data_dir
+    os.environ['CAMERA_SOURCES'] = ''
+    # Du engine cho moi nguoi xem /video_feed va job offline (pool gioi han, thua -> 503)
+    os.environ.setdefault('ENGINE_POOL_SIZE', str(max(args.viewers + args.offline, 1)))
+
+    from waitress import create_server
+    import app as tracker_app
+    from config import Config
+    from src.capture import capture_service
+    from stub_detector import StubDetector, seat_zones
+
+    # Moi engine (pool / camera) dung 1 detector gia rieng, khong can file model
+    seeds = itertools.count()
+    def stub_engine():
+        from src.camera import EmployeeTrackerEngine
+        return EmployeeTrackerEngine(model=StubDetector(args.inference_ms, seed=next(seeds)))
+    tracker_app.engine_factory = stub_engine
+    threads = args.threads or Config.SERVER_THREADS
+
+    tracker_app.init_db()
+    width, height = (int(v) for v in args.resolution.lower().split('x'))
+    video_name = 'loadtest.mp4'
+    video_path = os.path.join(Config.UPLOAD_FOLDER, video_name)
+    if args.video:
+        shutil.copy(args.video, video_path)
+    else:
+        print(f"Tao video tong hop {width}x{height}, {args.video_seconds}s ...")
+        make_test_video(video_path, args.video_seconds, 30, width, height)
+    # Zone o dung vi tri nguoi gia -> logic Lam viec / Roi ban va ghi DB deu duoc chay
+    cam_ids = [f'loadtest_cam{i}' for i in range(args.cameras)]
+    for name in ['loadtest'] + cam_ids:
+        with open(os.path.join(Config.DATA_DIR, f'{name}_zones.json'), 'w') as f:
+            json.dump(seat_zones(width, height), f)
+
+    # Engine duoc tao luoi o request dau tien; tao truoc de thoi gian nap model khong bi tinh vao ket qua
+    tracker_app.get_engine('pool:0')
+    server = create_server(tracker_app.app, host='127.0.0.1', port=0, threads=threads)
+    port = server.effective_port
+    threading.Thread(target=server.run, name='waitress-main', daemon=True).start()
+    sse = None if args.no_sse else tracker_app.sse_server
+    sse_port = sse.start(host='127.0.0.1', port=0) if sse else None
+    print(f"App chay tai http://127.0.0.1:{port}"
+          + (f", SSE tai http://127.0.0.1:{sse_port}/events" if sse else "") + f" (data: {data_dir})")
+
+    recorder, samples, stop = Recorder(), [], threading.Event()
+    workers = [threading.Thread(target=pool_sampler, args=(server, threads, stop, samples, sse))]
+    for _ in range(args.viewers):
+        workers.append(threading.Thread(target=mjpeg_viewer, args=(
+            recorder, port, f'/video_feed/{video_name}', 'MJPEG /video_feed', stop, Config.TARGET_FPS)))
+    for cam_id in cam_ids:
+        request(port, 'POST', '/api/cameras', body=json.dumps({"cam_id": cam_id, "source": f"loop:{video_path}"}),
+                headers={'Content-Type': 'application/json'})
+        workers.append(threading.Thread(target=mjpeg_viewer, args=(
+            recorder, port, f'/camera_feed/{cam_id}', 'MJPEG /camera_feed', stop, Config.TARGET_FPS)))
+    session_id_fn = tracker_app.get_latest_session_id
+    for _ in range(args.pollers):
+        workers.append(threading.Thread(target=dashboard_poller, args=(
+            recorder, port, stop, args.poll_interval, session_id_fn, sse_port)))
+    for i in range(args.uploaders):
+        workers.append(threading.Thread(target=uploader, args=(recorder, port, stop, args.upload_file or video_path, args.chunk_mb, i)))
+    for _ in range(args.exporters):
+        workers.append(threading.Thread(target=exporter, args=(recorder, port, stop, args.export_interval)))
+    for _ in range(args.offline):
+        workers.append(threading.Thread(target=offline_worker, args=(recorder, port, stop, video_name)))
+
+    print(f"Dang chay {len(workers) - 1} client trong {args.duration:.0f}s ...")
+    t0 = time.perf_counter()
+    for w in workers:
+        w.daemon = True
+        w.start()
+    try:
+        time.sleep(args.duration)
+    except KeyboardInterrupt:
+        print("Dung som (Ctrl+C).")
+    stop.set()
+    recorder.close_sockets()
+    duration = time.perf_counter() - t0
+    camera_metrics = capture_service.metrics()
+    for w in workers:
+        w.join(timeout=10)
+
+    report = build_report(recorder, samples, threads, duration, camera_metrics)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Da ghi {args.json}")
+
+    capture_service.stop_all()
+    if sse:
+        sse.stop()
+    server.close()
+    if not args.data_dir:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
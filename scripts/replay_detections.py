@@ -0,0 +1,57 @@
+import os
+import sys
+import argparse
+import itertools
+
+# Xac dinh thu muc goc cua du an (di len 1 cap tu scripts/)
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from config import Config
+from src.zones import ZoneRegistry
+from src.detections import DetectionCache, timed_replay
+
+def parse_list(cast):
+    """'3,5,10' -> [3, 5, 10] (de quet nhieu gia tri tham so)"""
+    return lambda text: [cast(v) for v in text.split(',') if v.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Chay lai logic zone/logging tu detection cache (khong chay model). "
+                    "Nhieu gia tri cach nhau boi dau phay se duoc quet to hop.")
+    parser.add_argument('cache', help="Thu muc cache, vd: data/detections/S15_office_A")
+    parser.add_argument('--zones', help="File zones JSON (mac dinh: data/<video>_zones.json)")
+    parser.add_argument('--min-work', type=parse_list(float), default=[Config.MIN_WORK_DURATION])
+    parser.add_argument('--patience', type=parse_list(int), default=[Config.PATIENCE_LIMIT])
+    parser.add_argument('--max-area', type=parse_list(int), default=[Config.MAX_NORMAL_AREA])
+    parser.add_argument('--max-aspect', type=parse_list(float), default=[Config.MAX_ASPECT_RATIO])
+    parser.add_argument('--events', action='store_true', help="In chi tiet tung su kien")
+    args = parser.parse_args()
+
+    cache = DetectionCache(args.cache)
+    registry = ZoneRegistry()
+    zones_path = args.zones or registry.path_for(cache.meta.get('video', ''))
+    geometry = registry.load(zones_path)
+    if not len(geometry):
+        print(f"LOI: Khong co zone nao trong {zones_path}")
+        return
+
+    print(f"CACHE : {args.cache} ({cache.total_frames} frames, {len(cache.infer_frames)} lan inference)")
+    print(f"ZONES : {zones_path} ({len(geometry)} zones)")
+    print("-" * 78)
+    print(f"{'min_work':>8} {'patience':>8} {'max_area':>8} {'aspect':>6} | {'events':>6} {'work':>5} {'left':>5} | {'time':>7} {'fps':>9}")
+
+    for min_work, patience, max_area, max_aspect in itertools.product(
+            args.min_work, args.patience, args.max_area, args.max_aspect):
+        events, elapsed, fps = timed_replay(cache, geometry, min_work_duration=min_work, patience_limit=patience,
+                                            max_area=max_area, max_aspect=max_aspect)
+        n_work = sum(1 for _, _, a in events if a.startswith("Làm việc"))
+        print(f"{min_work:>8} {patience:>8} {max_area:>8} {max_aspect:>6} | "
+              f"{len(events):>6} {n_work:>5} {len(events) - n_work:>5} | {elapsed:>6.2f}s {fps:>9.0f}")
+        if args.events:
+            for frame, emp_code, action in events:
+                print(f"    frame {frame:>7}  {emp_code:<6} {action}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import time
+import numpy as np
+
+# Synthetic stand-in for the YOLO model, injected by scripts/load_test.py through app.engine_factory.
+# It mimics the parts of the Ultralytics result API the engine touches:
+#   results[0].boxes -> len(), .xyxy / .id / .conf with .cpu().numpy()
+
+class _Column:
+    def __init__(self, values):
+        self._values = values
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self._values
+
+class StubBoxes:
+    def __init__(self, xyxy, ids, confs):
+        self.xyxy = _Column(xyxy)
+        self.id = _Column(ids)
+        self.conf = _Column(confs)
+
+    def __len__(self):
+        return len(self.xyxy.numpy())
+
+class StubResult:
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+SEATS = 4
+
+def seat_layout(width, height, seats=SEATS):
+    """
+    Grid of seated-person boxes (x1, y1, x2, y2) sized to pass the anti-merge filter.
+    Returns:
+        np.ndarray: float32 (seats, 4)
+    """
+    cols = int(np.ceil(np.sqrt(seats)))
+    rows = int(np.ceil(seats / cols))
+    cell_w, cell_h = width / cols, height / rows
+    box_w, box_h = min(cell_w * 0.5, 80), min(cell_h * 0.7, 200)
+    idx = np.arange(seats)
+    cx = (idx % cols + 0.5) * cell_w
+    cy = (idx // cols + 0.5) * cell_h
+    return np.stack([cx - box_w / 2, cy - box_h / 2, cx + box_w / 2, cy + box_h / 2], axis=1).astype(np.float32)
+
+def seat_zones(width, height, seats=SEATS, margin=10):
+    """Zones file content matching seat_layout(): {"zone_<i>": [[x, y], ...]} (draw_zones.py format)."""
+    zones = {}
+    for i, (x1, y1, x2, y2) in enumerate(seat_layout(width, height, seats).tolist()):
+        x1, y1, x2, y2 = int(x1) - margin, int(y1) - margin, int(x2) + margin, int(y2) + margin
+        zones[f"zone_{i + 1}"] = [[x1, y1], [x2, y1], [x2, y2], [x1, y2]]
+    return zones
+
+class StubDetector:
+    """
+    Fixed-latency detector: people sit at seat_layout() positions and randomly leave / come back.
+    Latency is spent in time.sleep, so like OpenVINO inference it does not hold the GIL.
+    """
+
+    def __init__(self, inference_ms=30, seats=SEATS, leave_prob=0.02, seed=0):
+        self.inference_ms = inference_ms
+        self.seats = seats
+        self.leave_prob = leave_prob
+        self._rng = np.random.default_rng(seed)
+        self._present = np.ones(self.seats, dtype=bool)
+        self._layouts = {}
+
+    def predict(self, frame, **kwargs):
+        return self.track(frame, **kwargs)
+
+    def track(self, frame, **kwargs):
+        if self.inference_ms > 0:
+            time.sleep(self.inference_ms / 1000.0)
+        h, w = frame.shape[:2]
+        layout = self._layouts.get((w, h))
+        if layout is None:
+            layout = self._layouts[(w, h)] = seat_layout(w, h, self.seats)
+
+        flip = self._rng.random(self.seats) < self.leave_prob
+        self._present ^= flip
+        idx = np.flatnonzero(self._present)
+        jitter = self._rng.integers(-3, 4, size=(len(idx), 4)).astype(np.float32)
+        boxes = StubBoxes(layout[idx] + jitter, idx.astype(np.float32) + 1, np.full(len(idx), 0.9, np.float32))
+        return [StubResult(boxes)]
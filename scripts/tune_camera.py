@@ -0,0 +1,141 @@
+import os
+import sys
+import time
+import argparse
+import itertools
+import numpy as np
+
+# Xac dinh thu muc goc cua du an (di len 1 cap tu scripts/)
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from ultralytics import YOLO
+from config import Config
+from src.zones import ZoneRegistry
+from src.probe import frame_duration
+from src.tuning import detect_run, replay_events, event_agreement, pick_fastest, save_profile, static_img_size
+
+def parse_list(cast):
+    """'320,480,640' -> [320, 480, 640] (de quet nhieu gia tri tham so)"""
+    return lambda text: [cast(v) for v in text.split(',') if v.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Tu dong chon IMG_SIZE / SKIP_FRAMES / CONF_THRESHOLD cho 1 camera: so sanh su kien zone "
+                    "voi 1 lan chay tham chieu (moi frame, do phan giai cao) va ghi cau hinh nhanh nhat "
+                    "dat do chinh xac vao data/profiles/<ten>.json (engine tu doc).")
+    parser.add_argument('video', help="Video mau cua camera, vd: data/uploads/office_A.mp4")
+    parser.add_argument('--zones', help="File zones JSON (mac dinh: data/<video>_zones.json)")
+    parser.add_argument('--camera', help="Ten profile (cam_id); mac dinh: ten video")
+    parser.add_argument('--model', default=Config.MODEL_PATH,
+                        help="Model; muon doi imgsz voi OpenVINO can export dynamic (scripts/export_model.py --dynamic)")
+    parser.add_argument('--img-sizes', type=parse_list(int), default=[320, 416, 480, 640])
+    parser.add_argument('--skip-frames', type=parse_list(int), default=[0, 2, 3, 5, 8])
+    parser.add_argument('--conf', type=parse_list(float), default=[0.2, 0.3, 0.4])
+    parser.add_argument('--ref-model',
+                        help="Model cho lan chay tham chieu (mac dinh: --model). Model OpenVINO tinh khong chay "
+                             "duoc 1280 -> dung ban .pt, vd: models/yolov8n.pt")
+    parser.add_argument('--ref-img-size', type=int, default=1280, help="imgsz cua lan chay tham chieu")
+    parser.add_argument('--ref-conf', type=float, default=Config.CONF_THRESHOLD)
+    parser.add_argument('--tolerance', type=float, default=0.05, help="Cho phep F1 thap hon 1 toi da bao nhieu")
+    parser.add_argument('--window', type=float, default=2.0, help="Lech thoi gian toi da de 2 su kien khop (giay)")
+    parser.add_argument('--max-frames', type=int, help="Chi dung N frame dau")
+    parser.add_argument('--dry-run', action='store_true', help="Khong ghi profile")
+    args = parser.parse_args()
+
+    registry = ZoneRegistry()
+    zones_path = args.zones or registry.path_for(args.video)
+    geometry = registry.load(zones_path)
+    if not len(geometry):
+        print(f"LOI: Khong co zone nao trong {zones_path}")
+        return
+
+    # Model OpenVINO tinh (export khong --dynamic) chi chay dung imgsz luc export:
+    # cac imgsz khac se bi Ultralytics resize ngam -> ket qua do sai, nen bo qua
+    img_sizes = args.img_sizes
+    native = static_img_size(args.model)
+    if native is not None:
+        skipped = [size for size in img_sizes if size != native]
+        img_sizes = [native]
+        if skipped:
+            print(f"CANH BAO: {args.model} la model tinh (imgsz={native}), bo qua imgsz {skipped}. "
+                  f"Muon quet imgsz: scripts/export_model.py --dynamic")
+    ref_model_path = args.ref_model or args.model
+    ref_native = static_img_size(ref_model_path)
+    if ref_native is not None and ref_native != args.ref_img_size:
+        print(f"LOI: Model tham chieu {ref_model_path} la model tinh (imgsz={ref_native}), khong chay duoc "
+              f"--ref-img-size {args.ref_img_size}. Dung --ref-model models/yolov8n.pt (hoac model dynamic) "
+              f"hoac --ref-img-size {ref_native}.")
+        return
+
+    model = YOLO(args.model, task='detect')
+    ref_model = YOLO(ref_model_path, task='detect') if args.ref_model else model
+    frame_dur = frame_duration(args.video)
+    camera = args.camera or args.video
+
+    # Warm-up tung imgsz de lan compile dau cua OpenVINO khong bi tinh vao do tre
+    runs = [(model, size) for size in img_sizes] + [(ref_model, args.ref_img_size)]
+    dummy = np.zeros((max(size for _, size in runs),) * 2 + (3,), dtype=np.uint8)
+    for m, size in runs:
+        m.predict(dummy, imgsz=size, device="cpu", verbose=False)
+
+    print(f"VIDEO : {args.video} ({len(geometry)} zones, {1 / frame_dur:.1f} fps)")
+    print(f"Tham chieu: {ref_model_path}, imgsz={args.ref_img_size}, moi frame, conf={args.ref_conf} ...")
+    recorder, total_frames, latencies = detect_run(ref_model, args.video, args.ref_img_size, 0, args.ref_conf,
+                                                   max_frames=args.max_frames)
+    reference = replay_events(recorder, total_frames, frame_dur, geometry)
+    print(f"  {total_frames} frames, {len(reference)} su kien, {np.mean(latencies):.1f} ms/inference")
+    if not reference:
+        print("CANH BAO: Tham chieu khong co su kien nao, F1 chi do 'khong bao nham'. Nen dung video dai hon.")
+
+    print("-" * 95)
+    print(f"{'imgsz':>5} {'skip':>4} {'conf':>5} | {'ms/inf':>7} {'p95':>7} {'inf/s':>8} {'fps':>8} | "
+          f"{'events':>6} {'prec':>5} {'recall':>6} {'f1':>5}")
+    results = []
+    for img_size, skip, conf in itertools.product(img_sizes, args.skip_frames, args.conf):
+        started = time.perf_counter()
+        recorder, n_frames, latencies = detect_run(model, args.video, img_size, skip, conf,
+                                                   max_frames=args.max_frames)
+        wall_seconds = time.perf_counter() - started
+        events = replay_events(recorder, n_frames, frame_dur, geometry)
+        agreement = event_agreement(reference, events, frame_dur, args.window)
+        # fps = frame video xu ly duoc moi giay thuc (decode moi frame + inference), dung de xep hang;
+        # inference_fps = so lan inference moi giay thoi gian model, chi de tham khao
+        model_seconds = sum(latencies) / 1000
+        result = {
+            "img_size": img_size, "skip_frames": skip, "conf_threshold": conf,
+            "latency_ms": round(float(np.mean(latencies)), 2) if latencies else None,
+            "latency_p95_ms": round(float(np.percentile(latencies, 95)), 2) if latencies else None,
+            "inferences": len(latencies),
+            "fps": round(n_frames / wall_seconds, 1) if wall_seconds else 0.0,
+            "inference_fps": round(len(latencies) / model_seconds, 1) if model_seconds else None,
+            "agreement": agreement,
+        }
+        results.append(result)
+        print(f"{img_size:>5} {skip:>4} {conf:>5} | {result['latency_ms'] or 0:>7.1f} {result['latency_p95_ms'] or 0:>7.1f} "
+              f"{result['inference_fps'] or 0:>8.1f} {result['fps']:>8.1f} | {agreement['candidate']:>6} {agreement['precision']:>5.2f} "
+              f"{agreement['recall']:>6.2f} {agreement['f1']:>5.2f}")
+
+    best = pick_fastest(results, 1 - args.tolerance)
+    print("-" * 95)
+    print("fps = frame video moi giay thuc (decode + inference, xep hang theo cot nay); inf/s = chi inference")
+    if best is None:
+        print(f"Khong co cau hinh nao (co inference) dat F1 >= {1 - args.tolerance:.2f}. Giu nguyen cau hinh mac dinh.")
+        return
+    print(f"CHON: imgsz={best['img_size']}, skip={best['skip_frames']}, conf={best['conf_threshold']} "
+          f"({best['fps']} fps, F1 {best['agreement']['f1']})")
+    if args.dry_run:
+        return
+    path = save_profile(camera, best, tuning={
+        "video": os.path.basename(args.video),
+        "reference": {"model": os.path.basename(os.path.normpath(ref_model_path)), "img_size": args.ref_img_size,
+                      "conf_threshold": args.ref_conf, "events": len(reference)},
+        "tolerance": args.tolerance, "window_s": args.window,
+        "fps": best["fps"], "inference_fps": best["inference_fps"], "latency_ms": best["latency_ms"],
+        "agreement": best["agreement"],
+    })
+    print(f"Da ghi profile: {os.path.relpath(path, ROOT_DIR)} (engine ap dung tu phien tiep theo)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import os
+import glob
+import time
+import logging
+import pandas as pd
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Cold storage for old actions: one Parquet file per archival run and month,
+#   data/archive/actions/month=YYYY-MM/part-<first session>-<last session>.parquet
+# Rows are denormalized (video name, employee name at archive time) so reports need no SQLite join.
+ARCHIVE_COLUMNS = ['id', 'session_id', 'video_name', 'session_start', 'employee_id', 'full_name', 'action', 'timestamp']
+
+def _partition_files(months=None):
+    root = Config.ARCHIVE_DIR
+    if months:
+        files = []
+        for month in months:
+            files.extend(glob.glob(os.path.join(root, f"month={month}", '*.parquet')))
+        return sorted(files)
+    return sorted(glob.glob(os.path.join(root, 'month=*', '*.parquet')))
+
+def read_archived_actions(session_id=None, months=None, after_id=None):
+    """
+    Reads archived actions, optionally for one session, only some month partitions and/or only ids above `after_id`.
+    Returns:
+        pandas.DataFrame: Columns ARCHIVE_COLUMNS (empty frame if nothing is archived).
+    """
+    files = _partition_files(months)
+    if not files:
+        return pd.DataFrame(columns=ARCHIVE_COLUMNS)
+    filters = []
+    if session_id is not None:
+        filters.append(('session_id', '==', int(session_id)))
+    if after_id is not None:
+        filters.append(('id', '>', int(after_id)))
+    filters = filters or None
+    frames = [pd.read_parquet(f, columns=ARCHIVE_COLUMNS, filters=filters) for f in files]
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=ARCHIVE_COLUMNS)
+    # A crash between publishing a file and committing the delete leaves rows that get archived again
+    return pd.concat(frames, ignore_index=True).drop_duplicates('id', ignore_index=True)
+
+def session_month(start_time):
+    """Partition key of a session: 'YYYY-MM' of its start time."""
+    return str(start_time)[:7]
+
+def archive_old_sessions(max_age_days=None, exclude_session_ids=(), batch_size=None):
+    """
+    Moves actions of finished sessions older than `max_age_days` from SQLite to Parquet partitions,
+    marks those sessions archived, then reclaims space (incremental vacuum).
+    A session qualifies once it is closed (end_time set) or, if it never was (crash), once it has
+    had no activity for `max_age_days`.
+    Returns:
+        dict: {"sessions": n, "actions": n, "files": [...]}
+    """
+    # Local import: src.database reads the archive for reports (avoids an import cycle)
+    from src.database import get_db_connection, invalidate_session_cache, SUMMARY_NS
+    from src.cache import query_cache
+
+    max_age_days = Config.RETENTION_DAYS if max_age_days is None else max_age_days
+    batch_size = batch_size or Config.ARCHIVE_BATCH_SESSIONS
+    cutoff = f"-{int(max_age_days)} days"
+    result = {"sessions": 0, "actions": 0, "files": []}
+
+    with get_db_connection() as conn:
+        sessions = conn.execute('''
+            SELECT s.id, s.video_name, s.start_time FROM sessions s
+            WHERE s.archived = 0 AND s.start_time < datetime('now', 'localtime', ?)
+              AND (s.end_time IS NOT NULL OR NOT EXISTS (
+                   SELECT 1 FROM actions a
+                   WHERE a.session_id = s.id AND a.timestamp >= datetime('now', 'localtime', ?)))
+            ORDER BY s.id
+        ''', (cutoff, cutoff)).fetchall()
+        excluded = set(exclude_session_ids)
+        ids = [s['id'] for s in sessions if s['id'] not in excluded]
+        if not ids:
+            return result
+
+        for start in range(0, len(ids), batch_size):
+            files, n_actions = _archive_batch(conn, ids[start:start + batch_size])
+            result["files"].extend(files)
+            result["sessions"] += len(ids[start:start + batch_size])
+            result["actions"] += n_actions
+
+        _reclaim_space(conn)
+
+    query_cache.invalidate(SUMMARY_NS)
+    invalidate_session_cache()
+    logger.info(f"Archived {result['actions']} actions from {result['sessions']} sessions into {len(result['files'])} files.")
+    return result
+
+def _archive_batch(conn, ids):
+    """
+    Archives one batch of sessions in a single write transaction:
+    summarize -> read -> write Parquet -> delete (only the rows read) -> mark archived -> publish -> commit.
+    BEGIN IMMEDIATE blocks concurrent inserts between the read and the delete, and the delete is
+    bounded by the highest archived id as well, so a late row is never dropped unread.
+    Returns:
+        tuple: (published file paths, number of archived actions)
+    """
+    from src.database import summarize_session
+
+    placeholders = ','.join('?' * len(ids))
+    staged, published = [], []
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        # Daily summaries are built from hot rows: fold in anything not yet summarized before deleting
+        for session_id in ids:
+            summarize_session(session_id, conn=conn)
+        df = pd.read_sql_query(f'''
+            SELECT a.id, a.session_id, s.video_name, s.start_time AS session_start,
+                   a.employee_id, e.full_name, a.action, a.timestamp
+            FROM actions a
+            JOIN sessions s ON a.session_id = s.id
+            LEFT JOIN employees e ON a.employee_id = e.emp_id
+            WHERE a.session_id IN ({placeholders})
+        ''', conn, params=ids)
+
+        if not df.empty:
+            df['month'] = df['session_start'].map(session_month)
+            stamp = int(time.time())
+            for month, part in df.groupby('month'):
+                out_dir = os.path.join(Config.ARCHIVE_DIR, f"month={month}")
+                os.makedirs(out_dir, exist_ok=True)
+                name = f"part-{part['session_id'].min()}-{part['session_id'].max()}-{stamp}.parquet"
+                tmp_path = os.path.join(out_dir, name + '.tmp')
+                staged.append((tmp_path, os.path.join(out_dir, name)))
+                part[ARCHIVE_COLUMNS].to_parquet(tmp_path, index=False, compression=Config.ARCHIVE_COMPRESSION)
+
+        max_id = int(df['id'].max()) if not df.empty else 0
+        conn.execute(f'DELETE FROM actions WHERE session_id IN ({placeholders}) AND id <= ?', ids + [max_id])
+        conn.execute(f'UPDATE sessions SET archived = 1 WHERE id IN ({placeholders})', ids)
+        # Files are fully written before the delete becomes visible, so a crash never loses data
+        for tmp_path, path in staged:
+            os.replace(tmp_path, path)
+            published.append(path)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        for tmp_path, path in staged:
+            for leftover in (tmp_path, path):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+        raise
+    return published, len(df)
+
+def _reclaim_space(conn):
+    """
+    Returns freed pages to the OS. The first run switches the DB to incremental
+    auto-vacuum (needs one full VACUUM); later runs only do a cheap incremental pass.
+    """
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+    else:
+        conn.execute('PRAGMA incremental_vacuum')
@@ -0,0 +1,97 @@
+import time
+import threading
+import functools
+from collections import OrderedDict
+from config import Config
+
+class Uncached:
+    """
+    Loader result that is returned to the caller but never stored, e.g. the empty
+    default of a query that failed (missing table before init_db, locked DB...).
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+class ReadThroughCache:
+    """
+    Thread-safe, size-bounded LRU cache with TTL and per-namespace versions.
+    Keys embed the namespace version, so `invalidate(namespace)` is O(1):
+    stale entries are simply never looked up again and age out of the LRU.
+    """
+
+    def __init__(self, max_entries=None, ttl=None):
+        self.max_entries = max_entries or Config.CACHE_MAX_ENTRIES
+        self.ttl = Config.CACHE_TTL if ttl is None else ttl
+        self._data = OrderedDict()   # {key: (expires_at, value)}
+        self._versions = {}          # {namespace: int}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def version(self, namespace):
+        """Current version of `namespace`; changes on every invalidation."""
+        return self._versions.get(namespace, 0)
+
+    def invalidate(self, namespace):
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            self.stats["invalidations"] += 1
+
+    def get_or_load(self, namespace, args, loader, ttl=None):
+        """Returns the cached value for (namespace, args) or calls `loader()` and stores its result."""
+        now = time.monotonic()
+        with self._lock:
+            key = (namespace, self._versions.get(namespace, 0), args)
+            item = self._data.get(key)
+            if item is not None and item[0] > now:
+                self._data.move_to_end(key)
+                self.stats["hits"] += 1
+                return item[1]
+            self.stats["misses"] += 1
+
+        # Load outside the lock so a slow query does not block other readers
+        value = loader()
+        if value is None:
+            return value  # Not-found results are not cached
+        if isinstance(value, Uncached):
+            return value.value
+        with self._lock:
+            self._data[key] = (now + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.stats["evictions"] += 1
+        return value
+
+    def snapshot(self):
+        """Hit/miss counters plus current size, for monitoring."""
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return dict(self.stats, size=len(self._data),
+                        hit_rate=round(self.stats["hits"] / lookups, 3) if lookups else None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+query_cache = ReadThroughCache()
+
+def cached(namespace, ttl=None):
+    """
+    Decorator: read-through caching of a DB lookup under `namespace`.
+    Error fallbacks must be returned wrapped in `Uncached(...)` so a transient failure is not cached.
+    Callers must treat returned dicts/lists as read-only, they are shared.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # Functions share a namespace (one invalidation for all readers), so the key names the function
+            key = (func.__qualname__,) + args + tuple(sorted(kwargs.items()))
+            return query_cache.get_or_load(namespace, key, lambda: func(*args, **kwargs), ttl)
+        def uncached(*args, **kwargs):
+            value = func(*args, **kwargs)
+            return value.value if isinstance(value, Uncached) else value
+        wrapper.uncached = uncached
+        return wrapper
+    return decorator
@@ -1,5 +1,4 @@
 import cv2
-import json
 import numpy as np
 import os
 import time
@@ -7,7 +6,17 @@ import psutil
 import logging
 from PIL import Image, ImageDraw, ImageFont
 from ultralytics import YOLO
-from src.database import log_action, create_new_session, get_employee_name_map
+from src.database import (log_action, create_new_session, close_session, get_employee_name_map,
+                          get_employee_version, summarize_session, set_session_recording_start)
+from src.zones import zone_registry, EMPTY_GEOMETRY
+from src.events import action_bus
+from src.media import make_faststart, work_path
+from src.occupancy import OccupancyTracker, filter_person_boxes
+from src.detections import DetectionRecorder, cache_dir_for, prune_detection_caches
+from src.timeseries import OccupancyRecorder, occupancy_store, source_name
+from src.frame_ring import FrameSource
+from src.probe import frame_duration, recording_start
+from src.tuning import load_profile, static_img_size
 from config import Config
 from moviepy.editor import VideoFileClip
 
@@ -21,19 +30,27 @@ class EmployeeTrackerEngine:
     Optimized for Intel CPUs using OpenVINO and production-ready with Waitress.
     """
     
-    def __init__(self, model_path=None):
-        """Initialize AI model, load fonts, and prepare system states."""
+    def __init__(self, model_path=None, model=None):
+        """
+        Initialize AI model, load fonts, and prepare system states.
+        `model`: an already built detector with the Ultralytics predict/track API (e.g. the stub of scripts/load_test.py).
+        """
         # 1. Hardware & Model Configuration
-        self.model = YOLO(model_path or Config.MODEL_PATH, task='detect')
+        self.model = model if model is not None else YOLO(model_path or Config.MODEL_PATH, task='detect')
+        # Static OpenVINO exports only run at their export imgsz (None = any size)
+        self.native_img_size = None if model is not None else static_img_size(model_path or Config.MODEL_PATH)
+        self._warmed_sizes = set()
 
         self.tracker_config = Config.TRACKER_CONFIG
         # 2. Performance Tuning Constants
         self.TARGET_FPS = Config.TARGET_FPS
         self.SKIP_FRAMES = Config.SKIP_FRAMES
         self.CONF_THRESHOLD = Config.CONF_THRESHOLD
-        self.IMG_SIZE = Config.IMG_SIZE
+        self.IMG_SIZE = self._supported_img_size(Config.IMG_SIZE)
         self.PATIENCE_LIMIT = Config.PATIENCE_LIMIT
         self.MIN_WORK_DURATION = Config.MIN_WORK_DURATION
+        self.MAX_NORMAL_AREA = Config.MAX_NORMAL_AREA
+        self.MAX_ASPECT_RATIO = Config.MAX_ASPECT_RATIO
 
         self._warm_up_model()
         
@@ -44,9 +61,18 @@ class EmployeeTrackerEngine:
         
         # 4. Operational States
         self.current_session_id = None
-        self.zones = []
-        self.zone_names = []
+        self.zone_file = None
+        self.occupancy = OccupancyTracker(0, self.MIN_WORK_DURATION, self.PATIENCE_LIMIT)
+        self.recorder = None
+        self.timeline = None
+        self.frame_dur = 1.0 / 30.0
+        self.live = False
+        self.clock = 0.0          # Session time of the current frame (seconds)
+        self._t0 = time.monotonic()
+        self._set_geometry(EMPTY_GEOMETRY)
         self.emp_name_map = {}
+        self.emp_map_version = None
+        self.emp_map_loaded_at = float('-inf')
         self.refresh_employee_data()
         self.reset_state()
         
@@ -80,6 +106,7 @@ class EmployeeTrackerEngine:
                     device="cpu", 
                     verbose=False
                 )
+            self._warmed_sizes.add(input_size)
             logger.info("[+] OpenVINO đã 'nóng'. CPU đã sẵn sàng xử lý tốc độ cao!")
         except Exception as e:
             logger.error(f"[-] Lỗi khởi tạo OpenVINO: {e}")
@@ -97,47 +124,168 @@ class EmployeeTrackerEngine:
             logger.warning(f"Font loading failed: {e}. Fallback to default.")
             return ImageFont.load_default()
 
-    def refresh_employee_data(self):
-        """Sync employee names from the database for visualization."""
+    def refresh_employee_data(self, force=False):
+        """
+        Sync employee names from the database when employees changed since the last load,
+        or when the loaded map is older than CACHE_TTL (covers edits made by another process).
+        """
+        version = get_employee_version()
+        expired = time.monotonic() - self.emp_map_loaded_at >= Config.CACHE_TTL
+        if not force and not expired and version == self.emp_map_version:
+            return
         try:
             self.emp_name_map = get_employee_name_map()
+            self.emp_map_version = version
+            self.emp_map_loaded_at = time.monotonic()
         except Exception as e:
             logger.error(f"Database sync failed: {e}")
             self.emp_name_map = {}
 
-    def reset_state(self):
-        """Reset internal buffers for a fresh analysis session."""
+    def reset_state(self, live=False, start_epoch=None):
+        """Reset internal buffers for a fresh analysis session (`start_epoch`: when the footage was recorded)."""
         self.frame_count = 0
-        self.zone_status = {} # {idx: {"start": frame, "patience": int, "logged": bool}}
-        self.last_results = None
+        self.clock = 0.0
+        self._t0 = time.monotonic()
+        self.last_boxes = None
+        self.occupancy.reset(len(self.zones))
+        record = Config.RECORD_LIVE_DETECTIONS if live else Config.RECORD_DETECTIONS
+        self.recorder = DetectionRecorder() if record else None
+        self.timeline = OccupancyRecorder(self.zone_names, start_epoch) if Config.RECORD_OCCUPANCY else None
+
+    def _set_geometry(self, geometry):
+        """Point the engine at a compiled ZoneGeometry (see src/zones.py)."""
+        self.geometry = geometry
+        self.zones = geometry.polygons
+        self.zone_names = list(geometry.names)
+
+    def _swap_geometry(self, geometry):
+        """Hot-swap zones between two frames, keeping the state of zones that kept their name."""
+        kept, events = self.occupancy.remap(self.geometry, geometry, self.clock)
+        for emp_code, action in events:
+            self._emit_action(emp_code, action)
+        self._set_geometry(geometry)
+        if self.timeline is not None:
+            self.timeline.set_zones(self.zone_names)
+        logger.info(f"Zones reloaded: {len(geometry)} zones ({kept} kept)")
+
+    def save_detections(self, video_path, total_frames, frame_dur):
+        """Persist the detections of the current run for offline replay (see src/detections.py)."""
+        if self.recorder is None or self.current_session_id is None:
+            return
+        out_dir = cache_dir_for(video_path, self.current_session_id)
+        try:
+            self.recorder.save(
+                out_dir,
+                video=os.path.basename(video_path),
+                session_id=self.current_session_id,
+                total_frames=total_frames,
+                frame_dur=frame_dur,
+                skip_frames=self.SKIP_FRAMES,
+                img_size=self.IMG_SIZE,
+                conf_threshold=self.CONF_THRESHOLD,
+            )
+            prune_detection_caches(keep=[out_dir])
+        except Exception as e:
+            logger.error(f"Saving detection cache failed: {e}")
+        self.recorder = None
+
+    def save_timeline(self, video_path):
+        """Write the last hour of the per-second zone occupancy bitmap and mark it complete (see src/timeseries.py)."""
+        if self.timeline is None or self.current_session_id is None:
+            return
+        try:
+            self.timeline.save()
+        except Exception as e:
+            logger.error(f"Saving occupancy timeline failed: {e}")
+        self.timeline = None
+
+    def finish_session(self, video_path):
+        """Close open stays, persist per-run artifacts and fold the session into the daily summary."""
+        for emp_code, action in self.occupancy.close(self.clock):
+            self._emit_action(emp_code, action)
+        self.save_detections(video_path, self.frame_count, self.frame_dur)
+        self.save_timeline(video_path)
+        close_session(self.current_session_id)
+        summarize_session(self.current_session_id)
 
     # --- LOGIC XỬ LÝ CHÍNH ---
 
-    def start_new_analysis(self, video_path, session_id=None):
-        """Load zone configurations and start a new monitoring session."""
+    def start_new_analysis(self, video_path, session_id=None, live=False):
+        """Load zone configurations and start a new monitoring session (`live`: camera source, not a file)."""
         self.refresh_employee_data()
         
         filename = os.path.basename(video_path)
-        name_only = os.path.splitext(filename)[0]
-        json_path = os.path.join(Config.DATA_DIR, f"{name_only}_zones.json")
-        
-        if os.path.exists(json_path):
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.zones = [np.array(v, dtype=np.int32) for v in data.values()]
-                self.zone_names = list(data.keys())
+        self.zone_file = zone_registry.path_for(video_path)
+        self._set_geometry(zone_registry.load(self.zone_file))
+        self._apply_profile(video_path)
+        # Real frame duration from cached metadata (live cameras fall back to 30 fps).
+        # Live sessions run on wall-clock time instead: frames are dropped whenever inference falls behind.
+        self.frame_dur = frame_duration(video_path)
+        self.live = live
         
-        self.reset_state()
+        # Utilization and the daily summary use the time the footage was recorded: files carry it in the
+        # container header (processing time if missing), live sources are recorded right now
+        recorded_at = None if live else recording_start(video_path)
+        self.reset_state(live, start_epoch=recorded_at)
         self.current_session_id = session_id or create_new_session(filename)
+        set_session_recording_start(self.current_session_id, recorded_at)
+        if self.timeline is not None:
+            # Completed hours go to disk as the session runs, not only at the end
+            try:
+                self.timeline.attach(
+                    occupancy_store.session_dir(self.current_session_id),
+                    video=filename,
+                    source=source_name(video_path),
+                    session_id=self.current_session_id,
+                )
+            except OSError as e:
+                logger.error(f"Occupancy timeline disabled for this session: {e}")
+                self.timeline = None
         logger.info(f"Analysis started: Session {self.current_session_id} for {filename}")
 
-    def _process_frame(self, frame):
-        """Single frame processing pipeline: Inference -> Tracking -> Visualization."""
+    def _apply_profile(self, video_path):
+        """Per-camera detector settings from data/profiles/ (scripts/tune_camera.py), else Config defaults."""
+        profile = load_profile(video_path)
+        self.IMG_SIZE = self._supported_img_size(profile.get('img_size', Config.IMG_SIZE), video_path)
+        self.SKIP_FRAMES = profile.get('skip_frames', Config.SKIP_FRAMES)
+        self.CONF_THRESHOLD = profile.get('conf_threshold', Config.CONF_THRESHOLD)
+        if profile:
+            logger.info(f"Detector profile for {os.path.basename(video_path)}: "
+                        f"imgsz={self.IMG_SIZE}, skip={self.SKIP_FRAMES}, conf={self.CONF_THRESHOLD}")
+        # A new input shape recompiles the OpenVINO graph: pay that before the first frame, not on it
+        if self.IMG_SIZE not in self._warmed_sizes:
+            self._warm_up_model()
+
+    def _supported_img_size(self, img_size, source=None):
+        """`img_size`, or the model's export size when the model is static (with a warning if they differ)."""
+        if self.native_img_size is None or img_size == self.native_img_size:
+            return img_size
+        logger.warning(f"Ignoring imgsz={img_size}{f' for {os.path.basename(str(source))}' if source else ''}: "
+                       f"static model only runs at {self.native_img_size} "
+                       f"(export with scripts/export_model.py --dynamic to change it)")
+        return self.native_img_size
+
+    def _process_frame(self, frame, out=None, lag=0.0):
+        """
+        Single frame processing pipeline: Inference -> Tracking -> Visualization.
+        With `out` (e.g. the frame's own shared-memory slot) the annotated frame is written there instead of a new array.
+        `lag`: seconds since a live frame was captured, so its session time is the capture time.
+        """
         now = time.time()
         if self.frame_count > 0:
             self.perf_stats["total_frame_times"].append((now - self.prev_time) * 1000)
         self.prev_time = now
         self.frame_count += 1
+        if self.live:
+            self.clock = max(self.clock, time.monotonic() - self._t0 - (lag or 0.0))
+        else:
+            self.clock = self.frame_count * self.frame_dur
+
+        # 0. Employee names (cheap version/TTL check) and zones hot reload (scripts/draw_zones.py saved a new version)
+        self.refresh_employee_data()
+        new_geometry = zone_registry.poll(self.zone_file, self.geometry)
+        if new_geometry is not None:
+            self._swap_geometry(new_geometry)
         
         # 1. AI Inference with Frame Skipping
         if (self.frame_count % (self.SKIP_FRAMES + 1) == 0):
@@ -147,7 +295,10 @@ class EmployeeTrackerEngine:
                 device="cpu", imgsz=self.IMG_SIZE, classes=[0],
                 conf=self.CONF_THRESHOLD, iou=0.3, verbose=False
             )
-            self.last_results = results[0] if (results and len(results[0].boxes) > 0) else None
+            boxes = results[0].boxes if results else None
+            self.last_boxes = boxes.xyxy.cpu().numpy() if (boxes is not None and len(boxes) > 0) else None
+            if self.recorder is not None:
+                self.recorder.add(self.frame_count, boxes)
             
             self.perf_stats["inference_times"].append((time.time() - inf_start) * 1000)
             self.perf_stats["cpu_usages"].append(psutil.cpu_percent())
@@ -155,93 +306,59 @@ class EmployeeTrackerEngine:
         # 2. Graphical Drawing (PIL Optimized)
         img_pil = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
         draw = ImageDraw.Draw(img_pil)
-        occupied_zones = []
-
-        if self.last_results:
-            boxes = self.last_results.boxes.xyxy.cpu().numpy()
-            for box in boxes:
-                x1, y1, x2, y2 = map(int, box)
-                #cx, cy = (x1 + x2) // 2, (y1 + y2) // 2 
-                w, h = x2 - x1, y2 - y1
-                area = w * h
-                MAX_NORMAL_AREA = 22000 
-
-                # 2. NGƯỠNG DIỆN TÍCH (MAX_AREA)
-                # Ở góc cam này, một người bình thường thường < 20,000 px.
-                # Nếu gộp 2 người, diện tích sẽ vọt lên khoảng 30,000 - 45,000 px.
-                if area > MAX_NORMAL_AREA: 
-                    # draw.rectangle([x1, y1, x2, y2], outline=(255, 0, 255), width=3)
-                    # draw.text((x1, y1 - 45), f"AREA ERR: {area}", font=self.font_small, fill=(255, 0, 255))
-                    # print(f"--- LOẠI BỎ BOX GỘP: Area={area} (To gấp đôi bình thường) ---")
-                    continue 
-
-                # 3. Kết hợp một chút Ratio nhưng ở ngưỡng rất an toàn (> 1.2 - Hình chữ nhật ngang)
-                if (w / h) > 1.2:
-                    continue
-                        
-                cx = (x1 + x2) // 2
-                cy = y1 + int((y2 - y1) * 0.25) 
-                check_point = (cx, cy)
-
-                in_zone = False
-                for idx, poly in enumerate(self.zones):
-                    if cv2.pointPolygonTest(poly, check_point, False) >= 0:
-                        occupied_zones.append(idx)
-                        in_zone = True
-                        
-                        emp_code = f"NV-{idx + 1}"
-                        name = self.emp_name_map.get(emp_code, "Chưa rõ")
-                        draw.rectangle([x1, y1, x2, y2], outline=(0, 255, 0), width=2)
-                        draw.text((x1, y1 - 25), f"{emp_code} ({name})", font=self.font_normal, fill=(0, 255, 0))
-                        
-                        if idx not in self.zone_status:
-                            self.zone_status[idx] = {"start": self.frame_count, "patience": 0, "logged": False}
-                        else:
-                            self.zone_status[idx]["patience"] = 0 
-                        break
-                
-                if not in_zone:
+        occupied = np.zeros(len(self.zones), dtype=bool)
+
+        if self.last_boxes is not None:
+            # Lọc box gộp (diện tích / tỉ lệ ngang) và tính điểm neo, vector hóa cho cả frame
+            boxes, keep, anchors = filter_person_boxes(self.last_boxes, self.MAX_NORMAL_AREA, self.MAX_ASPECT_RATIO)
+            for (x1, y1, x2, y2), (cx, cy) in zip(boxes[keep].tolist(), anchors[keep].tolist()):
+                idx = self.geometry.locate((cx, cy))
+                if idx >= 0:
+                    occupied[idx] = True
+                    
+                    emp_code = f"NV-{idx + 1}"
+                    name = self.emp_name_map.get(emp_code, "Chưa rõ")
+                    draw.rectangle([x1, y1, x2, y2], outline=(0, 255, 0), width=2)
+                    draw.text((x1, y1 - 25), f"{emp_code} ({name})", font=self.font_normal, fill=(0, 255, 0))
+                else:
                     draw.rectangle([x1, y1, x2, y2], outline=(255, 255, 255), width=1)
 
         # 3. Business Logic Logging
-        self._handle_logging(occupied_zones, 1.0/30.0)
+        self._handle_logging(occupied, self.frame_dur)
 
         # 4. Polygons & Zone Labels
-        for idx, poly in enumerate(self.zones):
-            color = (0, 255, 0) if idx in occupied_zones else (255, 0, 0)
-            draw.polygon([tuple(p) for p in poly], outline=color, width=2)
-            draw.text((poly[0][0], poly[0][1] - 25), self.zone_names[idx], font=self.font_small, fill=color)
+        for idx, outline in enumerate(self.geometry.outlines):
+            color = (0, 255, 0) if occupied[idx] else (255, 0, 0)
+            draw.polygon(outline, outline=color, width=2)
+            draw.text(self.geometry.label_positions[idx], self.zone_names[idx], font=self.font_small, fill=color)
             
         # Revert to OpenCV format
-        final_frame = cv2.cvtColor(np.array(img_pil), cv2.COLOR_RGB2BGR)
+        final_frame = cv2.cvtColor(np.asarray(img_pil), cv2.COLOR_RGB2BGR, dst=out)
         if self.frame_count % 100 == 0:
             self._print_performance_report()
             
         return final_frame
 
-    def _handle_logging(self, occupied_zones, frame_dur):
-        for idx in range(len(self.zones)):
-            emp_code = f"NV-{idx + 1}"
-            curr_v_time = self.frame_count * frame_dur
-            # Định dạng thời gian 00:00:00
-            time_str = time.strftime('%H:%M:%S', time.gmtime(curr_v_time))
-
-            if idx in occupied_zones:
-                state = self.zone_status[idx]
-                if not state["logged"]:
-                    # Tính duration dựa trên start_frame
-                    duration = (self.frame_count - state["start"]) * frame_dur
-                    if duration >= self.MIN_WORK_DURATION:
-                        log_action(emp_code, f"Làm việc (tại {time_str})", self.current_session_id)
-                        state["logged"] = True
-            elif idx in self.zone_status:
-                self.zone_status[idx]["patience"] += 1
-                if self.zone_status[idx]["patience"] > self.PATIENCE_LIMIT:
-                    state = self.zone_status[idx]
-                    if state["logged"]:
-                        total = (self.frame_count - state["start"]) * frame_dur
-                        log_action(emp_code, f"Rời bàn (tại {time_str} - Tổng: {int(total)}s)", self.current_session_id)
-                    del self.zone_status[idx]
+    def _handle_logging(self, occupied, frame_dur):
+        """Advance the zone state machine (src/occupancy.py) and log the resulting events."""
+        if self.timeline is not None:
+            self.timeline.add(occupied, self.clock)
+        for emp_code, action in self.occupancy.update(occupied, self.frame_count, frame_dur, now=self.clock):
+            self._emit_action(emp_code, action)
+
+    def _emit_action(self, emp_code, action):
+        """Persist an action and push it to live dashboards via the event bus."""
+        with action_bus.order_lock:
+            action_id = log_action(emp_code, action, self.current_session_id)
+            if action_id:
+                action_bus.publish({
+                    "id": action_id,
+                    "session_id": self.current_session_id,
+                    "employee_id": emp_code,
+                    "full_name": self.emp_name_map.get(emp_code),
+                    "action": action,
+                    "timestamp": time.strftime('%Y-%m-%d %H:%M:%S'),
+                })
 
     def _print_performance_report(self):
         """Displays real-time benchmarking stats in the terminal."""
@@ -261,58 +378,77 @@ class EmployeeTrackerEngine:
     # --- STREAMING & FILE EXPORT ---
 
     def generate_stream(self, video_path):
-        """Generator for Flask web streaming with FPS capping."""
-        cap = cv2.VideoCapture(video_path)
+        """Generator for Flask web streaming with FPS capping (decoding runs in a separate process)."""
         self.start_new_analysis(video_path)
         target_time = 1.0 / self.TARGET_FPS
         t_start = time.time()
 
+        with FrameSource(video_path) as frames:
+            try:
+                for slot, frame in frames:
+                    # Annotate in place: the shared-memory slot is reused as output buffer
+                    self._process_frame(frame, out=frame)
+                    _, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), 70])
+                    frames.release(slot)
+                    yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+                    
+                    # Dynamic Sync to lock 15 FPS
+                    elapsed = time.time() - t_start
+                    if target_time - elapsed > 0:
+                        time.sleep(target_time - elapsed)
+                    self.perf_stats["total_frame_times"].append((time.time() - t_start) * 1000)
+                    t_start = time.time()
+            finally:
+                self.finish_session(video_path)
+
+    def generate_live_stream(self, camera, session_id=None):
+        """
+        Generator for live cameras (src/capture.py). Always processes the newest frame:
+        if inference is slower than the camera, stale frames are dropped by the reader thread.
+        Zones are read from data/<cam_id>_zones.json.
+        """
+        self.start_new_analysis(camera.cam_id, session_id=session_id, live=True)
+        seq = 0
         try:
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret: break
-                frame = self._process_frame(frame)
+            while True:
+                seq, frame, lag = camera.read_latest(seq)
+                if frame is None:
+                    if camera.stopped:
+                        break
+                    continue  # Camera reconnecting; keep the HTTP stream open
+                frame = self._process_frame(frame, lag=lag)
                 _, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), 70])
                 yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
-                
-                # Dynamic Sync to lock 15 FPS
-                elapsed = time.time() - t_start
-                if target_time - elapsed > 0:
-                    time.sleep(target_time - elapsed)
-                self.perf_stats["total_frame_times"].append((time.time() - t_start) * 1000)
-                t_start = time.time()
         finally:
-            cap.release()
+            self.finish_session(camera.cam_id)
 
     def process_video_file(self, in_p, out_p, session_id=None): 
         """Processes video file and converts to Web-compatible H.264."""
-        cap = cv2.VideoCapture(in_p)
-        fps = cap.get(cv2.CAP_PROP_FPS) or 30
-        w, h = int(cap.get(3)), int(cap.get(4))
-        
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(out_p, fourcc, fps, (w, h))
-        
         self.start_new_analysis(in_p, session_id=session_id) 
         logger.info(f"Processing video file: {in_p}")
-        
-        try:
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret: break
-                out.write(self._process_frame(frame))
-        finally:
-            cap.release()
-            out.release()
+
+        # Decode -> (shared memory) -> inference/annotate in place -> (shared memory) -> encode
+        with FrameSource(in_p, writer=(out_p, 'mp4v', None)) as frames:
+            try:
+                for slot, frame in frames:
+                    self._process_frame(frame, out=frame)
+                    frames.forward(slot)
+            finally:
+                self.finish_session(in_p)
 
         # Web-Ready H.264 Conversion logic
         try:
-            temp_convert = out_p.replace(".mp4", "_web.mp4")
+            temp_convert = work_path(out_p, 'web')
             clip = VideoFileClip(out_p)
-            clip.write_videofile(temp_convert, codec="libx264", audio=False, verbose=False, logger=None)
+            # +faststart: moov atom ở đầu file để trình duyệt phát/tua ngay
+            clip.write_videofile(temp_convert, codec="libx264", audio=False, verbose=False, logger=None,
+                                 ffmpeg_params=["-movflags", "+faststart"])
             clip.close()
             os.remove(out_p)
             os.rename(temp_convert, out_p)
             logger.info("Video conversion to H.264 successful!")
         except Exception as e:
-            logger.error(f"H.264 conversion failed: {e}")
\ No newline at end of file
+            logger.error(f"H.264 conversion failed: {e}")
+
+        # Safety net: remux (no re-encode) if the result still has moov at the end
+        make_faststart(out_p)
\ No newline at end of file
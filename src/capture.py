@@ -0,0 +1,217 @@
+import os
+import time
+import logging
+import threading
+from urllib.parse import urlsplit
+import cv2
+from werkzeug.utils import safe_join
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class LoopingFileCapture:
+    """
+    Stand-in for a live camera: replays a local video forever at its native fps.
+    Exposes the subset of the cv2.VideoCapture API used by CameraStream.
+    """
+
+    def __init__(self, path):
+        self.cap = cv2.VideoCapture(path)
+        self.frame_time = 1.0 / (self.cap.get(cv2.CAP_PROP_FPS) or 30)
+        self._next = time.monotonic()
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        # Pace like a real camera: frames arrive at source fps whether or not anyone reads them
+        delay = self._next - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next = max(self._next + self.frame_time, time.monotonic() - self.frame_time)
+
+        ret, frame = self.cap.read()
+        if not ret:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return ret, frame
+
+    def release(self):
+        self.cap.release()
+
+def open_source(source):
+    """
+    Opens a camera source:
+        "0", "1"...            -> local device index
+        "rtsp://", "http://"   -> network stream (FFmpeg backend)
+        "loop:<file>"          -> LoopingFileCapture stand-in for local testing
+    """
+    if isinstance(source, int) or str(source).isdigit():
+        return cv2.VideoCapture(int(source))
+    if str(source).startswith('loop:'):
+        return LoopingFileCapture(source[len('loop:'):])
+    return cv2.VideoCapture(source, cv2.CAP_FFMPEG)
+
+def validate_source(source):
+    """
+    Checks a source submitted over the API before the server opens it.
+    Device indexes pass; "loop:" files must be inside UPLOAD_FOLDER; URLs need an allowed scheme
+    (CAMERA_URL_SCHEMES) and, when CAMERA_ALLOWED_HOSTS is set, an allowed host.
+    Returns:
+        str: Normalized source ("loop:" with an absolute path).
+    Raises:
+        ValueError: With a message for the client.
+    """
+    source = str(source).strip()
+    if source.isdigit():
+        return source
+    if source.startswith('loop:'):
+        path = source[len('loop:'):]
+        upload_dir = os.path.abspath(Config.UPLOAD_FOLDER)
+        if os.path.isabs(path):
+            path = os.path.relpath(os.path.abspath(path), upload_dir)
+        full_path = safe_join(upload_dir, path.replace(os.sep, '/'))
+        if full_path is None or not os.path.isfile(full_path):
+            raise ValueError("loop: source must be an uploaded video")
+        return 'loop:' + full_path
+    url = urlsplit(source)
+    if url.scheme.lower() not in Config.CAMERA_URL_SCHEMES or not url.hostname:
+        raise ValueError(f"Unsupported source, expected {'/'.join(Config.CAMERA_URL_SCHEMES)} URL, device index or loop:<upload>")
+    if Config.CAMERA_ALLOWED_HOSTS and url.hostname not in Config.CAMERA_ALLOWED_HOSTS:
+        raise ValueError(f"Camera host {url.hostname} is not allowed")
+    return source
+
+class CameraStream:
+    """
+    One live source read by a dedicated thread that keeps only the newest frame.
+    Consumers never see a backlog: frames not picked up before the next one arrives are dropped and counted.
+    """
+
+    def __init__(self, cam_id, source):
+        self.cam_id = cam_id
+        self.source = source
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._frame = None
+        self._seq = 0             # Sequence number of the newest frame
+        self._captured_at = 0.0   # monotonic time of the newest frame
+        self._consumed_seq = 0
+        self.stats = {"frames_read": 0, "frames_dropped": 0, "reconnects": 0,
+                      "connected": False, "last_error": None}
+        self._thread = threading.Thread(target=self._run, name=f"camera-{cam_id}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    @property
+    def stopped(self):
+        return self._stop.is_set()
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        """Reader loop with exponential reconnect backoff."""
+        backoff = Config.CAMERA_RECONNECT_MIN
+        while not self._stop.is_set():
+            cap = open_source(self.source)
+            if not cap.isOpened():
+                self._mark_disconnected(cap, "open failed")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, Config.CAMERA_RECONNECT_MAX)
+                continue
+
+            logger.info(f"[camera {self.cam_id}] connected: {self.source}")
+            self.stats["connected"] = True
+            backoff = Config.CAMERA_RECONNECT_MIN
+            while not self._stop.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                self._publish(frame)
+
+            self._mark_disconnected(cap, "read failed" if not self._stop.is_set() else None)
+            if not self._stop.is_set():
+                self.stats["reconnects"] += 1
+                self._stop.wait(backoff)
+
+    def _mark_disconnected(self, cap, error):
+        cap.release()
+        self.stats["connected"] = False
+        if error:
+            self.stats["last_error"] = error
+            logger.warning(f"[camera {self.cam_id}] {error}, retrying...")
+
+    def _publish(self, frame):
+        with self._cond:
+            if self._seq > self._consumed_seq:
+                self.stats["frames_dropped"] += 1  # Previous frame never consumed
+            self._frame = frame
+            self._seq += 1
+            self._captured_at = time.monotonic()
+            self.stats["frames_read"] += 1
+            self._cond.notify_all()
+
+    def read_latest(self, last_seq=0, timeout=None):
+        """
+        Waits for a frame newer than `last_seq` and returns it.
+        Returns:
+            tuple: (seq, frame, lag_seconds), or (last_seq, None, None) on timeout/stop.
+        """
+        timeout = Config.CAMERA_READ_TIMEOUT if timeout is None else timeout
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > last_seq or self._stop.is_set(), timeout):
+                return last_seq, None, None
+            if self._stop.is_set():
+                return last_seq, None, None
+            self._consumed_seq = self._seq
+            lag = time.monotonic() - self._captured_at
+            self.stats["lag_ms"] = round(lag * 1000, 1)
+            return self._seq, self._frame, lag
+
+    def metrics(self):
+        with self._cond:
+            return dict(self.stats, cam_id=self.cam_id, source=str(self.source),
+                        age_ms=round((time.monotonic() - self._captured_at) * 1000, 1) if self._seq else None)
+
+class CaptureService:
+    """Registry of live cameras, one CameraStream (reader thread) each."""
+
+    def __init__(self):
+        self._cameras = {}
+        self._lock = threading.Lock()
+
+    def add(self, cam_id, source):
+        """Starts reading `source` under `cam_id` (replaces an existing camera with the same id)."""
+        self.remove(cam_id)
+        stream = CameraStream(cam_id, source).start()
+        with self._lock:
+            self._cameras[cam_id] = stream
+        return stream
+
+    def remove(self, cam_id):
+        with self._lock:
+            stream = self._cameras.pop(cam_id, None)
+        if stream:
+            stream.stop()
+
+    def get(self, cam_id):
+        with self._lock:
+            return self._cameras.get(cam_id)
+
+    def metrics(self):
+        with self._lock:
+            streams = list(self._cameras.values())
+        return [s.metrics() for s in streams]
+
+    def stop_all(self):
+        with self._lock:
+            ids = list(self._cameras)
+        for cam_id in ids:
+            self.remove(cam_id)
+
+capture_service = CaptureService()
@@ -0,0 +1,158 @@
+import os
+import re
+import logging
+import threading
+from config import Config
+from src.probe import metadata_cache
+
+logger = logging.getLogger(__name__)
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov')
+RESULT_PATTERN = re.compile(r'^result_S(\d+)_')
+
+class FileCatalog:
+    """
+    In-memory index of uploaded and result videos with per-file metadata.
+    Routes update it on upload/process/delete; a cheap directory-mtime check
+    picks up files added or removed outside the app. Each folder has a version
+    counter that doubles as the ETag for the JSON API.
+    """
+
+    # Dot-files are work in progress (src.media.work_path: remux / H.264 conversion) and never listed
+    FOLDERS = {
+        'uploads': (Config.UPLOAD_FOLDER, lambda f: not f.startswith('.') and f.endswith(VIDEO_EXTENSIONS)),
+        'outputs': (Config.OUTPUT_FOLDER, lambda f: f.startswith('result_') and f.endswith(('.mp4', '.avi'))),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {kind: {} for kind in self.FOLDERS}   # {kind: {name: dict}}
+        self._dir_mtime = {kind: None for kind in self.FOLDERS}
+        self._version = {kind: 0 for kind in self.FOLDERS}
+
+    # --- INTERNAL HELPERS ---
+
+    def _make_entry(self, kind, name):
+        folder = self.FOLDERS[kind][0]
+        try:
+            st = os.stat(os.path.join(folder, name))
+        except OSError:
+            return None
+        match = RESULT_PATTERN.match(name)
+        return {
+            "name": name,
+            "size": st.st_size,
+            "mtime": int(st.st_mtime),
+            "session_id": int(match.group(1)) if match else None,
+            "probed": False,
+        }
+
+    def _sync(self, kind):
+        """Rescan a folder only if its mtime changed since the last scan (caller holds the lock)."""
+        folder, accept = self.FOLDERS[kind]
+        try:
+            mtime = os.stat(folder).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._dir_mtime[kind]:
+            return
+
+        entries = self._entries[kind]
+        with os.scandir(folder) as it:
+            on_disk = {e.name for e in it if e.is_file() and accept(e.name)}
+        changed = False
+        for name in set(entries) - on_disk:
+            del entries[name]
+            changed = True
+        for name in on_disk - set(entries):
+            entry = self._make_entry(kind, name)
+            if entry:
+                entries[name] = entry
+                changed = True
+        self._dir_mtime[kind] = mtime
+        if changed:
+            self._version[kind] += 1
+
+    # --- PUBLIC API ---
+
+    def etag(self, kind):
+        """Cheap version tag for `kind`; changes whenever the listing changes."""
+        with self._lock:
+            self._sync(kind)
+            return f'{kind}-{self._version[kind]}'
+
+    def touch(self, kind, name):
+        """(Re)index a single file after upload/processing."""
+        folder, accept = self.FOLDERS[kind]
+        if not accept(name):
+            return
+        with self._lock:
+            entry = self._make_entry(kind, name)
+            if entry:
+                self._entries[kind][name] = entry
+            else:
+                self._entries[kind].pop(name, None)
+            self._version[kind] += 1
+
+    def remove(self, kind, name):
+        """Drop a file from the index after deletion."""
+        with self._lock:
+            if self._entries[kind].pop(name, None) is not None:
+                self._version[kind] += 1
+
+    def probe_async(self, kind, name):
+        """Background probe after upload/processing; the entry gets its metadata when done."""
+        path = os.path.join(self.FOLDERS[kind][0], name)
+        metadata_cache.probe_async(path, on_done=lambda meta: self.update_metadata(kind, name, meta))
+
+    def update_metadata(self, kind, name, metadata):
+        """Attach externally probed metadata (fps, duration...) to an entry."""
+        with self._lock:
+            entry = self._entries[kind].get(name)
+            if entry is not None:
+                entry.update(metadata, probed=True)
+                self._version[kind] += 1
+
+    def names(self, kind):
+        """All file names of `kind`, newest first."""
+        with self._lock:
+            self._sync(kind)
+            entries = self._entries[kind]
+            return sorted(entries, key=lambda n: entries[n]["mtime"], reverse=True)
+
+    def page(self, kind, page=1, per_page=20):
+        """
+        Returns one page of entries (newest first) with metadata.
+        Never probes inside the request: metadata already in the probe cache is attached,
+        the rest is probed in the background (once, see src/probe.py) and shows up on a later poll.
+        Returns:
+            tuple: (list of dict, total count)
+        """
+        with self._lock:
+            self._sync(kind)
+            entries = self._entries[kind]
+            ordered = sorted(entries.values(), key=lambda e: e["mtime"], reverse=True)
+            start = max(page - 1, 0) * per_page
+            items = ordered[start:start + per_page]
+            to_probe = [e["name"] for e in items if not e["probed"]]
+
+        folder = self.FOLDERS[kind][0]
+        for name in to_probe:
+            metadata = metadata_cache.get(os.path.join(folder, name), probe=False)
+            with self._lock:
+                entry = self._entries[kind].get(name)
+                if entry is None or entry["probed"]:
+                    continue
+                if metadata is not None:
+                    entry.update(metadata, probed=True)
+                    continue
+                # "probed" = None: background probe already queued
+                if entry["probed"] is None:
+                    continue
+                entry["probed"] = None
+            self.probe_async(kind, name)
+
+        with self._lock:
+            return [{k: v for k, v in e.items() if k != "probed"} for e in items], len(ordered)
+
+catalog = FileCatalog()
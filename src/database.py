@@ -1,8 +1,13 @@
 import sqlite3
 import os
+import time
 import logging
 import pandas as pd
 from config import Config
+from src.employees import read_employee_chunks, normalize_employee_frame
+from src.cache import cached, query_cache, Uncached
+from src.archive import read_archived_actions, session_month
+from src.summary import summarize_actions, SUMMARY_COLUMNS
 
 # Cấu hình logging đồng bộ với hệ thống
 logger = logging.getLogger(__name__)
@@ -59,10 +64,50 @@ def init_db():
                     FOREIGN KEY (employee_id) REFERENCES employees(emp_id)
                 )
             ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_actions_session ON actions(session_id)')
+
+            # 4. Daily summary: per employee per day, folded in as sessions close (never scan raw actions)
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS daily_summary (
+                    day DATE NOT NULL,
+                    employee_id TEXT NOT NULL,
+                    first_seen DATETIME,
+                    last_seen DATETIME,
+                    seated_seconds INTEGER NOT NULL DEFAULT 0,
+                    departures INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (day, employee_id)
+                )
+            ''')
+            _migrate_schema(conn)
             _seed_sample_data(conn)
             logger.info("Database schema initialized successfully.")
     except Exception as e:
         logger.critical(f"Failed to initialize database: {e}")
+    # Readers that ran before the schema existed (e.g. an engine built first) must not keep stale results
+    for namespace in (EMPLOYEES_NS, SESSIONS_NS, SUMMARY_NS):
+        query_cache.invalidate(namespace)
+
+def _migrate_schema(conn):
+    """Adds columns introduced after the first release to existing databases."""
+    session_cols = {row['name'] for row in conn.execute('PRAGMA table_info(sessions)')}
+    if 'archived' not in session_cols:
+        # 1 = actions moved to Parquet partitions (see src/archive.py)
+        conn.execute('ALTER TABLE sessions ADD COLUMN archived INTEGER NOT NULL DEFAULT 0')
+    if 'end_time' not in session_cols:
+        # Set when the engine finishes the session; only closed (or long idle) sessions are archived
+        conn.execute('ALTER TABLE sessions ADD COLUMN end_time DATETIME')
+    if 'recording_start' not in session_cols:
+        # Local time the footage begins (video header); NULL = start_time. Summary days are anchored on it
+        conn.execute('ALTER TABLE sessions ADD COLUMN recording_start DATETIME')
+    if 'summarized_upto' not in session_cols:
+        # Last action id folded into daily_summary
+        conn.execute('ALTER TABLE sessions ADD COLUMN summarized_upto INTEGER NOT NULL DEFAULT 0')
+    # Existing history is summarized once. The marker is only set after the rebuild committed,
+    # so a rebuild that failed (e.g. unreadable archive) runs again on the next start
+    if conn.execute('PRAGMA user_version').fetchone()[0] < SUMMARY_SCHEMA_VERSION:
+        _rebuild_daily_summary(conn)
+        conn.execute(f'PRAGMA user_version = {SUMMARY_SCHEMA_VERSION}')
+        conn.commit()
 
 def _seed_sample_data(conn):
     """Internal helper to insert initial data if the employee table is empty."""
@@ -79,6 +124,19 @@ def _seed_sample_data(conn):
 
 # --- EMPLOYEE MANAGEMENT ---
 
+# Read-through cache namespaces (src/cache.py): every write below invalidates its namespace
+EMPLOYEES_NS = 'employees'
+SESSIONS_NS = 'sessions'
+SUMMARY_NS = 'summary'
+
+def get_employee_version():
+    """Returns a counter that changes whenever employee data is modified."""
+    return query_cache.version(EMPLOYEES_NS)
+
+def _bump_employee_version():
+    query_cache.invalidate(EMPLOYEES_NS)
+
+@cached(EMPLOYEES_NS)
 def get_employee_name_map():
     """
     Fetches employee ID to Name mapping for AI inference caching.
@@ -91,19 +149,94 @@ def get_employee_name_map():
             return {row['emp_id']: row['full_name'] for row in rows}
     except Exception as e:
         logger.error(f"Error fetching employee map: {e}")
-        return {}
+        return Uncached({})
     
+@cached(EMPLOYEES_NS)
+def get_employees_page(limit=50, offset=0):
+    """
+    Returns one page of employees (ordered by emp_id) plus the total count, for the dashboard list.
+    Returns:
+        tuple: (list of dict {emp_id, full_name}, int)
+    """
+    try:
+        with get_db_connection() as conn:
+            rows = conn.execute('SELECT emp_id, full_name FROM employees ORDER BY emp_id LIMIT ? OFFSET ?',
+                                (limit, offset)).fetchall()
+            total = conn.execute('SELECT COUNT(*) FROM employees').fetchone()[0]
+            return [dict(row) for row in rows], total
+    except Exception as e:
+        logger.error(f"Error fetching employees page: {e}")
+        return Uncached(([], 0))
+
 def update_employee_name(emp_id, new_name):
     """Cập nhật tên nhân viên (Hàm này đã được khôi phục)."""
     try:
         with get_db_connection() as conn:
             conn.execute('UPDATE employees SET full_name = ? WHERE emp_id = ?', (new_name, emp_id))
             conn.commit()
+            _bump_employee_version()
             return True
     except Exception as e:
         logger.error(f"Lỗi cập nhật tên: {e}")
         return False
     
+def bulk_upsert_employees(conn, frame):
+    """
+    Set-based upsert of one normalized chunk: load into a TEMP staging table, then one INSERT ... ON CONFLICT.
+    Existing rows keep their position when the chunk has none.
+    Returns:
+        tuple: (inserted, updated) counts
+    """
+    conn.execute('CREATE TEMP TABLE IF NOT EXISTS employees_staging (emp_id TEXT PRIMARY KEY, full_name TEXT, position TEXT)')
+    conn.execute('DELETE FROM employees_staging')
+    conn.executemany('INSERT OR REPLACE INTO employees_staging VALUES (?, ?, ?)',
+                     frame[['emp_id', 'full_name', 'position']].astype(object).where(frame.notna(), None)
+                     .itertuples(index=False, name=None))
+
+    inserted, updated = conn.execute('''
+        SELECT SUM(e.emp_id IS NULL),
+               SUM(e.emp_id IS NOT NULL AND (e.full_name IS NOT s.full_name
+                   OR e.position IS NOT COALESCE(s.position, e.position)))
+        FROM employees_staging s LEFT JOIN employees e ON e.emp_id = s.emp_id
+    ''').fetchone()
+
+    # "WHERE true" is required by SQLite to parse ON CONFLICT after INSERT ... SELECT
+    conn.execute('''
+        INSERT INTO employees (emp_id, full_name, position)
+        SELECT emp_id, full_name, position FROM employees_staging WHERE true
+        ON CONFLICT(emp_id) DO UPDATE SET
+            full_name = excluded.full_name,
+            position = COALESCE(excluded.position, employees.position)
+    ''')
+    return inserted or 0, updated or 0
+
+def import_employees_from_file(source, filename=None, default_position=None):
+    """
+    Streams a CSV/XLSX HR sheet into the employees table chunk by chunk.
+    Each chunk is its own short transaction, so the engine's writes are never blocked for long.
+    Returns:
+        dict: {"inserted": int, "updated": int, "rejected": int}
+    """
+    counts = {"inserted": 0, "updated": 0, "rejected": 0}
+    try:
+        with get_db_connection() as conn:
+            for chunk in read_employee_chunks(source, filename, chunksize=Config.EMPLOYEE_IMPORT_CHUNK):
+                frame, rejected = normalize_employee_frame(chunk, default_position)
+                counts["rejected"] += rejected
+                if frame.empty:
+                    continue
+                inserted, updated = bulk_upsert_employees(conn, frame)
+                conn.commit()
+                counts["inserted"] += inserted
+                counts["updated"] += updated
+        logger.info(f"Employee import: {counts}")
+    except Exception as e:
+        logger.error(f"Bulk import failed: {e}")
+    finally:
+        if counts["inserted"] or counts["updated"]:
+            _bump_employee_version()
+    return counts
+
 def import_employee_list(data_list):
     """
     Bulk inserts or updates employee records.
@@ -111,36 +244,25 @@ def import_employee_list(data_list):
         data_list (list): List of tuples (emp_id, full_name, position)
     """
     try:
+        frame = pd.DataFrame(data_list, columns=['emp_id', 'full_name', 'position'])
         with get_db_connection() as conn:
-            conn.executemany('''
-                INSERT OR REPLACE INTO employees (emp_id, full_name, position)
-                VALUES (?, ?, ?)
-            ''', data_list)
+            bulk_upsert_employees(conn, frame)
             conn.commit()
-            logger.info(f"Successfully imported {len(data_list)} employees.")
-            return True
+        _bump_employee_version()
+        logger.info(f"Successfully imported {len(data_list)} employees.")
+        return True
     except Exception as e:
         logger.error(f"Bulk import failed: {e}")
         return False
 
 def sync_employees_from_file(file_path='employees.csv'):
-    """Synchronizes employee database with a CSV file."""
+    """Synchronizes employee database with a CSV/XLSX file."""
     if not os.path.exists(file_path):
         logger.warning(f"Sync failed: File {file_path} not found.")
-        return
-    
-    try:
-        df = pd.read_csv(file_path) 
-        with get_db_connection() as conn:
-            for _, row in df.iterrows():
-                conn.execute('''
-                    INSERT OR REPLACE INTO employees (emp_id, full_name, position)
-                    VALUES (?, ?, ?)
-                ''', (row['emp_id'], row['full_name'], row['position']))
-            conn.commit()
-        logger.info(f"Synchronized {len(df)} records from {file_path}.")
-    except Exception as e:
-        logger.error(f"File sync error: {e}")
+        return None
+    counts = import_employees_from_file(file_path)
+    logger.info(f"Synchronized {file_path}: {counts}")
+    return counts
 
 # --- SESSION & LOGGING LOGIC ---
 
@@ -150,11 +272,42 @@ def create_new_session(video_name):
         with get_db_connection() as conn:
             cursor = conn.execute("INSERT INTO sessions (video_name) VALUES (?)", (video_name,))
             conn.commit()
+            query_cache.invalidate(SESSIONS_NS)
             return cursor.lastrowid
     except Exception as e:
         logger.error(f"Failed to create session for {video_name}: {e}")
         return None
 
+def set_session_recording_start(session_id, epoch):
+    """Stores when the session's footage was recorded (epoch seconds, saved as local time)."""
+    if session_id is None or epoch is None:
+        return False
+    try:
+        with get_db_connection() as conn:
+            conn.execute('UPDATE sessions SET recording_start = ? WHERE id = ?',
+                         (time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(epoch)), session_id))
+            conn.commit()
+        query_cache.invalidate(SESSIONS_NS)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to set recording start of session {session_id}: {e}")
+        return False
+
+def close_session(session_id):
+    """Marks a session as finished (end_time = now)."""
+    if session_id is None:
+        return False
+    try:
+        with get_db_connection() as conn:
+            conn.execute("UPDATE sessions SET end_time = datetime('now','localtime') WHERE id = ?", (session_id,))
+            conn.commit()
+        query_cache.invalidate(SESSIONS_NS)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to close session {session_id}: {e}")
+        return False
+
+@cached(SESSIONS_NS)
 def get_latest_session_id():
     """Lấy ID phiên mới nhất (Hàm này đã được khôi phục)."""
     try:
@@ -166,30 +319,214 @@ def get_latest_session_id():
         return None
     
 def log_action(employee_id, action, session_id):
-    """Records an employee action into the database with automatic member registration."""
+    """
+    Records an employee action into the database with automatic member registration.
+    Returns:
+        int: The new action id (used as the event cursor), or None on failure.
+    """
     if session_id is None:
-        return
+        return None
         
     try:
         with get_db_connection() as conn:
             # Auto-register unknown employees to prevent Foreign Key violations
-            conn.execute('''
+            registered = conn.execute('''
                 INSERT OR IGNORE INTO employees (emp_id, full_name, position) 
                 VALUES (?, ?, ?)
-            ''', (employee_id, f"Auto-Registered ({employee_id})", "Unknown"))
+            ''', (employee_id, f"Auto-Registered ({employee_id})", "Unknown")).rowcount
             
-            conn.execute(
+            cursor = conn.execute(
                 'INSERT INTO actions (session_id, employee_id, action) VALUES (?, ?, ?)',
                 (session_id, employee_id, action)
             )
             conn.commit()
+            if registered:
+                _bump_employee_version()
+            return cursor.lastrowid
     except Exception as e:
         logger.error(f"Action logging failed for {employee_id}: {e}")
 
+# --- DAILY SUMMARY (pre-aggregated reporting) ---
+
+def _upsert_daily_summary(conn, frame):
+    """Adds summarize_actions() output to daily_summary (min/max for times, sums for counters)."""
+    conn.executemany('''
+        INSERT INTO daily_summary (day, employee_id, first_seen, last_seen, seated_seconds, departures)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(day, employee_id) DO UPDATE SET
+            first_seen = MIN(first_seen, excluded.first_seen),
+            last_seen = MAX(last_seen, excluded.last_seen),
+            seated_seconds = seated_seconds + excluded.seated_seconds,
+            departures = departures + excluded.departures
+    ''', frame[SUMMARY_COLUMNS].astype(object).itertuples(index=False, name=None))
+
+# PRAGMA user_version once daily_summary holds all history (bump to rebuild it after a format change)
+SUMMARY_SCHEMA_VERSION = 1
+
+# Footage time origin of a session's "tại" offsets (processing start when the video had no header time)
+SESSION_ANCHOR = 'COALESCE(recording_start, start_time)'
+
+def _rebuild_daily_summary(conn):
+    """Recomputes daily_summary from all hot and archived actions (migration / repair)."""
+    hot = pd.read_sql_query('SELECT id, session_id, employee_id, action, timestamp FROM actions', conn)
+    archived = read_archived_actions()
+    frames = [f for f in (hot, archived[['id', 'session_id', 'employee_id', 'action', 'timestamp']]) if not f.empty]
+    conn.execute('DELETE FROM daily_summary')
+    if frames:
+        anchors = pd.read_sql_query(f'SELECT id AS session_id, {SESSION_ANCHOR} AS anchor FROM sessions', conn)
+        actions = pd.concat(frames, ignore_index=True).merge(anchors, on='session_id', how='left')
+        _upsert_daily_summary(conn, summarize_actions(actions))
+    conn.execute('''
+        UPDATE sessions SET summarized_upto = COALESCE(
+            (SELECT MAX(id) FROM actions WHERE actions.session_id = sessions.id), 0)
+    ''')
+    conn.commit()
+    query_cache.invalidate(SUMMARY_NS)
+
+def rebuild_daily_summary():
+    try:
+        with get_db_connection() as conn:
+            _rebuild_daily_summary(conn)
+        return True
+    except Exception as e:
+        logger.error(f"Daily summary rebuild failed: {e}")
+        return False
+
+def _fold_session(conn, session_id):
+    row = conn.execute('SELECT summarized_upto FROM sessions WHERE id = ?', (session_id,)).fetchone()
+    if row is None:
+        return 0
+    df = pd.read_sql_query(f'''
+        SELECT a.id, a.employee_id, a.action, a.timestamp, {SESSION_ANCHOR} AS anchor
+        FROM actions a JOIN sessions s ON s.id = a.session_id
+        WHERE a.session_id = ? AND a.id > ?
+    ''', conn, params=(session_id, row['summarized_upto']))
+    if df.empty:
+        return 0
+    _upsert_daily_summary(conn, summarize_actions(df))
+    conn.execute('UPDATE sessions SET summarized_upto = ? WHERE id = ?', (int(df['id'].max()), session_id))
+    return len(df)
+
+def summarize_session(session_id, conn=None):
+    """
+    Folds the session's actions logged since its last summary into daily_summary.
+    Idempotent (watermark = sessions.summarized_upto), so it is safe to call on every session close.
+    With `conn` it runs inside the caller's transaction (no commit, caller invalidates SUMMARY_NS).
+    Returns:
+        int: Number of actions folded in.
+    """
+    if session_id is None:
+        return 0
+    if conn is not None:
+        return _fold_session(conn, session_id)
+    try:
+        with get_db_connection() as conn:
+            folded = _fold_session(conn, session_id)
+            conn.commit()
+        if folded:
+            query_cache.invalidate(SUMMARY_NS)
+        return folded
+    except Exception as e:
+        logger.error(f"Summarizing session {session_id} failed: {e}")
+        return 0
+
+def summarize_pending_sessions(exclude_session_ids=()):
+    """Summarizes every hot session with unsummarized actions (e.g. after a crash)."""
+    try:
+        with get_db_connection() as conn:
+            rows = conn.execute('''
+                SELECT s.id FROM sessions s
+                WHERE s.archived = 0 AND EXISTS (
+                    SELECT 1 FROM actions a WHERE a.session_id = s.id AND a.id > s.summarized_upto)
+            ''').fetchall()
+    except Exception as e:
+        logger.error(f"Error listing unsummarized sessions: {e}")
+        return 0
+    return sum(summarize_session(r['id']) for r in rows if r['id'] not in set(exclude_session_ids))
+
+def _summary_filters(start=None, end=None, employee_id=None):
+    clauses, params = [], []
+    if start:
+        clauses.append('d.day >= ?')
+        params.append(start)
+    if end:
+        clauses.append('d.day <= ?')
+        params.append(end)
+    if employee_id:
+        clauses.append('d.employee_id = ?')
+        params.append(employee_id)
+    return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+@cached(SUMMARY_NS)
+def get_daily_summary(start=None, end=None, employee_id=None, limit=100, offset=0):
+    """
+    One page of daily_summary rows (newest day first) with employee names.
+    Returns:
+        tuple: (list of dict, total row count)
+    """
+    try:
+        where, params = _summary_filters(start, end, employee_id)
+        with get_db_connection() as conn:
+            rows = conn.execute(f'''
+                SELECT d.*, e.full_name FROM daily_summary d
+                LEFT JOIN employees e ON d.employee_id = e.emp_id
+                {where} ORDER BY d.day DESC, d.employee_id LIMIT ? OFFSET ?
+            ''', params + [limit, offset]).fetchall()
+            total = conn.execute(f'SELECT COUNT(*) FROM daily_summary d{where}', params).fetchone()[0]
+            return [dict(r) for r in rows], total
+    except Exception as e:
+        logger.error(f"Error fetching daily summary: {e}")
+        return Uncached(([], 0))
+
+@cached(SUMMARY_NS)
+def get_summary_totals(start=None, end=None):
+    """
+    Per-employee totals over a date range, straight from daily_summary.
+    Returns:
+        list: dicts with days, seated_seconds, departures, avg_seated_seconds, first_seen, last_seen.
+    """
+    try:
+        where, params = _summary_filters(start, end)
+        with get_db_connection() as conn:
+            rows = conn.execute(f'''
+                SELECT d.employee_id, e.full_name, COUNT(*) AS days,
+                       SUM(d.seated_seconds) AS seated_seconds, SUM(d.departures) AS departures,
+                       ROUND(AVG(d.seated_seconds), 1) AS avg_seated_seconds,
+                       MIN(d.first_seen) AS first_seen, MAX(d.last_seen) AS last_seen
+                FROM daily_summary d LEFT JOIN employees e ON d.employee_id = e.emp_id
+                {where} GROUP BY d.employee_id ORDER BY d.employee_id
+            ''', params).fetchall()
+            return [dict(r) for r in rows]
+    except Exception as e:
+        logger.error(f"Error fetching summary totals: {e}")
+        return Uncached([])
+
+def get_summary_report():
+    """Full daily summary for the Excel export."""
+    try:
+        with get_db_connection() as conn:
+            return pd.read_sql_query('''
+                SELECT d.day AS "Day", d.employee_id AS "Employee ID", e.full_name AS "Full Name",
+                       d.first_seen AS "First Seen", d.last_seen AS "Last Seen",
+                       d.seated_seconds AS "Seated Seconds", d.departures AS "Departures"
+                FROM daily_summary d LEFT JOIN employees e ON d.employee_id = e.emp_id
+                ORDER BY d.day DESC, d.employee_id
+            ''', conn)
+    except Exception as e:
+        logger.error(f"Summary report failed: {e}")
+        return None
+
 # --- REPORTING & QUERYING ---
 
+def invalidate_session_cache():
+    """Drops cached session lookups after sessions change outside create_new_session (archival)."""
+    query_cache.invalidate(SESSIONS_NS)
+
 def get_report_data():
-    """Retrieves a comprehensive report using Pandas for easier data analysis."""
+    """
+    Retrieves a comprehensive report using Pandas for easier data analysis.
+    Archived sessions (Parquet) are appended to the hot SQLite rows transparently.
+    """
     try:
         with get_db_connection() as conn:
             sql = '''
@@ -205,25 +542,145 @@ def get_report_data():
                 JOIN employees e ON a.employee_id = e.emp_id
                 ORDER BY s.id DESC, a.timestamp ASC
             '''
-            return pd.read_sql_query(sql, conn)
+            hot = pd.read_sql_query(sql, conn)
+
+        archived = read_archived_actions()
+        if archived.empty:
+            return hot
+        # Tên nhân viên hiện tại (nếu có), nếu không dùng tên lúc lưu trữ
+        names = get_employee_name_map()
+        cold = pd.DataFrame({
+            "Session ID": archived['session_id'],
+            "Video Source": archived['video_name'],
+            "Employee ID": archived['employee_id'],
+            "Full Name": archived['employee_id'].map(names).fillna(archived['full_name']),
+            "Action": archived['action'],
+            "Timestamp": archived['timestamp'],
+        })
+        report = pd.concat([hot, cold], ignore_index=True)
+        return report.sort_values(["Session ID", "Timestamp"], ascending=[False, True], ignore_index=True)
     except Exception as e:
         logger.error(f"Report generation failed: {e}")
         return None
 
+def get_session_actions(session_id):
+    """
+    All actions of one session in chronological order: archived rows (only the session's
+    month partition is read) plus any rows still in SQLite.
+    Returns:
+        list: dict rows with the `actions` columns plus full_name.
+    """
+    try:
+        with get_db_connection() as conn:
+            rows = conn.execute('''
+                SELECT a.*, e.full_name FROM actions a 
+                LEFT JOIN employees e ON a.employee_id = e.emp_id 
+                WHERE a.session_id = ? ORDER BY a.timestamp ASC, a.id ASC
+            ''', (session_id,)).fetchall()
+            hot = [dict(row) for row in rows]
+        cold = _archived_action_rows(session_id=session_id)
+        if not cold:
+            return hot
+        # Hàng ghi sau khi phiên đã lưu trữ vẫn nằm trong SQLite
+        return sorted(cold + hot, key=lambda r: (str(r['timestamp']), r['id']))
+    except Exception as e:
+        logger.error(f"Error fetching actions of session {session_id}: {e}")
+        return []
+
+def _archived_month(session_id):
+    """
+    Archive partition of a session, None if its actions are all still in SQLite.
+    Read uncached: scripts/archive.py flips `archived` from another process, which never
+    invalidates this process's cache (a stale 0 would silently hide the Parquet rows).
+    """
+    with get_db_connection() as conn:
+        row = conn.execute('SELECT archived, start_time FROM sessions WHERE id = ?', (session_id,)).fetchone()
+    return session_month(row['start_time']) if row is not None and row['archived'] else None
+
+def _archived_action_rows(session_id=None, after_id=None):
+    """
+    Archived actions as dict rows shaped like the hot ones (full_name = current name if known).
+    With `session_id` only that session's month partition is read, and only if it is archived.
+    """
+    months = None
+    if session_id:
+        month = _archived_month(session_id)
+        if month is None:
+            return []
+        months = [month]
+    df = read_archived_actions(session_id=session_id, months=months, after_id=after_id)
+    if df.empty:
+        return []
+    names = get_employee_name_map()
+    df['full_name'] = df['employee_id'].map(names).fillna(df['full_name'])
+    return df[['id', 'session_id', 'employee_id', 'action', 'timestamp', 'full_name']].to_dict('records')
+
 def get_latest_actions(limit=20, session_id=None):
-    """Fetches the most recent activity logs for dashboard display."""
+    """
+    Fetches the most recent activity logs for dashboard display, newest first.
+    Archived rows are merged in for an archived session; across all sessions they are only read
+    when SQLite holds fewer than `limit` rows (archived sessions are older than every hot one).
+    Returns:
+        list: dict rows with the `actions` columns plus full_name.
+    """
     try:
         with get_db_connection() as conn:
             sql = 'SELECT a.*, e.full_name FROM actions a LEFT JOIN employees e ON a.employee_id = e.emp_id'
             if session_id:
-                cursor = conn.execute(sql + ' WHERE a.session_id = ? ORDER BY a.timestamp DESC LIMIT ?', (session_id, limit))
+                cursor = conn.execute(sql + ' WHERE a.session_id = ? ORDER BY a.timestamp DESC, a.id DESC LIMIT ?', (session_id, limit))
             else:
-                cursor = conn.execute(sql + ' ORDER BY a.timestamp DESC LIMIT ?', (limit,))
-            return cursor.fetchall()
+                cursor = conn.execute(sql + ' ORDER BY a.timestamp DESC, a.id DESC LIMIT ?', (limit,))
+            hot = [dict(row) for row in cursor.fetchall()]
+        if not session_id and len(hot) >= limit:
+            return hot
+        cold = _archived_action_rows(session_id=session_id)
+        rows = sorted(cold + hot, key=lambda r: (str(r['timestamp']), r['id']), reverse=True)
+        return rows[:limit]
     except Exception as e:
         logger.error(f"Error fetching latest actions: {e}")
         return []
 
+def get_last_action_id(session_id=None):
+    """Id of the newest action (of one session), 0 if none; cheap version tag for action listings."""
+    try:
+        with get_db_connection() as conn:
+            if session_id:
+                row = conn.execute('SELECT MAX(id) FROM actions WHERE session_id = ?', (session_id,)).fetchone()
+            else:
+                row = conn.execute('SELECT MAX(id) FROM actions').fetchone()
+            return row[0] or 0
+    except Exception as e:
+        logger.error(f"Error fetching last action id: {e}")
+        return 0
+
+def get_actions_after(after_id, session_id=None, limit=500):
+    """
+    Fetches actions newer than `after_id` (ascending), used to resume event streams.
+    Archived rows are included: for one session when it is archived, across all sessions when
+    the hot page has holes in the id range (ids are AUTOINCREMENT, archival leaves gaps).
+    Returns:
+        list: dict rows with the `actions` columns plus full_name.
+    """
+    try:
+        with get_db_connection() as conn:
+            sql = 'SELECT a.*, e.full_name FROM actions a LEFT JOIN employees e ON a.employee_id = e.emp_id WHERE a.id > ?'
+            params = [after_id]
+            if session_id:
+                sql += ' AND a.session_id = ?'
+                params.append(session_id)
+            hot = [dict(row) for row in conn.execute(sql + ' ORDER BY a.id ASC LIMIT ?', params + [limit]).fetchall()]
+            if not session_id:
+                seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'actions'").fetchone()
+                # Every id up to the page end (or the newest id ever assigned) is hot: nothing to merge
+                if len(hot) >= min(seq[0] if seq else 0, after_id + limit) - after_id:
+                    return hot
+        cold = _archived_action_rows(session_id=session_id, after_id=after_id)
+        return sorted(cold + hot, key=lambda r: r['id'])[:limit]
+    except Exception as e:
+        logger.error(f"Error fetching actions after {after_id}: {e}")
+        return []
+
+@cached(SESSIONS_NS)
 def get_all_sessions():
     """Returns a list of all historical sessions."""
     try:
@@ -232,8 +689,25 @@ def get_all_sessions():
             return cursor.fetchall()
     except Exception as e:
         logger.error(f"Error fetching sessions: {e}")
-        return []
+        return Uncached([])
     
+@cached(SESSIONS_NS)
+def get_sessions_page(limit=20, offset=0):
+    """
+    Returns one page of sessions (newest first) plus the total session count.
+    Returns:
+        tuple: (list of sqlite3.Row, int)
+    """
+    try:
+        with get_db_connection() as conn:
+            rows = conn.execute('SELECT * FROM sessions ORDER BY id DESC LIMIT ? OFFSET ?', (limit, offset)).fetchall()
+            total = conn.execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+            return rows, total
+    except Exception as e:
+        logger.error(f"Error fetching sessions page: {e}")
+        return Uncached(([], 0))
+
+@cached(SESSIONS_NS)
 def get_session_by_id(session_id):
     """
     Fetches a specific session's details by its ID.
@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import shutil
+import logging
+import numpy as np
+from config import Config
+from src.occupancy import OccupancyTracker, filter_person_boxes
+
+logger = logging.getLogger(__name__)
+
+# Columnar layout: one .npy file per column, all memory-mappable.
+#   infer_frames (F,)   frame numbers on which model.track ran
+#   offsets      (F+1,) row range of each inference frame in the box columns (CSR)
+#   boxes        (N, 4) float32 xyxy
+#   track_ids    (N,)   int32, -1 when the tracker gave no id
+#   confs        (N,)   float32
+COLUMNS = ('infer_frames', 'offsets', 'boxes', 'track_ids', 'confs')
+
+def cache_dir_for(video_path, session_id):
+    """Default cache location for one analysis run."""
+    name_only = os.path.splitext(os.path.basename(video_path))[0]
+    return os.path.join(Config.DETECTION_CACHE_DIR, f"S{session_id}_{name_only}")
+
+def _dir_size(path):
+    with os.scandir(path) as it:
+        return sum(e.stat().st_size for e in it if e.is_file())
+
+def prune_detection_caches(root=None, max_age_days=None, max_mb=None, keep=()):
+    """
+    Retention for DETECTION_CACHE_DIR: deletes runs older than `max_age_days`,
+    then the oldest remaining runs until the folder is under `max_mb`. Directories in `keep` are never deleted.
+    Returns:
+        int: Number of cache directories removed.
+    """
+    root = root or Config.DETECTION_CACHE_DIR
+    max_age_days = Config.DETECTION_CACHE_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    max_mb = Config.DETECTION_CACHE_MAX_MB if max_mb is None else max_mb
+    keep = {os.path.abspath(p) for p in keep}
+    try:
+        with os.scandir(root) as it:
+            runs = [(e.stat().st_mtime, e.path) for e in it if e.is_dir() and os.path.abspath(e.path) not in keep]
+    except OSError:
+        return 0
+
+    runs.sort()  # Oldest first
+    sizes = {path: _dir_size(path) for _, path in runs}
+    total = sum(sizes.values()) + sum(_dir_size(p) for p in keep if os.path.isdir(p))
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for mtime, path in runs:
+        if mtime >= cutoff and total <= max_mb * 1024 * 1024:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= sizes[path]
+        removed += 1
+    if removed:
+        logger.info(f"Detection caches pruned: {removed} removed, {total / 1024 / 1024:.1f} MB kept")
+    return removed
+
+class DetectionRecorder:
+    """Accumulates per-inference-frame detections during a run and writes them as columns."""
+
+    def __init__(self):
+        self._frames, self._counts = [], []
+        self._boxes, self._ids, self._confs = [], [], []
+
+    def add(self, frame_idx, boxes=None):
+        """
+        Records the output of one model.track call.
+        Args:
+            boxes: Ultralytics `Boxes` object, or None when nothing was detected.
+        """
+        self._frames.append(frame_idx)
+        if boxes is None or len(boxes) == 0:
+            self._counts.append(0)
+            return
+        xyxy = boxes.xyxy.cpu().numpy().astype(np.float32)
+        ids = boxes.id.cpu().numpy().astype(np.int32) if boxes.id is not None else np.full(len(xyxy), -1, np.int32)
+        self._counts.append(len(xyxy))
+        self._boxes.append(xyxy)
+        self._ids.append(ids)
+        self._confs.append(boxes.conf.cpu().numpy().astype(np.float32))
+
+    def save(self, out_dir, **meta):
+        """Writes the columns plus a meta.json (fps, frame count, parameters used...)."""
+        os.makedirs(out_dir, exist_ok=True)
+        columns = {
+            'infer_frames': np.asarray(self._frames, dtype=np.int32),
+            'offsets': np.concatenate(([0], np.cumsum(self._counts))).astype(np.int64),
+            'boxes': np.concatenate(self._boxes) if self._boxes else np.zeros((0, 4), np.float32),
+            'track_ids': np.concatenate(self._ids) if self._ids else np.zeros(0, np.int32),
+            'confs': np.concatenate(self._confs) if self._confs else np.zeros(0, np.float32),
+        }
+        for name, arr in columns.items():
+            np.save(os.path.join(out_dir, f"{name}.npy"), arr)
+        with open(os.path.join(out_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        logger.info(f"Detection cache saved: {out_dir} ({len(columns['boxes'])} boxes, "
+                    f"{len(columns['infer_frames'])} inference frames)")
+
+class DetectionCache:
+    """Read-only, memory-mapped view of a saved detection run."""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        with open(os.path.join(cache_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        for name in COLUMNS:
+            setattr(self, name, np.load(os.path.join(cache_dir, f"{name}.npy"), mmap_mode='r'))
+
+    @property
+    def total_frames(self):
+        return int(self.meta.get('total_frames') or (self.infer_frames[-1] if len(self.infer_frames) else 0))
+
+    @property
+    def frame_dur(self):
+        return float(self.meta.get('frame_dur', 1.0 / 30.0))
+
+    def frame_boxes(self, i):
+        """Boxes of the i-th inference frame."""
+        return self.boxes[self.offsets[i]:self.offsets[i + 1]]
+
+def replay(cache, geometry, min_work_duration=None, patience_limit=None,
+           max_area=None, max_aspect=None):
+    """
+    Re-runs filtering, zone assignment and the logging state machine over cached detections.
+    No model, no decoding, no drawing and no DB writes. Stays still open after the last frame are
+    closed with "Kết thúc phiên", like EmployeeTrackerEngine.finish_session.
+    Returns:
+        list: (frame_count, emp_code, action) tuples in the order the engine would log them.
+    """
+    tracker = OccupancyTracker(len(geometry), min_work_duration, patience_limit)
+    frame_dur = cache.frame_dur
+    n_infer = len(cache.infer_frames)
+    infer_frames = np.asarray(cache.infer_frames)
+
+    # Zone occupancy only changes on inference frames, so resolve it once per inference frame
+    occupancy = np.zeros((n_infer, len(geometry)), dtype=bool)
+    for i in range(n_infer):
+        boxes, keep, anchors = filter_person_boxes(cache.frame_boxes(i), max_area, max_aspect)
+        for x, y in anchors[keep]:
+            idx = geometry.locate((int(x), int(y)))
+            if idx >= 0:
+                occupancy[i, idx] = True
+
+    events = []
+    empty = np.zeros(len(geometry), dtype=bool)
+    occupied, cursor = empty, 0
+    for frame_count in range(1, cache.total_frames + 1):
+        if cursor < n_infer and infer_frames[cursor] == frame_count:
+            occupied = occupancy[cursor]
+            cursor += 1
+        for emp_code, action in tracker.update(occupied, frame_count, frame_dur):
+            events.append((frame_count, emp_code, action))
+    for emp_code, action in tracker.close(cache.total_frames * frame_dur):
+        events.append((cache.total_frames, emp_code, action))
+    return events
+
+def timed_replay(cache, geometry, **params):
+    """replay() plus throughput, for parameter sweeps."""
+    t0 = time.perf_counter()
+    events = replay(cache, geometry, **params)
+    elapsed = time.perf_counter() - t0
+    fps = cache.total_frames / elapsed if elapsed > 0 else float('inf')
+    return events, elapsed, fps
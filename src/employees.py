@@ -0,0 +1,69 @@
+import logging
+import pandas as pd
+from openpyxl import load_workbook
+
+logger = logging.getLogger(__name__)
+
+# Tên cột chấp nhận được trong file HR (template Duy Tân + tên cột chuẩn của DB)
+COLUMN_ALIASES = {
+    'emp_id': ('emp_id', 'Mã NV', 'Ma NV'),
+    'full_name': ('full_name', 'Họ Tên', 'Ho Ten'),
+    'position': ('position', 'Chức Vụ', 'Chuc Vu'),
+}
+
+def _as_text(col):
+    """Column -> trimmed strings with NA for blanks; integral floats (Excel ids) lose their '.0'."""
+    if pd.api.types.is_float_dtype(col) and (col.dropna() % 1 == 0).all():
+        col = col.astype('Int64')
+    col = col.astype('string').str.strip()
+    return col.mask(col == '')
+
+def normalize_employee_frame(df, default_position=None):
+    """
+    Column-level normalization of one chunk of an HR sheet.
+    Returns:
+        tuple: (DataFrame[emp_id, full_name, position] of valid rows, number of rejected rows)
+    """
+    out = pd.DataFrame(index=df.index)
+    for target, aliases in COLUMN_ALIASES.items():
+        present = [c for c in aliases if c in df.columns]
+        # Several alias columns: first non-empty value wins, like row.get(a) or row.get(b)
+        col = pd.Series(pd.NA, index=df.index, dtype='string')
+        for name in present:
+            col = col.fillna(_as_text(df[name]))
+        out[target] = col
+
+    if default_position is not None:
+        out['position'] = out['position'].fillna(default_position)
+
+    valid = out['emp_id'].notna() & out['full_name'].notna()
+    out = out[valid].drop_duplicates('emp_id', keep='last')
+    return out, int((~valid).sum())
+
+def read_employee_chunks(source, filename=None, chunksize=5000):
+    """
+    Streams an HR sheet as DataFrame chunks.
+    CSV is read with pandas' chunked reader; XLSX rows are streamed with openpyxl in read-only mode.
+    Args:
+        source: Path or binary file object (e.g. a Werkzeug upload stream).
+        filename: Used to detect the format when `source` is a file object.
+    """
+    name = (filename or (source if isinstance(source, str) else '')).lower()
+    if name.endswith('.csv'):
+        yield from pd.read_csv(source, chunksize=chunksize, dtype=str, keep_default_na=False)
+        return
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else f"col_{i}" for i, h in enumerate(next(rows, ()))]
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunksize:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
@@ -0,0 +1,115 @@
+import json
+import time
+import logging
+import threading
+from collections import deque
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class EventBus:
+    """
+    In-process publish/subscribe bus for newly logged actions.
+    Events carry the `actions.id` of their row as a monotonically increasing cursor,
+    so SSE clients can resume with Last-Event-ID. A bounded history lets short
+    reconnects resume from memory; older cursors fall back to the database.
+    """
+
+    def __init__(self, history=1000):
+        self._cond = threading.Condition()
+        self._events = deque(maxlen=history)
+        # Writers hold this across the DB insert and publish(), so events reach the bus in id order
+        # even with one engine per camera (covers() and wait() rely on it)
+        self.order_lock = threading.Lock()
+
+    def publish(self, event):
+        """Append an event (dict with at least `id` and `session_id`) and wake all subscribers."""
+        with self._cond:
+            self._events.append(event)
+            self._cond.notify_all()
+
+    @property
+    def last_id(self):
+        """Cursor of the newest buffered event (0 if none)."""
+        with self._cond:
+            return self._events[-1]["id"] if self._events else 0
+
+    def covers(self, after_id):
+        """True if every event newer than `after_id` is still in the buffer."""
+        with self._cond:
+            return bool(self._events) and self._events[0]["id"] <= after_id + 1
+
+    def wait(self, after_id, session_id=None, timeout=15.0):
+        """
+        Blocks until events newer than `after_id` exist (optionally for one session) or `timeout` elapses.
+        Returns:
+            list: Matching events in cursor order (empty on timeout).
+        """
+        def pending():
+            return [e for e in self._events
+                    if e["id"] > after_id and (session_id is None or e["session_id"] == session_id)]
+
+        with self._cond:
+            events = pending()
+            if not events:
+                self._cond.wait(timeout)
+                events = pending()
+            return events
+
+action_bus = EventBus()
+
+def format_sse(event, kind='action'):
+    """One SSE frame; the action id doubles as the Last-Event-ID cursor."""
+    return f"id: {event['id']}\nevent: {kind}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+def _replay(session_id, after_id):
+    """
+    Catches a reconnecting client up from the database, page by page.
+    A client more than SSE_MAX_REPLAY actions behind gets a single "resync" event instead
+    (its cursor jumps to the newest action and the page reloads the log through /api/actions).
+    Yields:
+        tuple: (frame, new cursor)
+    """
+    from src.database import get_actions_after, get_last_action_id
+    sent = 0
+    while True:
+        rows = get_actions_after(after_id, session_id=session_id, limit=Config.SSE_REPLAY_PAGE)
+        if sent + len(rows) > Config.SSE_MAX_REPLAY:
+            last_id = max(get_last_action_id(session_id), action_bus.last_id, after_id)
+            yield format_sse({"id": last_id, "session_id": session_id, "skipped": True}, kind='resync'), last_id
+            return
+        for row in rows:
+            event = dict(row)
+            after_id = event["id"]
+            yield format_sse(event), after_id
+        sent += len(rows)
+        # Trang cuối, hoặc phần còn lại đã có trong bộ nhớ của bus
+        if len(rows) < Config.SSE_REPLAY_PAGE or action_bus.covers(after_id):
+            return
+
+def action_stream(session_id=None, after_id=None, max_duration=None):
+    """
+    Yields SSE frames for actions newer than `after_id`, straight from the in-process bus.
+    The DB is only read when a reconnecting client's cursor is older than the bus history.
+    The stream ends after `max_duration` seconds (SSE_MAX_DURATION); EventSource reconnects by itself.
+    """
+    yield f"retry: {Config.SSE_RETRY_MS}\n\n"
+    if after_id is None:
+        after_id = action_bus.last_id
+    elif not action_bus.covers(after_id):
+        for frame, after_id in _replay(session_id, after_id):
+            yield frame
+
+    deadline = time.monotonic() + (Config.SSE_MAX_DURATION if max_duration is None else max_duration)
+    last_write = time.monotonic()
+    while time.monotonic() < deadline:
+        events = action_bus.wait(after_id, session_id=session_id, timeout=Config.SSE_HEARTBEAT)
+        for event in events:
+            after_id = event["id"]
+            yield format_sse(event)
+        if events:
+            last_write = time.monotonic()
+        elif time.monotonic() - last_write >= Config.SSE_HEARTBEAT:
+            # Comment frame keeps proxies from closing an idle connection
+            yield ": ping\n\n"
+            last_write = time.monotonic()
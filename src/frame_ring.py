@@ -0,0 +1,217 @@
+import queue
+import logging
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import cv2
+import numpy as np
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_EOF = None
+_POLL = 0.2  # Seconds between stop-flag checks while blocked on a queue
+
+class FrameRing:
+    """
+    Fixed pool of preallocated frame slots in one shared-memory block.
+    Processes exchange only slot indices through queues, never pixel data:
+    whoever holds an index owns that slot until it hands it on.
+    """
+
+    def __init__(self, shape, n_slots, name=None):
+        self.shape = tuple(shape)
+        self.n_slots = n_slots
+        slot_bytes = int(np.prod(self.shape))
+        self._owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self._owner, size=slot_bytes * n_slots)
+        self._array = np.ndarray((n_slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def slot(self, idx):
+        """Writable view of one slot (no copy)."""
+        return self._array[idx]
+
+    def close(self):
+        self._array = None
+        try:
+            if self._owner:
+                self.shm.unlink()
+            self.shm.close()
+        except (BufferError, FileNotFoundError) as e:
+            # A caller still holds a slot view; the mapping is freed once it is garbage-collected
+            logger.debug(f"Frame ring cleanup: {e}")
+
+def _get(q, stop):
+    """queue.get that gives up when `stop` is set."""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=_POLL)
+        except queue.Empty:
+            continue
+    return _EOF
+
+def _capture_worker(source, ring_name, shape, n_slots, free_q, filled_q, stop):
+    """Decode process: fills free slots in place and hands them to the inference side."""
+    ring = FrameRing(shape, n_slots, name=ring_name)
+    cap = cv2.VideoCapture(source)
+    frame_idx = 0
+    try:
+        while cap.isOpened() and not stop.is_set():
+            slot = _get(free_q, stop)
+            if slot is _EOF:
+                break
+            view = ring.slot(slot)
+            ret, frame = cap.read(view)
+            if not ret:
+                free_q.put(slot)
+                break
+            if frame is not view:
+                np.copyto(view, frame)  # Backend ignored the output buffer
+            frame_idx += 1
+            filled_q.put((slot, frame_idx))
+    finally:
+        cap.release()
+        filled_q.put(_EOF)
+        ring.close()
+
+def _writer_worker(out_path, fourcc, fps, size, ring_name, shape, n_slots, done_q, free_q, stop):
+    """Encode process: writes annotated slots to disk and recycles them."""
+    ring = FrameRing(shape, n_slots, name=ring_name)
+    out = cv2.VideoWriter(out_path, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+    try:
+        while True:
+            slot = _get(done_q, stop)
+            if slot is _EOF:
+                break
+            out.write(ring.slot(slot))
+            free_q.put(slot)
+    finally:
+        out.release()
+        ring.close()
+
+class FrameSource:
+    """
+    Iterates decoded frames of a video through a shared-memory ring, as (slot, frame) pairs.
+    Decoding (and, with `writer`, encoding) run in separate processes; the caller
+    annotates each yielded slot in place, then calls `release` (frame consumed here)
+    or `forward` (frame goes to the writer process). With `Config.USE_FRAME_RING`
+    off, the same interface is served by a plain in-process cv2.VideoCapture.
+
+    Usage:
+        with FrameSource(path, writer=(out_path, 'mp4v', None)) as frames:  # fps None = source fps
+            for slot, frame in frames:
+                ...
+                frames.forward(slot)
+    """
+
+    def __init__(self, source, writer=None, n_slots=None, use_processes=None):
+        self.source = source
+        self.n_slots = n_slots or Config.FRAME_RING_SLOTS
+        self.use_processes = Config.USE_FRAME_RING if use_processes is None else use_processes
+
+        cap = cv2.VideoCapture(source)
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        self.width, self.height = int(cap.get(3)), int(cap.get(4))
+        cap.release()
+        self.shape = (self.height, self.width, 3)
+        if writer is not None:
+            out_path, fourcc, fps = writer
+            writer = (out_path, fourcc, fps or self.fps)
+        self.writer = writer
+
+        self.ring = None
+        self._procs = []
+        self._cap = None
+        self._out = None
+
+    # --- LIFECYCLE ---
+
+    def __enter__(self):
+        if self.use_processes and self.width and self.height:
+            self._start_processes()
+        else:
+            self.use_processes = False
+            self._cap = cv2.VideoCapture(self.source)
+            if self.writer:
+                out_path, fourcc, fps = self.writer
+                self._out = cv2.VideoWriter(out_path, cv2.VideoWriter_fourcc(*fourcc), fps, (self.width, self.height))
+        return self
+
+    def _start_processes(self):
+        ctx = mp.get_context('spawn')  # Same behaviour on Windows and Linux
+        self.ring = FrameRing(self.shape, self.n_slots)
+        self._stop = ctx.Event()         # Stops the decoder (always set on exit)
+        self._writer_stop = ctx.Event()  # Stops the writer without draining (errors only)
+        self._free_q, self._filled_q, self._done_q = ctx.Queue(), ctx.Queue(), ctx.Queue()
+        for i in range(self.n_slots):
+            self._free_q.put(i)
+
+        ring_args = (self.ring.name, self.shape, self.n_slots)
+        self._procs.append(ctx.Process(
+            target=_capture_worker, name='frame-capture', daemon=True,
+            args=(self.source,) + ring_args + (self._free_q, self._filled_q, self._stop)))
+        if self.writer:
+            out_path, fourcc, fps = self.writer
+            self._procs.append(ctx.Process(
+                target=_writer_worker, name='frame-writer', daemon=True,
+                args=(out_path, fourcc, fps, (self.width, self.height)) + ring_args
+                     + (self._done_q, self._free_q, self._writer_stop)))
+        for p in self._procs:
+            p.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._cap is not None:
+            self._cap.release()
+        if self._out is not None:
+            self._out.release()
+        if not self.use_processes:
+            return False
+
+        # Decoder stops right away; the writer drains forwarded frames unless we are bailing out
+        self._stop.set()
+        if exc_type is not None:
+            self._writer_stop.set()
+        if self.writer:
+            self._done_q.put(_EOF)
+        for p in self._procs:
+            p.join(timeout=None if (exc_type is None and p.name == 'frame-writer') else 5)
+            if p.is_alive():
+                p.terminate()
+        self.ring.close()
+        return False
+
+    # --- ITERATION & OWNERSHIP ---
+
+    def __iter__(self):
+        if not self.use_processes:
+            frame_idx = 0
+            while self._cap.isOpened():
+                ret, frame = self._cap.read()
+                if not ret:
+                    break
+                frame_idx += 1
+                self._local_frame = frame
+                yield frame_idx, frame
+            return
+
+        while True:
+            item = _get(self._filled_q, self._stop)
+            if item is _EOF:
+                break
+            slot, _ = item
+            yield slot, self.ring.slot(slot)
+
+    def release(self, slot):
+        """Frame fully consumed by the caller: slot goes back to the decoder."""
+        if self.use_processes:
+            self._free_q.put(slot)
+
+    def forward(self, slot):
+        """Frame annotated in place: hand the slot to the writer process."""
+        if self.use_processes:
+            self._done_q.put(slot)
+        else:
+            self._out.write(self._local_frame)
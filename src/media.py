@@ -0,0 +1,191 @@
+import os
+import struct
+import shutil
+import logging
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from flask import request, Response
+from werkzeug.wsgi import wrap_file
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# --- MP4 FAST-START ---
+
+def is_faststart(path):
+    """
+    Walks the top-level MP4 atoms and reports whether `moov` precedes `mdat`.
+    Only atom headers are read, so this is cheap even on multi-GB files.
+    """
+    try:
+        with open(path, 'rb') as f:
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    return False
+                size, kind = struct.unpack('>I4s', header)
+                if kind == b'moov':
+                    return True
+                if kind == b'mdat':
+                    return False
+                if size == 1:  # 64-bit extended size
+                    size = struct.unpack('>Q', f.read(8))[0]
+                    f.seek(size - 16, os.SEEK_CUR)
+                elif size == 0:  # Atom runs to end of file
+                    return False
+                else:
+                    f.seek(size - 8, os.SEEK_CUR)
+    except (OSError, struct.error) as e:
+        logger.warning(f"Cannot inspect MP4 atoms of {path}: {e}")
+        return False
+
+def _ffmpeg_exe():
+    """FFmpeg binary bundled with MoviePy (imageio-ffmpeg), else the one on PATH."""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return shutil.which('ffmpeg') or 'ffmpeg'
+
+def work_path(path, tag):
+    """
+    Sibling path for a half-written version of `path` (e.g. '.faststart.result_S1_x.mp4').
+    The leading dot keeps it out of the catalog's listings; the extension is kept for ffmpeg.
+    """
+    folder, name = os.path.split(path)
+    return os.path.join(folder, f".{tag}.{name}")
+
+def make_faststart(path):
+    """
+    Remuxes `path` in place (stream copy, no re-encode) with the moov atom moved to the front.
+    Returns:
+        bool: True if the file is fast-start afterwards.
+    """
+    if is_faststart(path):
+        return True
+    tmp_path = work_path(path, 'faststart')
+    try:
+        subprocess.run([_ffmpeg_exe(), '-y', '-v', 'error', '-i', path,
+                        '-c', 'copy', '-movflags', '+faststart', tmp_path],
+                       check=True, capture_output=True)
+        os.replace(tmp_path, path)
+        logger.info(f"Fast-start remux done: {os.path.basename(path)}")
+        return True
+    except (OSError, subprocess.CalledProcessError) as e:
+        # Windows refuses os.replace while a viewer holds the file open; retried on a later view
+        logger.error(f"Fast-start remux failed for {path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+_faststart_checked = {}  # {path: mtime_ns} of files known to be fast-start
+_faststart_pending = set()
+_faststart_lock = threading.Lock()
+_faststart_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix='faststart')
+
+def ensure_faststart_async(path):
+    """
+    Schedules a background remux for legacy results that are not fast-start yet.
+    Files already verified (same mtime) are skipped without touching the disk again.
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return
+    with _faststart_lock:
+        if _faststart_checked.get(path) == mtime or path in _faststart_pending:
+            return
+        _faststart_pending.add(path)
+
+    def job():
+        try:
+            if make_faststart(path):
+                with _faststart_lock:
+                    _faststart_checked[path] = os.stat(path).st_mtime_ns
+        finally:
+            with _faststart_lock:
+                _faststart_pending.discard(path)
+
+    _faststart_worker.submit(job)
+
+# --- RANGE-AWARE FILE SERVING ---
+
+def send_video(path, mimetype='video/mp4', as_attachment=False):
+    """
+    Serves a video with HTTP Range, If-Range, ETag and Last-Modified support.
+    The body is returned as a wsgi.file_wrapper positioned at the range start, so
+    Waitress streams it from its I/O loop in large chunks instead of a worker thread.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "Not found", 404
+    size = st.st_size
+    etag = f"{st.st_mtime_ns:x}-{size:x}"
+
+    response = Response(mimetype=mimetype, direct_passthrough=True)
+    response.set_etag(etag)
+    response.last_modified = int(st.st_mtime)
+    response.accept_ranges = 'bytes'
+    response.cache_control.no_cache = True
+    if as_attachment:
+        response.headers.set('Content-Disposition', 'attachment', filename=os.path.basename(path))
+
+    # Conditional GET: nothing changed -> 304 without opening the file
+    if request.if_none_match:
+        if request.if_none_match.contains(etag):
+            response.status_code = 304
+            return response
+    elif request.if_modified_since and request.if_modified_since.timestamp() >= int(st.st_mtime):
+        response.status_code = 304
+        return response
+
+    start, length = 0, size
+    byte_range = request.range
+    # Multipart (multi-range) bodies are not produced: such requests get the whole file (200), which
+    # RFC 9110 allows. Only a single range that cannot be satisfied is a 416.
+    if byte_range is not None and len(byte_range.ranges) == 1 and _if_range_matches(etag, st.st_mtime):
+        span = byte_range.range_for_length(size)
+        if span is None:
+            response.status_code = 416
+            response.headers['Content-Range'] = f"bytes */{size}"
+            return response
+        start, stop = span
+        length = stop - start
+        response.status_code = 206
+        response.content_range = f"bytes {start}-{stop - 1}/{size}"
+
+    response.content_length = length
+    if request.method == 'HEAD':
+        return response
+
+    f = open(path, 'rb')
+    f.seek(start)
+    if 'wsgi.file_wrapper' in request.environ:
+        # Waitress limits the wrapper to Content-Length bytes from the current offset
+        response.response = wrap_file(request.environ, f, buffer_size=Config.VIDEO_CHUNK_SIZE)
+    else:
+        response.response = _iter_range(f, length)
+    return response
+
+def _iter_range(f, length):
+    """Fallback body for servers without wsgi.file_wrapper (e.g. the Flask dev server)."""
+    try:
+        while length > 0:
+            chunk = f.read(min(Config.VIDEO_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+def _if_range_matches(etag, mtime):
+    """If-Range: honour the Range header only if the validator still matches."""
+    if_range = request.if_range
+    if if_range.etag is not None:
+        return if_range.etag == etag
+    if if_range.date is not None:
+        return if_range.date.timestamp() >= int(mtime)
+    return True
@@ -0,0 +1,141 @@
+import numpy as np
+from config import Config
+
+def filter_person_boxes(boxes, max_area=None, max_aspect=None):
+    """
+    Anti-merge filter and seat anchor computation, vectorized over all boxes of a frame.
+    Args:
+        boxes (np.ndarray): (N, 4) xyxy boxes.
+    Returns:
+        tuple: (int32 boxes (N, 4), bool keep mask (N,), int32 anchor points (N, 2))
+    """
+    max_area = Config.MAX_NORMAL_AREA if max_area is None else max_area
+    max_aspect = Config.MAX_ASPECT_RATIO if max_aspect is None else max_aspect
+
+    b = np.asarray(boxes).reshape(-1, 4).astype(np.int32)
+    w = b[:, 2] - b[:, 0]
+    h = b[:, 3] - b[:, 1]
+
+    # Ở góc cam này, một người bình thường thường < 20,000 px; 2 người gộp lại ~30,000 - 45,000 px.
+    # Box nằm ngang (w/h > 1.2) cũng thường là box gộp.
+    keep = (h > 0) & (w * h <= max_area) & (w <= max_aspect * h)
+
+    # Anchor ở 25% chiều cao box để tránh bị bàn che
+    anchors = np.empty((len(b), 2), dtype=np.int32)
+    anchors[:, 0] = (b[:, 0] + b[:, 2]) // 2
+    anchors[:, 1] = b[:, 1] + (h * Config.ANCHOR_RATIO).astype(np.int32)
+    return b, keep, anchors
+
+# Times are floats (frame_count * frame_dur); compare with a microsecond of slack so
+# "frame 1 to frame 91 at 30 fps" still counts as exactly 3 s
+_EPS = 1e-6
+
+def session_clock(seconds):
+    """Session time as 'HH:MM:SS'; hours keep counting past 24 so the offset stays exact on long live sessions."""
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+class OccupancyTracker:
+    """
+    Per-zone "Làm việc" / "Rời bàn" state machine held in flat NumPy arrays.
+    Shared by the live engine and the detection replayer so both apply identical rules.
+    """
+
+    def __init__(self, n_zones=0, min_work_duration=None, patience_limit=None):
+        self.min_work_duration = Config.MIN_WORK_DURATION if min_work_duration is None else min_work_duration
+        self.patience_limit = Config.PATIENCE_LIMIT if patience_limit is None else patience_limit
+        self.reset(n_zones)
+
+    def reset(self, n_zones):
+        """Allocate fresh state arrays (one slot per zone index). Times are session seconds."""
+        self.active = np.zeros(n_zones, dtype=bool)      # Zone currently tracked
+        self.start = np.zeros(n_zones)                   # When the stay began
+        self.last_seen = np.zeros(n_zones)               # Last time the zone was occupied (patience reference)
+        self.logged = np.zeros(n_zones, dtype=bool)      # "Làm việc" already emitted
+        self.owner = np.arange(n_zones, dtype=np.int64)  # Zone index whose NV code the current stay is logged under
+
+    def remap(self, old_geometry, new_geometry, now):
+        """
+        Carry state over a zones hot reload, keyed by zone name (vertices may be edited).
+        A kept stay stays logged under the NV code it started with, even if its zone moved to another index.
+        Removed zones in a logged stay are closed with "Rời bàn" at session time `now`.
+        Returns:
+            tuple: (number of zones whose state was kept, list of (emp_code, action) to log)
+        """
+        old_index = {name: i for i, name in enumerate(old_geometry.names)}
+        mapping = np.array([old_index.get(name, -1) for name in new_geometry.names], dtype=np.int64)
+        kept = mapping >= 0
+
+        removed = np.ones(len(self.active), dtype=bool)
+        removed[mapping[kept]] = False
+        events = self._leave_events(np.flatnonzero(removed & self.active & self.logged), now)
+
+        prev = (self.active, self.start, self.last_seen, self.logged, self.owner)
+        self.reset(len(new_geometry))
+        for new_arr, old_arr in zip((self.active, self.start, self.last_seen, self.logged, self.owner), prev):
+            new_arr[kept] = old_arr[mapping[kept]]
+        return int(kept.sum()), events
+
+    def _leave_events(self, zones, now, label="Rời bàn"):
+        """'<label> (tại HH:MM:SS - Tổng: Ns)' for each zone index in `zones`, under the stay's owner code."""
+        if not len(zones):
+            return []
+        time_str = session_clock(now)
+        durations = now - self.start + _EPS
+        return [(f"NV-{self.owner[idx] + 1}", f"{label} (tại {time_str} - Tổng: {int(durations[idx])}s)")
+                for idx in zones]
+
+    def update(self, occupied, frame_count, frame_dur, now=None):
+        """
+        Advance the state machine by one frame.
+        All transitions are boolean array ops; strings are only built for zones that emit an event.
+        Args:
+            occupied (np.ndarray): Boolean mask, True where a person sits in the zone this frame.
+            frame_count (int): Current frame number.
+            frame_dur (float): Nominal duration of one frame in seconds (PATIENCE_LIMIT is counted in frames of it).
+            now (float): Session time of the frame in seconds; defaults to frame_count * frame_dur (video files).
+                Live sources pass wall-clock time, since frames are dropped whenever inference falls behind.
+        Returns:
+            list: (emp_code, action) tuples to log, usually empty.
+        """
+        now = frame_count * frame_dur if now is None else now
+
+        # 1. Zones vừa có người: bắt đầu đếm, reset patience cho mọi zone đang có người
+        arrived = occupied & ~self.active
+        self.start[arrived] = now
+        self.owner[arrived] = np.flatnonzero(arrived)
+        self.active |= arrived
+        self.last_seen[occupied] = now
+
+        # 2. Xác nhận "Làm việc" khi ngồi đủ MIN_WORK_DURATION
+        working = occupied & ~self.logged & (now - self.start + _EPS >= self.min_work_duration)
+
+        # 3. Zones trống quá PATIENCE_LIMIT frame (tính theo thời gian) thì xác nhận "Rời bàn"
+        #    +0.5 frame: với video file đúng bằng "trống PATIENCE_LIMIT + 1 frame liên tiếp"
+        idle = self.active & ~occupied
+        left = idle & (now - self.last_seen > (self.patience_limit + 0.5) * frame_dur)
+        left_logged = left & self.logged
+
+        events = []
+        if working.any():
+            # Định dạng thời gian 00:00:00
+            time_str = session_clock(now)
+            for idx in np.flatnonzero(working):
+                events.append((f"NV-{self.owner[idx] + 1}", f"Làm việc (tại {time_str})"))
+        events.extend(self._leave_events(np.flatnonzero(left_logged), now))
+
+        self.logged |= working
+        self.active[left] = False
+        self.logged[left] = False
+        return events
+
+    def close(self, now):
+        """
+        Ends the session at session time `now`: zones still in a logged stay emit "Kết thúc phiên"
+        with their seated time, so daily summaries do not lose the last stay of a video. Resets all state.
+        Returns:
+            list: (emp_code, action) tuples to log.
+        """
+        events = self._leave_events(np.flatnonzero(self.active & self.logged), now, label="Kết thúc phiên")
+        self.reset(len(self.active))
+        return events
@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import struct
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+def probe_video(path):
+    """Reads fps / frame count / resolution / duration from the container header."""
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            return {}
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        return {
+            "fps": round(fps, 3),
+            "frame_count": frames,
+            "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "duration": round(frames / fps, 2) if fps > 0 else None,
+        }
+    finally:
+        cap.release()
+
+class MetadataCache:
+    """
+    Probe-once store of video metadata, persisted to a JSON file.
+    Entries are keyed by file name relative to DATA_DIR and validated against size/mtime,
+    so a replaced file is probed again.
+    """
+
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path or Config.METADATA_CACHE_PATH
+        self._lock = threading.Lock()
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix='probe')
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                self._data = json.load(f)
+        except (OSError, ValueError):
+            self._data = {}
+
+    @staticmethod
+    def _key(path):
+        return os.path.relpath(os.path.abspath(path), Config.DATA_DIR).replace(os.sep, '/')
+
+    def _save(self):
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def get(self, path, probe=True):
+        """
+        Cached metadata of `path`; probes (and persists) on a miss unless `probe` is False.
+        Returns:
+            dict: fps, frame_count, width, height, duration (empty if unreadable).
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return {}
+        key, stamp = self._key(path), [st.st_size, st.st_mtime_ns]
+        with self._lock:
+            cached = self._data.get(key)
+        if cached and cached.get("stamp") == stamp:
+            return cached["meta"]
+        if not probe:
+            return None
+
+        meta = probe_video(path)
+        with self._lock:
+            self._data[key] = {"stamp": stamp, "meta": meta}
+            try:
+                self._save()
+            except OSError as e:
+                logger.warning(f"Metadata cache not saved: {e}")
+        return meta
+
+    def probe_async(self, path, on_done=None):
+        """Probes `path` on a background thread (after an upload completes)."""
+        def job():
+            meta = self.get(path)
+            logger.info(f"Probed {os.path.basename(path)}: {meta}")
+            if on_done:
+                on_done(meta)
+        self._worker.submit(job)
+
+metadata_cache = MetadataCache()
+
+def frame_duration(path, default=1.0 / 30.0):
+    """Seconds per frame of a video file, from cached metadata."""
+    meta = metadata_cache.get(path) if os.path.isfile(path) else None
+    fps = (meta or {}).get("fps") or 0
+    return 1.0 / fps if fps > 0 else default
+
+# MP4/MOV timestamps count seconds from 1904-01-01 UTC
+_MP4_EPOCH_OFFSET = 2082844800
+
+def _mp4_boxes(f, end):
+    """Yields (type, payload offset, payload end) of the boxes between the current position and `end`."""
+    while f.tell() + 8 <= end:
+        start = f.tell()
+        size, kind = struct.unpack('>I4s', f.read(8))
+        header = 8
+        if size == 1:
+            size, header = struct.unpack('>Q', f.read(8))[0], 16
+        elif size == 0:
+            size = end - start
+        if size < header:
+            return
+        yield kind, start + header, start + size
+        f.seek(start + size)
+
+def recording_start(path):
+    """
+    Recording start of a video file (epoch seconds) from the MP4/MOV 'mvhd' creation time.
+    Returns None when the container has none, or an implausible one (many encoders write 0).
+    """
+    try:
+        with open(path, 'rb') as f:
+            file_end = os.fstat(f.fileno()).st_size
+            for kind, body, end in _mp4_boxes(f, file_end):
+                if kind != b'moov':
+                    continue
+                f.seek(body)
+                for child, child_body, _ in _mp4_boxes(f, end):
+                    if child != b'mvhd':
+                        continue
+                    f.seek(child_body)
+                    version = f.read(1)[0]
+                    f.seek(3, os.SEEK_CUR)
+                    created = struct.unpack('>Q' if version == 1 else '>I', f.read(8 if version == 1 else 4))[0]
+                    epoch = created - _MP4_EPOCH_OFFSET
+                    # Older than 2000-01-01 or in the future: camera clock never set
+                    return float(epoch) if 946684800 <= epoch <= time.time() + 86400 else None
+                return None
+    except (OSError, struct.error, IndexError):
+        pass
+    return None
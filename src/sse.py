@@ -0,0 +1,101 @@
+import re
+import logging
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from config import Config
+from src.events import action_stream
+
+logger = logging.getLogger(__name__)
+
+# /events                 -> actions of every session
+# /sessions/<id>/events   -> actions of one session
+EVENTS_PATH = re.compile(r'^/(?:sessions/(\d+)/)?events$')
+
+class _EventsHandler(BaseHTTPRequestHandler):
+    """One thread per connected dashboard; only writes the SSE stream, never touches Waitress."""
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        match = EVENTS_PATH.match(url.path)
+        if not match:
+            self.send_error(404)
+            return
+        if not self.server.owner.acquire():
+            # Quá số kết nối: 503 làm EventSource dừng hẳn, trang chuyển sang polling /api/actions
+            self.send_error(503, "Too many event streams")
+            return
+        try:
+            session_id = int(match.group(1)) if match.group(1) else None
+            cursor = self.headers.get('Last-Event-ID') or parse_qs(url.query).get('last_event_id', [None])[0]
+            after_id = int(cursor) if cursor and cursor.isdigit() else None
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Access-Control-Allow-Origin', '*')  # Dashboard được phục vụ từ cổng Waitress
+            self.end_headers()
+
+            stream = action_stream(session_id, after_id)
+            try:
+                for frame in stream:
+                    self.wfile.write(frame.encode('utf-8'))
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # Trình duyệt đã đóng tab
+            finally:
+                stream.close()
+        finally:
+            self.server.owner.release()
+
+    def log_message(self, format, *args):
+        logger.debug("SSE %s - %s", self.address_string(), format % args)
+
+class SSEServer:
+    """
+    Serves the live action feed on its own port, outside the Waitress worker pool.
+    Each open dashboard costs one lightweight daemon thread here instead of one of the
+    SERVER_THREADS request threads, so long-lived streams can never starve page and API requests.
+    """
+
+    def __init__(self, max_clients=None):
+        self.max_clients = max_clients or Config.SSE_MAX_CLIENTS
+        self.port = None
+        self._clients = 0
+        self._lock = threading.Lock()
+        self._httpd = None
+
+    @property
+    def clients(self):
+        with self._lock:
+            return self._clients
+
+    def acquire(self):
+        """Reserves a client slot; False when SSE_MAX_CLIENTS streams are already open."""
+        with self._lock:
+            if self._clients >= self.max_clients:
+                return False
+            self._clients += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self._clients -= 1
+
+    def start(self, host='0.0.0.0', port=None):
+        """Binds (port 0 = any free port) and serves on a daemon thread. Returns the bound port."""
+        self._httpd = ThreadingHTTPServer((host, Config.SSE_PORT if port is None else port), _EventsHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.owner = self
+        self.port = self._httpd.server_address[1]
+        threading.Thread(target=self._httpd.serve_forever, name='sse-server', daemon=True).start()
+        logger.info(f"SSE server listening on port {self.port} (max {self.max_clients} streams)")
+        return self.port
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd, self.port = None, None
+
+sse_server = SSEServer()
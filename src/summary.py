@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+# Columns of the daily_summary table (one row per employee per day)
+SUMMARY_COLUMNS = ['day', 'employee_id', 'first_seen', 'last_seen', 'seated_seconds', 'departures']
+
+# "Rời bàn (tại 00:01:10 - Tổng: 42s)" / "Kết thúc phiên (tại ... - Tổng: 42s)" carry the length of a stay
+SEATED_PATTERN = r'Tổng: (\d+)s'
+DEPARTURE_PREFIX = 'Rời bàn'
+# "(tại HH:MM:SS" = session time of the event (hours not wrapped at 24, see src/occupancy.session_clock)
+OFFSET_PATTERN = r'tại (\d+):(\d{2}):(\d{2})'
+
+def event_times(df):
+    """
+    When each action happened in footage time: the session's recording start (`anchor` column)
+    plus the "tại" offset of the action. Rows without either keep `timestamp` (DB insert time).
+    Returns:
+        pandas.Series: 'YYYY-MM-DD HH:MM:SS' strings.
+    """
+    timestamp = df['timestamp'].astype(str)
+    if 'anchor' not in df:
+        return timestamp
+    parts = df['action'].str.extract(OFFSET_PATTERN).astype(float)
+    offset = parts[0] * 3600 + parts[1] * 60 + parts[2]
+    anchor = pd.to_datetime(df['anchor'], format='%Y-%m-%d %H:%M:%S', errors='coerce')
+    footage = (anchor + pd.to_timedelta(offset, unit='s')).dt.strftime('%Y-%m-%d %H:%M:%S')
+    return footage.where(footage.notna(), timestamp)
+
+def summarize_actions(df):
+    """
+    Folds raw action rows into per-employee, per-day aggregates.
+    A stay ending at T with "Tổng: Ns" covers [T - N, T]; when that interval crosses midnight it is
+    split at every day boundary, so each day gets its own seated seconds and first/last seen.
+    The departure itself is counted on the day it happened.
+    Days and times are footage time (see event_times) when the rows carry their session's `anchor`.
+    Args:
+        df (pandas.DataFrame): Columns employee_id, action, timestamp ('YYYY-MM-DD HH:MM:SS'),
+            optionally anchor (recording start of the session, same format).
+    Returns:
+        pandas.DataFrame: Columns SUMMARY_COLUMNS, additive over disjoint sets of actions.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+    timestamp = event_times(df)
+    seated = df['action'].str.extract(SEATED_PATTERN, expand=False).astype(float).fillna(0)
+    end = pd.to_datetime(timestamp, format='%Y-%m-%d %H:%M:%S', errors='coerce')
+    start = end - pd.to_timedelta(seated, unit='s')
+    # Extra days a stay reaches back into (0 for stays inside one day and for unparsable timestamps)
+    spans = (end.dt.normalize() - start.dt.normalize()).dt.days.fillna(0).astype(int).to_numpy()
+
+    # One row per (action, day piece); piece k = 0 is the earliest day of the stay
+    rows = np.repeat(np.arange(len(df)), spans + 1)
+    k = np.arange(len(rows)) - np.repeat(np.cumsum(spans + 1) - (spans + 1), spans + 1)
+    last = k == spans[rows]
+    split = spans[rows] > 0
+    day_start = start.to_numpy()[rows].astype('datetime64[D]') + k.astype('timedelta64[D]')
+    piece_start = np.maximum(start.to_numpy()[rows], day_start)
+    piece_end = np.minimum(end.to_numpy()[rows], day_start + np.timedelta64(1, 'D'))
+    stamp = timestamp.to_numpy()[rows]
+    fmt = lambda values: pd.Series(values).dt.strftime('%Y-%m-%d %H:%M:%S').to_numpy()
+
+    frame = pd.DataFrame({
+        'day': np.where(split, fmt(day_start), stamp).astype(str),
+        'employee_id': df['employee_id'].to_numpy()[rows],
+        'first_seen': np.where(split, fmt(piece_start), stamp),
+        # Earlier pieces end at midnight: the employee was still seated at the day's last second
+        'last_seen': np.where(last, stamp, fmt(day_start + np.timedelta64(86399, 's'))),
+        'seated': np.where(split, (piece_end - piece_start) / np.timedelta64(1, 's'), seated.to_numpy()[rows]),
+        'departure': df['action'].str.startswith(DEPARTURE_PREFIX).to_numpy()[rows] & last,
+    })
+    frame['day'] = frame['day'].str[:10]
+    out = frame.groupby(['day', 'employee_id'], as_index=False).agg(
+        first_seen=('first_seen', 'min'),
+        last_seen=('last_seen', 'max'),
+        seated_seconds=('seated', 'sum'),
+        departures=('departure', 'sum'),
+    )
+    out['seated_seconds'] = out['seated_seconds'].round().astype(int)
+    out['departures'] = out['departures'].astype(int)
+    return out[SUMMARY_COLUMNS]
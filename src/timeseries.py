@@ -0,0 +1,323 @@
+import os
+import json
+import glob
+import time
+import shutil
+import logging
+import threading
+import numpy as np
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# One directory per session under Config.OCCUPANCY_DIR/S<id>/
+#   bits_<t0>_<n>.npy (Z, ceil(n/8)) uint8  per-second occupancy of session seconds [t0, t0 + n), packed along time
+#   hourly.npy   (Z, H) uint16  occupied seconds per zone per absolute hour (rollup for fast queries)
+#   observed.npy (Z, H) uint16  seconds each zone existed and had footage, per absolute hour (denominator)
+#   meta.json    session_id, video, source, start_epoch, utc_offset, n_seconds, first_hour, zones, complete
+# The recorder writes each completed hour as it goes (memory stays bounded on live cameras, a crash loses
+# at most the current hour): a new bits chunk, then hourly/observed, then meta.json (each via os.replace),
+# then it touches the store root so readers reindex. Readers only look at sessions that have a meta.json.
+# All arrays are loaded with mmap_mode='r', so queries only touch the pages they need.
+# Zones are identified by (source, zone name): "Ban_1" of office_A and of office_B are different desks.
+
+class OccupancyRecorder:
+    """
+    Folds per-frame zone masks into a per-second bitmap during a session.
+    A zone counts as occupied in a second if it was occupied in at least half of that second's frames.
+    Zones are tracked by name, so a hot reload that adds/removes zones keeps earlier columns valid.
+    Once attached to a session directory, every completed hour is written out and dropped from memory.
+    """
+
+    def __init__(self, zone_names, start_epoch=None):
+        self.start_epoch = time.time() if start_epoch is None else start_epoch
+        self.names = []
+        self.out_dir, self.meta = None, {}
+        self._rows = []          # One int array of occupied global columns per pending second
+        self._present = []       # Columns that existed (and had frames) in that second
+        self._t0 = 0             # Session second of self._rows[0]
+        self._second = 0
+        # Per global column, for the current second: frames occupied / frames the zone existed in
+        self._counts = np.zeros(0, dtype=np.int32)
+        self._frames = np.zeros(0, dtype=np.int32)
+        # Rollups of everything written so far (rows grow with zones, columns with hours)
+        self._first_hour = int(self.start_epoch) // 3600
+        self._hourly = np.zeros((0, 0), dtype=np.uint16)
+        self._observed = np.zeros((0, 0), dtype=np.uint16)
+        self.set_zones(zone_names)
+
+    def set_zones(self, zone_names):
+        """Maps current zone indices to global columns (adds unseen names, keeps the current second's counts)."""
+        index = {n: i for i, n in enumerate(self.names)}
+        for name in zone_names:
+            if name not in index:
+                index[name] = len(self.names)
+                self.names.append(name)
+        self._cols = np.array([index[n] for n in zone_names], dtype=np.int32)
+        grow = len(self.names) - len(self._counts)
+        self._counts = np.concatenate([self._counts, np.zeros(grow, dtype=np.int32)])
+        self._frames = np.concatenate([self._frames, np.zeros(grow, dtype=np.int32)])
+
+    def attach(self, out_dir, **meta):
+        """Starts writing completed hours to `out_dir` (meta: session_id, video, source...)."""
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.makedirs(out_dir)
+        self.out_dir, self.meta = out_dir, meta
+        return self
+
+    def _hour(self, second):
+        return (int(self.start_epoch) + second) // 3600
+
+    def add(self, occupied, t):
+        """Adds one frame's zone mask at session time `t` (seconds)."""
+        second = int(t)
+        if second != self._second:
+            self._flush()
+            # Seconds without any frame (live camera stalled / reconnecting) are recorded as empty
+            # and not observed, so they do not dilute utilization
+            gap = max(second - self._t0 - len(self._rows), 0)
+            self._rows.extend([np.zeros(0, np.int32)] * gap)
+            self._present.extend([np.zeros(0, np.int32)] * gap)
+            if self.out_dir and self._rows and self._hour(second) != self._hour(self._t0):
+                try:
+                    self._write()
+                except OSError as e:
+                    logger.error(f"Writing occupancy hour failed ({self.out_dir}): {e}")
+            self._second = second
+        self._counts[self._cols] += occupied
+        self._frames[self._cols] += 1
+
+    def _flush(self):
+        present = np.flatnonzero(self._frames).astype(np.int32)
+        if len(present):
+            self._rows.append(present[self._counts[present] * 2 >= self._frames[present]])
+            self._present.append(present)
+        self._counts[:] = 0
+        self._frames[:] = 0
+
+    def _write(self, complete=False):
+        """Writes the pending seconds as one bits chunk, updates the rollups and meta.json, clears memory."""
+        n_sec, n_zones = len(self._rows), len(self.names)
+        if n_sec and n_zones:
+            bits = np.zeros((n_zones, n_sec), dtype=bool)
+            present = np.zeros((n_zones, n_sec), dtype=bool)
+            for t, (cols, live_cols) in enumerate(zip(self._rows, self._present)):
+                bits[cols, t] = True
+                present[live_cols, t] = True
+
+            # Rollup to absolute hours (epoch hour index) for millisecond-range aggregate queries
+            rel = self._hour(self._t0 + np.arange(n_sec)) - self._first_hour
+            n_hours = max(int(rel[-1]) + 1, self._hourly.shape[1])
+            hourly, observed = _grow(self._hourly, n_zones, n_hours), _grow(self._observed, n_zones, n_hours)
+            cells = np.arange(n_zones)[:, None] * n_hours + rel[None, :]
+            for total, mask in ((hourly, bits), (observed, present)):
+                total += np.bincount(cells[mask], minlength=n_zones * n_hours).reshape(n_zones, n_hours).astype(np.uint16)
+
+            # Rollups only move forward once the chunk is on disk, so a failed write is retried next hour
+            _save_npy(os.path.join(self.out_dir, f"bits_{self._t0}_{n_sec}.npy"), np.packbits(bits, axis=1))
+            self._hourly, self._observed = hourly, observed
+        self._t0 += n_sec
+        self._rows, self._present = [], []
+        if not self._t0 or not n_zones:
+            return
+
+        _save_npy(os.path.join(self.out_dir, 'hourly.npy'), self._hourly)
+        _save_npy(os.path.join(self.out_dir, 'observed.npy'), self._observed)
+        meta = dict(self.meta, start_epoch=self.start_epoch,
+                    utc_offset=time.localtime(self.start_epoch).tm_gmtoff, n_seconds=self._t0,
+                    first_hour=self._first_hour, zones=self.names, complete=complete)
+        tmp_path = os.path.join(self.out_dir, 'meta.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, os.path.join(self.out_dir, 'meta.json'))
+        # Bump the store root's mtime: OccupancyStore reindexes (and changes its ETag) on it
+        os.utime(os.path.dirname(self.out_dir))
+
+    def save(self, out_dir=None, **meta):
+        """Writes the remaining seconds and marks the session complete (attaches to `out_dir` first if given)."""
+        if out_dir is not None:
+            self.attach(out_dir, **meta)
+        elif meta:
+            self.meta.update(meta)
+        if self.out_dir is None:
+            return
+        self._flush()
+        self._write(complete=True)
+        logger.info(f"Occupancy saved: {self.out_dir} ({len(self.names)} zones x {self._t0} s)")
+
+class OccupancyStore:
+    """Read side: utilization, hourly profiles, peak hours and heatmaps across sessions."""
+
+    def __init__(self, root=None):
+        self.root = root or Config.OCCUPANCY_DIR
+        self._lock = threading.Lock()
+        self._index = []
+        self._index_mtime = None
+
+    def etag(self):
+        """Changes whenever a session writes to the store (for HTTP caching of query results)."""
+        try:
+            return str(os.stat(self.root).st_mtime_ns)
+        except OSError:
+            return "0"
+
+    def session_dir(self, session_id):
+        return os.path.join(self.root, f"S{session_id}")
+
+    def _sessions(self):
+        """
+        Cached list of session metas, rescanned only when the store directory changes.
+        Recorders touch the root after every meta.json they write, which is what bumps its mtime.
+        """
+        try:
+            mtime = os.stat(self.root).st_mtime_ns
+        except OSError:
+            return []
+        with self._lock:
+            if mtime != self._index_mtime:
+                index = []
+                for path in glob.glob(os.path.join(self.root, 'S*', 'meta.json')):
+                    try:
+                        with open(path, 'r', encoding='utf-8') as f:
+                            meta = json.load(f)
+                    except (OSError, ValueError) as e:
+                        logger.warning(f"Skipping occupancy session {path}: {e}")
+                        continue
+                    meta['dir'] = os.path.dirname(path)
+                    meta.setdefault('source', source_name(meta.get('video', '')))
+                    index.append(meta)
+                self._index, self._index_mtime = index, mtime
+            return self._index
+
+    def bitmap(self, session_id):
+        """(zones, seconds) boolean occupancy of one session, plus its zone names."""
+        meta = next((m for m in self._sessions() if m['session_id'] == session_id), None)
+        if meta is None:
+            return None, []
+        bits = np.zeros((len(meta['zones']), meta['n_seconds']), dtype=bool)
+        for path in glob.glob(os.path.join(meta['dir'], 'bits_*_*.npy')):
+            t0, n = (int(v) for v in os.path.basename(path)[len('bits_'):-len('.npy')].split('_'))
+            if t0 + n > meta['n_seconds']:
+                continue  # Written after the meta we indexed
+            packed = np.load(path, mmap_mode='r')
+            bits[:len(packed), t0:t0 + n] = np.unpackbits(packed, axis=1, count=n).astype(bool)[:len(bits)]
+        return bits, meta['zones']
+
+    def _accumulate(self, start=None, end=None, zones=None, sources=None, bucket_fn=None, n_buckets=1):
+        """
+        Sums occupied and observed seconds of every (source, zone) into buckets, over every session
+        overlapping [start, end). `bucket_fn(local_hours)` maps local epoch-hours to bucket ids.
+        Returns:
+            tuple: (list of (source, zone) keys, occupied (K, B) float, observed (K, B) float)
+        """
+        keys, rows, parts = [], {}, []
+        for meta in self._sessions():
+            if sources is not None and meta['source'] not in sources:
+                continue
+            zone_idx = [i for i, n in enumerate(meta['zones']) if zones is None or n in zones]
+            if not zone_idx:
+                continue
+            first = meta['first_hour']
+            hourly = np.load(os.path.join(meta['dir'], 'hourly.npy'), mmap_mode='r')
+            observed = np.load(os.path.join(meta['dir'], 'observed.npy'), mmap_mode='r')
+            n_hours = hourly.shape[1]
+            abs_hours = first + np.arange(n_hours)
+            keep = np.ones(n_hours, dtype=bool)
+            if start is not None:
+                keep &= abs_hours * 3600 >= start
+            if end is not None:
+                keep &= abs_hours * 3600 < end
+            if not keep.any():
+                continue
+
+            local_hours = (abs_hours[keep] * 3600 + meta['utc_offset']) // 3600
+            buckets = bucket_fn(local_hours) if bucket_fn else np.zeros(keep.sum(), dtype=np.int64)
+            for i in zone_idx:
+                key = (meta['source'], meta['zones'][i])
+                if key not in rows:
+                    rows[key] = len(keys)
+                    keys.append(key)
+            target = np.array([rows[(meta['source'], meta['zones'][i])] for i in zone_idx])
+            occ = np.asarray(hourly[zone_idx][:, keep], dtype=np.float64)
+            obs = np.asarray(observed[zone_idx][:, keep], dtype=np.float64)
+            parts.append((target, buckets, occ, obs))
+
+        shape = (len(keys), n_buckets)
+        occupied, observed = np.zeros(shape), np.zeros(shape)
+        for target, buckets, occ, obs in parts:
+            flat = (target[:, None] * n_buckets + buckets[None, :]).ravel()
+            occupied += np.bincount(flat, weights=occ.ravel(), minlength=shape[0] * n_buckets).reshape(shape)
+            observed += np.bincount(flat, weights=obs.ravel(), minlength=shape[0] * n_buckets).reshape(shape)
+        return keys, occupied, observed
+
+    @staticmethod
+    def _ratio(occupied, observed):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(observed > 0, occupied / np.maximum(observed, 1), np.nan)
+
+    @staticmethod
+    def _nest(keys, values):
+        """[(source, zone)], [value] -> {source: {zone: value}}"""
+        nested = {}
+        for (source, zone), value in zip(keys, values):
+            nested.setdefault(source, {})[zone] = value
+        return nested
+
+    def utilization(self, start=None, end=None, zones=None, sources=None):
+        """Fraction of each zone's observed seconds it was occupied. Returns {source: {zone: ratio}}."""
+        keys, occupied, observed = self._accumulate(start, end, zones, sources)
+        ratio = self._ratio(occupied[:, 0], observed[:, 0])
+        return self._nest(keys, [_clean(r) for r in ratio])
+
+    def hourly_profile(self, start=None, end=None, zones=None, sources=None):
+        """
+        Utilization by local hour of day.
+        Returns:
+            tuple: ({source: {zone: [24 ratios]}}, {source: {zone: [24 observed seconds]}})
+        """
+        keys, occupied, observed = self._accumulate(start, end, zones, sources, lambda h: h % 24, 24)
+        ratio = self._ratio(occupied, observed)
+        return (self._nest(keys, [[_clean(v) for v in row] for row in ratio]),
+                self._nest(keys, [[int(v) for v in row] for row in observed]))
+
+    def peak_hours(self, start=None, end=None, zones=None, sources=None, top=3):
+        """Hours of day with the highest utilization over all selected zones (occupied / observed zone-seconds)."""
+        keys, occupied, observed = self._accumulate(start, end, zones, sources, lambda h: h % 24, 24)
+        if not keys:
+            return []
+        mean = self._ratio(occupied.sum(axis=0), observed.sum(axis=0))
+        order = [int(h) for h in np.argsort(np.nan_to_num(mean, nan=-1))[::-1] if not np.isnan(mean[h])]
+        return [{"hour": h, "utilization": _clean(mean[h])} for h in order[:top]]
+
+    def heatmap(self, start=None, end=None, zones=None, sources=None):
+        """Utilization by weekday (Mon=0) x hour of day over the selected zones."""
+        # Epoch day 0 was a Thursday -> (day + 3) % 7 gives Monday = 0
+        bucket = lambda h: ((h // 24 + 3) % 7) * 24 + h % 24
+        keys, occupied, observed = self._accumulate(start, end, zones, sources, bucket, 7 * 24)
+        if not keys:
+            return [[None] * 24 for _ in range(7)]
+        mean = self._ratio(occupied.sum(axis=0), observed.sum(axis=0)).reshape(7, 24)
+        return [[_clean(v) for v in row] for row in mean]
+
+def _grow(array, rows, cols):
+    """Zero-pads a 2-D rollup to (rows, cols)."""
+    grown = np.zeros((rows, cols), dtype=array.dtype)
+    grown[:array.shape[0], :array.shape[1]] = array
+    return grown
+
+def _save_npy(path, array):
+    """np.save through a temp file, so a reader mmapping `path` never sees a partial write."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+def source_name(video):
+    """Video file or camera id -> source key (same naming as zone files and profiles)."""
+    return os.path.splitext(os.path.basename(str(video)))[0]
+
+def _clean(value):
+    """NaN -> None and rounding, for JSON."""
+    return None if value is None or np.isnan(value) else round(float(value), 4)
+
+occupancy_store = OccupancyStore()
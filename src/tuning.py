@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import shutil
+import logging
+import tempfile
+import cv2
+import yaml
+import numpy as np
+from config import Config
+from src.detections import DetectionRecorder, DetectionCache, replay
+
+logger = logging.getLogger(__name__)
+
+# Per-camera detector profile written by scripts/tune_camera.py, read by the engine on every session start:
+#   data/profiles/<video or cam_id>.json -> {"img_size": 480, "skip_frames": 3, "conf_threshold": 0.3, "tuning": {...}}
+PROFILE_KEYS = {'img_size': int, 'skip_frames': int, 'conf_threshold': float}
+
+def profile_path(source):
+    """Same naming as the zones file: base name of the video (or the camera id) without extension."""
+    name_only = os.path.splitext(os.path.basename(str(source)))[0]
+    return os.path.join(Config.PROFILE_DIR, f"{name_only}.json")
+
+def load_profile(source):
+    """
+    Detector overrides for `source`, or {} when it has no (valid) profile.
+    Returns:
+        dict: Subset of PROFILE_KEYS with typed values.
+    """
+    path = profile_path(source)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return {k: cast(data[k]) for k, cast in PROFILE_KEYS.items() if data.get(k) is not None}
+    except (OSError, ValueError, TypeError) as e:
+        logger.warning(f"Ignoring invalid profile {path}: {e}")
+        return {}
+
+def save_profile(source, params, tuning=None):
+    """Atomically writes the profile (tmp + os.replace, the engine may be reading it)."""
+    path = profile_path(source)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = {k: PROFILE_KEYS[k](params[k]) for k in PROFILE_KEYS}
+    if tuning:
+        data['tuning'] = tuning
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return path
+
+def model_input_spec(model_path):
+    """
+    Input shape of an exported model, from the metadata.yaml Ultralytics writes next to it.
+    OpenVINO exports are static (one imgsz) unless exported with dynamic=True; .pt weights are always dynamic.
+    Returns:
+        dict: {"imgsz": int or None, "dynamic": bool}
+    """
+    path = str(model_path)
+    if path.endswith('.pt'):
+        return {"imgsz": None, "dynamic": True}
+    meta_path = os.path.join(path if os.path.isdir(path) else os.path.dirname(path), 'metadata.yaml')
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = yaml.safe_load(f) or {}
+    except (OSError, yaml.YAMLError):
+        return {"imgsz": None, "dynamic": True}  # Unknown: leave the size alone
+    imgsz = meta.get('imgsz')
+    if isinstance(imgsz, (list, tuple)):
+        imgsz = max(imgsz) if imgsz else None
+    dynamic = bool((meta.get('args') or {}).get('dynamic', False))
+    return {"imgsz": int(imgsz) if imgsz else None, "dynamic": dynamic}
+
+def static_img_size(model_path):
+    """The only imgsz a static export accepts, or None when the model takes any size."""
+    spec = model_input_spec(model_path)
+    return None if spec["dynamic"] else spec["imgsz"]
+
+def detect_run(model, video_path, img_size, skip_frames, conf, max_frames=None, tracker_config=None):
+    """
+    Runs the engine's detection schedule (model.track on every skip_frames+1-th frame) over a video.
+    Latencies cover inference only; callers time the whole call for end-to-end (decode included) FPS.
+    Returns:
+        tuple: (DetectionRecorder, total_frames, list of per-inference latencies in ms)
+    """
+    cap = cv2.VideoCapture(video_path)
+    recorder, latencies = DetectionRecorder(), []
+    frame_count = 0
+    try:
+        while max_frames is None or frame_count < max_frames:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frame_count += 1
+            if frame_count % (skip_frames + 1) != 0:
+                continue
+            t0 = time.perf_counter()
+            results = model.track(
+                frame, persist=bool(latencies), tracker=tracker_config or Config.TRACKER_CONFIG,
+                device="cpu", imgsz=img_size, classes=[0], conf=conf, iou=0.3, verbose=False
+            )
+            latencies.append((time.perf_counter() - t0) * 1000)
+            recorder.add(frame_count, results[0].boxes if results else None)
+    finally:
+        cap.release()
+    return recorder, frame_count, latencies
+
+def replay_events(recorder, total_frames, frame_dur, geometry, **params):
+    """Zone events of a recorded run (saved to a temp cache and replayed, see src/detections.py)."""
+    tmp_dir = tempfile.mkdtemp(prefix='tune_')
+    try:
+        recorder.save(tmp_dir, total_frames=total_frames, frame_dur=frame_dur)
+        return replay(DetectionCache(tmp_dir), geometry, **params)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def event_agreement(reference, candidate, frame_dur, window_s=2.0):
+    """
+    F1 of candidate zone events against the reference run.
+    Two events match when employee and kind ("Làm việc" / "Rời bàn") agree and they are at most
+    `window_s` apart; each reference event is matched at most once (greedy, in time order).
+    Returns:
+        dict: {"precision", "recall", "f1", "matched", "reference", "candidate"}
+    """
+    def by_key(events):
+        groups = {}
+        for frame, emp_code, action in events:
+            groups.setdefault((emp_code, action.split(' (')[0]), []).append(frame)
+        return groups
+
+    window = window_s / frame_dur
+    ref_groups, cand_groups = by_key(reference), by_key(candidate)
+    matched = 0
+    for key, cand_frames in cand_groups.items():
+        ref_frames = np.asarray(ref_groups.get(key, []), dtype=np.int64)
+        used = np.zeros(len(ref_frames), dtype=bool)
+        for frame in cand_frames:
+            dist = np.abs(ref_frames - frame).astype(float)
+            dist[used] = np.inf
+            if len(dist) and dist.min() <= window:
+                used[int(dist.argmin())] = True
+                matched += 1
+
+    n_ref, n_cand = len(reference), len(candidate)
+    precision = matched / n_cand if n_cand else float(n_ref == 0)
+    recall = matched / n_ref if n_ref else float(n_cand == 0)
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"precision": round(precision, 4), "recall": round(recall, 4), "f1": round(f1, 4),
+            "matched": matched, "reference": n_ref, "candidate": n_cand}
+
+def pick_fastest(results, min_f1):
+    """
+    Fastest candidate (highest end-to-end "fps": video frames per wall-clock second, decode included)
+    whose event F1 is at least `min_f1`, or None. Runs that never reached the model (clip shorter than
+    one skip interval, "inferences" == 0) measured nothing and are never picked.
+    """
+    eligible = [r for r in results if r.get("inferences") and r["agreement"]["f1"] >= min_f1]
+    return max(eligible, key=lambda r: r["fps"]) if eligible else None
@@ -0,0 +1,137 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+import cv2
+import numpy as np
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class ZoneGeometry:
+    """
+    Immutable, pre-compiled geometry of one zones file.
+    Holds polygons, bounding boxes and label positions.
+    """
+
+    def __init__(self, names=(), polygons=(), digest=None):
+        self.names = tuple(names)
+        self.polygons = [np.asarray(p, dtype=np.int32) for p in polygons]
+        self.digest = digest  # sha1 of the source file content
+
+        # Axis-aligned boxes [x1, y1, x2, y2] for a cheap pre-filter before pointPolygonTest
+        if self.polygons:
+            self.bboxes = np.array([[p[:, 0].min(), p[:, 1].min(), p[:, 0].max(), p[:, 1].max()]
+                                    for p in self.polygons], dtype=np.int32)
+        else:
+            self.bboxes = np.zeros((0, 4), dtype=np.int32)
+
+        self.label_positions = [(int(p[0][0]), int(p[0][1]) - 25) for p in self.polygons]
+        self.outlines = [[tuple(map(int, pt)) for pt in p] for p in self.polygons]
+
+    def __len__(self):
+        return len(self.polygons)
+
+    def locate(self, point):
+        """
+        Returns the index of the first zone containing `point`, or -1.
+        Zones whose bounding box does not contain the point are skipped without a polygon test.
+        """
+        if not len(self.polygons):
+            return -1
+        x, y = point
+        b = self.bboxes
+        candidates = np.flatnonzero((b[:, 0] <= x) & (x <= b[:, 2]) & (b[:, 1] <= y) & (y <= b[:, 3]))
+        for idx in candidates:
+            if cv2.pointPolygonTest(self.polygons[idx], point, False) >= 0:
+                return int(idx)
+        return -1
+
+EMPTY_GEOMETRY = ZoneGeometry()
+
+class ZoneRegistry:
+    """
+    Process-wide cache of compiled zone geometry, keyed by file mtime/size and content hash.
+    A touched-but-identical file (same hash) keeps its existing geometry object.
+    `poll` is cheap enough to call every frame: it only stats the file every `check_interval` seconds.
+    """
+
+    def __init__(self, data_dir=None, check_interval=None):
+        self.data_dir = data_dir or Config.DATA_DIR
+        self.check_interval = Config.ZONE_RELOAD_INTERVAL if check_interval is None else check_interval
+        self._cache = {}       # {json_path: (stat_key, ZoneGeometry)}
+        self._last_check = {}  # {json_path: monotonic time}
+        self._lock = threading.Lock()
+
+    def path_for(self, video_path):
+        """Zones file convention shared with scripts/draw_zones.py: data/<video>_zones.json"""
+        name_only = os.path.splitext(os.path.basename(video_path))[0]
+        return os.path.join(self.data_dir, f"{name_only}_zones.json")
+
+    @staticmethod
+    def _stat_key(json_path):
+        try:
+            st = os.stat(json_path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _compile(self, json_path, cached):
+        """Parse and compile a zones file. Returns `cached` itself if the content hash matches."""
+        with open(json_path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha1(raw).hexdigest()
+        if cached is not None and cached.digest == digest:
+            return cached
+
+        data = json.loads(raw.decode('utf-8'))
+        geometry = ZoneGeometry(data.keys(), data.values(), digest=digest)
+        logger.info(f"Compiled {len(geometry)} zones from {os.path.basename(json_path)}")
+        return geometry
+
+    def load(self, json_path):
+        """Returns compiled geometry for `json_path`, recompiling only if the file changed."""
+        stat_key = self._stat_key(json_path)
+        with self._lock:
+            self._last_check[json_path] = time.monotonic()
+            cached_key, cached = self._cache.get(json_path, (None, None))
+            if stat_key is None:
+                self._cache.pop(json_path, None)
+                return EMPTY_GEOMETRY
+            if cached is not None and cached_key == stat_key:
+                return cached
+            try:
+                geometry = self._compile(json_path, cached)
+            except (OSError, ValueError, TypeError, IndexError) as e:
+                # Usually a half-written file from draw_zones.py: keep serving the last good geometry
+                logger.warning(f"Zone file {json_path} unreadable ({e}); keeping previous geometry.")
+                return cached or EMPTY_GEOMETRY
+            self._cache[json_path] = (stat_key, geometry)
+            return geometry
+
+    def poll(self, json_path, current):
+        """
+        Rate-limited change check for running sessions.
+        Returns the new geometry if the file content changed since `current`, else None.
+        """
+        if json_path is None:
+            return None
+        now = time.monotonic()
+        if now - self._last_check.get(json_path, 0.0) < self.check_interval:
+            return None
+        geometry = self.load(json_path)
+        return None if geometry is current else geometry
+
+    def invalidate(self, json_path=None):
+        """Drop one (or every) cached entry."""
+        with self._lock:
+            if json_path is None:
+                self._cache.clear()
+                self._last_check.clear()
+            else:
+                self._cache.pop(json_path, None)
+                self._last_check.pop(json_path, None)
+
+zone_registry = ZoneRegistry()
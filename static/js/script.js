@@ -13,6 +13,53 @@ function hideLoading() {
     loadingOverlay.style.display = 'none';
 }
 
+// 0. Upload video lớn theo từng chunk, có thể tiếp tục khi bị ngắt
+async function uploadFile(file, onProgress) {
+    const url = `/upload/${encodeURIComponent(file.name)}`;
+    const status = await fetch(`${url}?size=${file.size}`);
+    const info = await status.json();
+    if (!status.ok) throw new Error(info.error || status.statusText);
+    let { offset, complete } = info;
+
+    while (!complete && offset < file.size) {
+        const res = await fetch(url, {
+            method: 'PATCH',
+            headers: { 'Upload-Offset': offset, 'Upload-Length': file.size },
+            body: file.slice(offset, offset + UPLOAD_CHUNK_SIZE),
+        });
+        const data = await res.json();
+        if (res.status === 409) { offset = data.offset; continue; }  // Server biết vị trí đúng
+        if (!res.ok) throw new Error(data.error || res.statusText);
+        ({ offset, complete } = data);
+        onProgress(offset / file.size);
+    }
+}
+
+function resumableUpload(form) {
+    const file = form.querySelector('input[type=file]').files[0];
+    if (!file) return false;
+    // Tệp 0 byte: vòng lặp chunk không gửi gì và upload không bao giờ hoàn tất
+    if (file.size === 0) {
+        alert("Tệp rỗng (0 byte), vui lòng chọn video khác.");
+        return false;
+    }
+    const loadingText = document.getElementById('loading-text');
+    showLoading();
+
+    const attempt = (retries) => uploadFile(file, (p) => {
+        loadingText.innerText = `Đang tải lên... ${Math.floor(p * 100)}%`;
+    }).then(() => {
+        window.location.reload();
+    }).catch(err => {
+        // Mạng chập chờn: thử lại, tiếp tục từ offset đã lưu trên server
+        if (retries > 0) return new Promise(r => setTimeout(r, 2000)).then(() => attempt(retries - 1));
+        loadingText.innerText = "Tải lên thất bại, chọn lại tệp để tiếp tục.";
+        setTimeout(hideLoading, 3000);
+    });
+    attempt(5);
+    return false;
+}
+
 // 1. Chế độ Live AI Streaming
 function startStream(filename) {
     const container = document.getElementById('video-container');
@@ -117,27 +164,211 @@ function playResult(filename) {
         </video>`;
 }
 
-// 3. Cơ chế đồng bộ Dashboard tự động (Polling)
+// 3. Cơ chế đồng bộ Dashboard tự động (Polling qua JSON API + ETag)
 // Chỉ cập nhật khi đang ở chế độ Live AI để tiết kiệm tài nguyên
+const etags = {};
+const libraryPages = { uploads: 1, outputs: 1, employees: 1 };
+
+// Gửi If-None-Match, trả về null nếu dữ liệu không đổi (304)
+function fetchIfChanged(key, url) {
+    const headers = etags[key] ? { 'If-None-Match': etags[key] } : {};
+    return fetch(url, { headers }).then(res => {
+        if (res.status === 304) return null;
+        etags[key] = res.headers.get('ETag');
+        return res.json();
+    });
+}
+
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.innerText = text == null ? '' : text;
+    return div.innerHTML;
+}
+
+function renderUploadCard(file) {
+    const name = escapeHtml(file.name);
+    const arg = escapeHtml(JSON.stringify(file.name));
+    return `<div class="col-md-12">
+        <div class="card p-3 border shadow-sm">
+            <div class="d-flex justify-content-between align-items-center">
+                <span class="fw-bold text-dark text-truncate" style="max-width: 60%;">${name}</span>
+                <div class="btn-group">
+                    <button onclick="startStream(${arg})" class="btn btn-sm btn-primary px-3 shadow-sm">Live AI</button>
+                    <button onclick="smartProcess(${arg})" class="btn btn-sm btn-dark px-3 shadow-sm">Xử lý</button>
+                    <a href="/delete_raw_upload/${encodeURIComponent(file.name)}" class="btn btn-sm btn-outline-danger" title="Move to Trash"
+                       onclick="return confirm('Bạn có chắc muốn đưa tệp gốc này vào thùng rác?')">
+                        <i class="bi bi-trash3"></i>
+                    </a>
+                </div>
+            </div>
+        </div>
+    </div>`;
+}
+
+function renderResultCard(file) {
+    const name = escapeHtml(file.name);
+    const arg = escapeHtml(JSON.stringify(file.name));
+    const sessionId = 'S' + file.session_id;
+    return `<div class="col-md-12">
+        <div class="card p-3 border-start border-success border-4 shadow-sm">
+            <div class="d-flex justify-content-between align-items-center">
+                <div class="text-truncate" style="max-width: 60%;">
+                    <span class="fw-bold d-block text-dark small">${name}</span>
+                    <span class="badge bg-success-subtle text-success border-0 p-0" style="font-size: 0.7rem;">Phiên #${sessionId}</span>
+                </div>
+                <div class="btn-group shadow-sm">
+                    <button onclick="playResult(${arg})" class="btn btn-sm btn-success px-3"> Xem KQ </button>
+                    <a href="/download_output/${encodeURIComponent(file.name)}" class="btn btn-sm btn-outline-success">
+                        <i class="bi bi-download"></i>
+                    </a>
+                    <a href="/delete_output/${sessionId}" class="btn btn-sm btn-outline-danger"
+                       onclick="return confirm('Xóa phiên #${sessionId} và toàn bộ dữ liệu liên quan?')">
+                        <i class="bi bi-trash"></i>
+                    </a>
+                </div>
+            </div>
+        </div>
+    </div>`;
+}
+
+function renderLogRow(row) {
+    const timeDisplay = row.timestamp.includes(' ') ? row.timestamp.split(' ')[1] : row.timestamp;
+    const badgeClass = row.action.includes('Rời bàn')
+        ? "badge bg-danger-subtle text-danger border-0"
+        : "badge bg-success-subtle text-success border-0";
+    return `<tr>
+        <td class="text-muted"><span class="badge bg-dark fw-normal">${escapeHtml(timeDisplay)}</span></td>
+        <td>
+            <span class="fw-bold text-dark">${escapeHtml(row.employee_id)}</span>
+            <small class="d-block text-muted">${escapeHtml(row.full_name || 'Chưa rõ')}</small>
+        </td>
+        <td><span class="${badgeClass}">${escapeHtml(row.action)}</span></td>
+    </tr>`;
+}
+
+function renderEmployeeForm(id, name) {
+    return `<form action="/employees" method="POST" class="emp-list-item p-2 mb-1 border-bottom">
+        <div class="row g-2 align-items-center">
+            <div class="col-3 fw-bold text-primary small">${escapeHtml(id)}</div>
+            <div class="col-7">
+                <input type="hidden" name="emp_id" value="${escapeHtml(id)}">
+                <input type="text" name="full_name" class="form-control form-control-sm border-0 bg-transparent p-0" value="${escapeHtml(name)}" placeholder="Nhập tên...">
+            </div>
+            <div class="col-2 text-end">
+                <button class="btn btn-sm btn-link p-0 text-primary" type="submit"><i class="bi bi-check-lg"></i></button>
+            </div>
+        </div>
+    </form>`;
+}
+
+function refreshLibrary(kind) {
+    const targetId = kind === 'uploads' ? 'video-library' : 'result-library';
+    const render = kind === 'uploads' ? renderUploadCard : renderResultCard;
+    const perPage = DASHBOARD_PAGE_SIZE * libraryPages[kind];
+    return fetchIfChanged(kind, `/api/${kind}?page=1&per_page=${perPage}`).then(data => {
+        if (data) document.getElementById(targetId).innerHTML = data.items.map(render).join('');
+    });
+}
+
+function loadMore(kind) {
+    libraryPages[kind] += 1;
+    delete etags[kind];
+    const refresh = kind === 'employees' ? refreshEmployees() : refreshLibrary(kind);
+    refresh.catch(err => console.debug("Load more failed", err));
+}
+
+// Danh sách nhân sự tải theo trang (có thể hàng chục nghìn người), "Xem thêm" tăng số trang
+function refreshEmployees() {
+    const perPage = DASHBOARD_PAGE_SIZE * libraryPages.employees;
+    return fetchIfChanged('employees', `/api/employees?page=1&per_page=${perPage}`).then(data => {
+        const container = document.getElementById('employee-list-container');
+        // Không ghi đè khi người dùng đang sửa tên
+        if (!data || container.contains(document.activeElement)) {
+            if (data) delete etags.employees;  // Thử lại ở lần đồng bộ sau
+            return;
+        }
+        document.getElementById('employee-count').innerText = `${data.total} người`;
+        document.getElementById('employee-list').innerHTML =
+            data.items.map(emp => renderEmployeeForm(emp.emp_id, emp.full_name)).join('');
+    });
+}
+
+function syncDashboard() {
+    return Promise.all([
+        refreshLibrary('uploads'),
+        refreshLibrary('outputs'),
+        refreshEmployees(),
+    ]);
+}
+
+syncDashboard().catch(err => console.debug("Initial sync failed", err));
+
 setInterval(() => {
     const activeTitle = document.getElementById('active-video-name').innerText;
     if (activeTitle.includes("KẾT QUẢ")) return;
 
-    fetch('/')
-        .then(response => response.text())
-        .then(html => {
-            const parser = new DOMParser();
-            const doc = parser.parseFromString(html, 'text/html');
-            
-            // Các vùng cần đồng bộ nội dung
-            const targetIds = ['log-body', 'video-library', 'result-library', 'employee-list-container'];
-            targetIds.forEach(id => {
-                const newData = doc.getElementById(id);
-                const oldData = document.getElementById(id);
-                if (newData && oldData && newData.innerHTML !== oldData.innerHTML) {
-                    oldData.innerHTML = newData.innerHTML;
-                }
-            });
-        })
-        .catch(err => console.debug("Syncing paused..."));
-}, 3000);
\ No newline at end of file
+    syncDashboard().catch(err => console.debug("Syncing paused..."));
+}, 3000);
+
+// 4. Nhật ký Live: nhận hành động mới qua Server-Sent Events (không polling DB)
+// EventSource tự kết nối lại và gửi Last-Event-ID để tiếp tục từ vị trí cũ.
+// Server SSE từ chối (quá tải / không chạy) -> thử /api/events -> cuối cùng polling /api/actions.
+let liveSessionId = CURRENT_SESSION_ID;
+let actionPoller = null;
+
+function isShowingResult() {
+    return document.getElementById('active-video-name').innerText.includes("KẾT QUẢ");
+}
+
+function reloadActionLog() {
+    return fetchIfChanged('actions', '/api/actions?limit=20').then(data => {
+        if (!data) return;
+        liveSessionId = data.session_id;
+        document.getElementById('log-body').innerHTML = data.items.map(renderLogRow).join('');
+    });
+}
+
+function startActionPolling() {
+    if (actionPoller) return;
+    actionPoller = setInterval(() => {
+        if (isShowingResult()) return;
+        reloadActionLog().catch(err => console.debug("Action polling paused..."));
+    }, 3000);
+}
+
+function connectActionStream(urls) {
+    if (!urls.length) return startActionPolling();
+    const source = new EventSource(urls[0]);
+    let opened = false;
+
+    source.onopen = () => { opened = true; };
+    source.onerror = () => {
+        // CLOSED: server trả 204/503; chưa từng mở được: server SSE không chạy
+        if (source.readyState === EventSource.CLOSED || !opened) {
+            source.close();
+            connectActionStream(urls.slice(1));
+        }
+    };
+
+    source.addEventListener('action', (e) => {
+        if (isShowingResult()) return;
+
+        const row = JSON.parse(e.data);
+        const logBody = document.getElementById('log-body');
+        // Phiên mới bắt đầu: xóa nhật ký của phiên trước
+        if (liveSessionId !== row.session_id) {
+            logBody.innerHTML = '';
+            liveSessionId = row.session_id;
+        }
+        logBody.insertAdjacentHTML('afterbegin', renderLogRow(row));
+        while (logBody.rows.length > 20) logBody.deleteRow(-1);
+    });
+
+    // Bị tụt lại quá xa: server bỏ qua phần cũ, tải lại 20 dòng mới nhất
+    source.addEventListener('resync', () => {
+        delete etags.actions;
+        reloadActionLog().catch(err => console.debug("Resync failed", err));
+    });
+}
+
+connectActionStream([...new Set([EVENTS_URL, FALLBACK_EVENTS_URL])]);
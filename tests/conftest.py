@@ -0,0 +1,28 @@
+import os
+import sys
+import tempfile
+import pytest
+
+# Config reads TRACKER_DATA_DIR at import: point it at a throwaway folder before anything imports it
+os.environ.setdefault('TRACKER_DATA_DIR', tempfile.mkdtemp(prefix='tracker_tests_'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from src.cache import query_cache
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Fresh DB path, archive and occupancy folders per test, and an empty query cache."""
+    monkeypatch.setattr(Config, 'DB_PATH', str(tmp_path / 'employees.db'))
+    monkeypatch.setattr(Config, 'ARCHIVE_DIR', str(tmp_path / 'archive'))
+    monkeypatch.setattr(Config, 'OCCUPANCY_DIR', str(tmp_path / 'occupancy'))
+    query_cache.clear()
+    yield tmp_path
+    query_cache.clear()
+
+@pytest.fixture
+def db(data_dir):
+    """Initialized database (schema + sample employees NV-1..NV-3)."""
+    from src.database import init_db
+    init_db()
+    return data_dir
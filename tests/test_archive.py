@@ -0,0 +1,141 @@
+import os
+import pandas as pd
+import pytest
+from config import Config
+from src.archive import archive_old_sessions, read_archived_actions
+from src.database import (get_db_connection, create_new_session, close_session, log_action, init_db,
+                          get_session_actions, get_session_by_id, get_report_data, get_daily_summary,
+                          get_latest_actions, get_actions_after)
+
+def make_session(video, start_time, actions, closed=True):
+    """Session with `actions` = [(employee_id, action, timestamp)], backdated to `start_time`."""
+    session_id = create_new_session(video)
+    with get_db_connection() as conn:
+        conn.execute('UPDATE sessions SET start_time = ? WHERE id = ?', (start_time, session_id))
+        conn.executemany('INSERT INTO actions (session_id, employee_id, action, timestamp) VALUES (?, ?, ?, ?)',
+                         [(session_id, emp, action, ts) for emp, action, ts in actions])
+        conn.commit()
+    if closed:
+        close_session(session_id)
+    return session_id
+
+def hot_count(session_id):
+    with get_db_connection() as conn:
+        return conn.execute('SELECT COUNT(*) FROM actions WHERE session_id = ?', (session_id,)).fetchone()[0]
+
+OLD_ACTIONS = [
+    ('NV-1', 'Làm việc (tại 00:00:03)', '2020-01-15 08:00:03'),
+    ('NV-1', 'Rời bàn (tại 00:10:00 - Tổng: 597s)', '2020-01-15 08:10:00'),
+    ('NV-2', 'Kết thúc phiên (tại 00:20:00 - Tổng: 1190s)', '2020-01-15 08:20:00'),
+]
+
+def test_only_closed_or_idle_sessions_are_archived(db):
+    closed = make_session('office_A.mp4', '2020-01-15 08:00:00', OLD_ACTIONS)
+    crashed = make_session('office_B.mp4', '2020-02-01 08:00:00', OLD_ACTIONS[:1], closed=False)
+    running = make_session('cam1', '2020-02-01 08:00:00',
+                           [('NV-3', 'Làm việc (tại 00:00:03)', pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S'))],
+                           closed=False)
+    recent = make_session('office_A.mp4', pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S'), OLD_ACTIONS)
+
+    result = archive_old_sessions(max_age_days=90)
+
+    assert result["sessions"] == 2 and result["actions"] == 4
+    assert get_session_by_id(closed)['archived'] == 1 and hot_count(closed) == 0
+    assert get_session_by_id(crashed)['archived'] == 1 and hot_count(crashed) == 0
+    assert get_session_by_id(running)['archived'] == 0 and hot_count(running) == 1
+    assert get_session_by_id(recent)['archived'] == 0 and hot_count(recent) == 3
+    assert all(os.path.exists(p) for p in result["files"])
+    assert sorted(os.listdir(Config.ARCHIVE_DIR)) == ['month=2020-01', 'month=2020-02']
+
+def test_archived_session_reads_back_with_late_rows(db):
+    session_id = make_session('office_A.mp4', '2020-01-15 08:00:00', OLD_ACTIONS)
+    archive_old_sessions(max_age_days=90)
+
+    cold = read_archived_actions(session_id=session_id, months=['2020-01'])
+    assert list(cold['action']) == [a for _, a, _ in OLD_ACTIONS]
+    assert read_archived_actions(session_id=session_id, months=['2020-02']).empty
+
+    # A row logged after the session was archived stays in SQLite and is still returned
+    log_action('NV-3', 'Làm việc (tại 00:30:00)', session_id)
+    rows = get_session_actions(session_id)
+    assert [r['action'] for r in rows] == [a for _, a, _ in OLD_ACTIONS] + ['Làm việc (tại 00:30:00)']
+    assert rows[0]['full_name'] == 'Nguyễn Văn A'
+
+    report = get_report_data()
+    assert len(report) == 4
+
+def test_summary_is_folded_before_rows_move(db):
+    make_session('office_A.mp4', '2020-01-15 08:00:00', OLD_ACTIONS)
+    archive_old_sessions(max_age_days=90)
+    items, total = get_daily_summary('2020-01-15', '2020-01-15')
+    by_employee = {row['employee_id']: row for row in items}
+    assert total == 2
+    assert by_employee['NV-1']['seated_seconds'] == 597 and by_employee['NV-1']['departures'] == 1
+    assert by_employee['NV-2']['seated_seconds'] == 1190
+
+def test_failed_write_keeps_rows_and_leaves_no_files(db, monkeypatch):
+    session_id = make_session('office_A.mp4', '2020-01-15 08:00:00', OLD_ACTIONS)
+
+    def broken(self, path, **kwargs):
+        open(path, 'wb').close()
+        raise OSError("disk full")
+    monkeypatch.setattr(pd.DataFrame, 'to_parquet', broken)
+
+    with pytest.raises(OSError):
+        archive_old_sessions(max_age_days=90)
+    assert hot_count(session_id) == 3
+    assert get_session_by_id(session_id)['archived'] == 0
+    assert read_archived_actions().empty
+    assert not any(files for _, _, files in os.walk(Config.ARCHIVE_DIR))
+
+def test_batches(db):
+    ids = [make_session(f'v{i}.mp4', '2020-01-15 08:00:00', OLD_ACTIONS) for i in range(5)]
+    result = archive_old_sessions(max_age_days=90, exclude_session_ids=[ids[-1]], batch_size=2)
+    assert result["sessions"] == 4 and result["actions"] == 12 and len(result["files"]) == 2
+    assert hot_count(ids[-1]) == 3
+    assert len(read_archived_actions()) == 12
+
+def test_action_feeds_include_archived_rows(db):
+    old = make_session('office_A.mp4', '2020-01-15 08:00:00', OLD_ACTIONS)
+    recent = make_session('cam1', pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S'),
+                          [('NV-3', 'Làm việc (tại 00:00:03)', pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S'))])
+    archive_old_sessions(max_age_days=90)
+    assert hot_count(old) == 0
+
+    # /api/actions of an archived session, and of all sessions when SQLite has fewer rows than asked
+    assert [r['action'] for r in get_latest_actions(limit=2, session_id=old)] == [a for _, a, _ in OLD_ACTIONS][::-1][:2]
+    assert [r['session_id'] for r in get_latest_actions(limit=10)] == [recent, old, old, old]
+    assert get_latest_actions(limit=10)[-1]['full_name'] == 'Nguyễn Văn A'
+    # SSE resume from before the archived rows: no hole in the replay
+    assert [r['id'] for r in get_actions_after(0)] == [1, 2, 3, 4]
+    assert [r['id'] for r in get_actions_after(1, limit=2)] == [2, 3]
+    assert [r['id'] for r in get_actions_after(1, session_id=old)] == [2, 3]
+    assert [r['id'] for r in get_actions_after(3)] == [4]
+
+def test_failed_summary_rebuild_is_retried(db, monkeypatch):
+    make_session('office_A.mp4', '2020-01-15 08:00:00', OLD_ACTIONS)
+    with get_db_connection() as conn:
+        conn.execute('DELETE FROM daily_summary')
+        conn.execute('PRAGMA user_version = 0')     # Database from before the summary existed
+        conn.commit()
+
+    def unreadable(*args, **kwargs):
+        raise OSError("archive offline")
+    with monkeypatch.context() as patch:
+        patch.setattr('src.database.read_archived_actions', unreadable)
+        init_db()
+    assert get_daily_summary('2020-01-15', '2020-01-15')[1] == 0
+
+    init_db()
+    assert get_daily_summary('2020-01-15', '2020-01-15')[1] == 2
+
+def test_archival_by_another_process_is_seen_despite_cache(db, monkeypatch):
+    session_id = make_session('office_A.mp4', '2020-01-15 08:00:00', OLD_ACTIONS)
+    assert get_session_by_id(session_id)['archived'] == 0      # Cached in this process
+    # scripts/archive.py runs in its own process: its invalidations never reach this cache
+    with monkeypatch.context() as patch:
+        patch.setattr('src.cache.query_cache.invalidate', lambda namespace: None)
+        archive_old_sessions(max_age_days=90)
+    assert get_session_by_id(session_id)['archived'] == 0      # Still stale...
+    assert len(get_session_actions(session_id)) == 3           # ...but the rows are found in Parquet
+    assert len(get_latest_actions(limit=10, session_id=session_id)) == 3
@@ -0,0 +1,95 @@
+import pytest
+from src.cache import ReadThroughCache, Uncached, cached, query_cache
+
+def test_hit_after_first_load():
+    cache, calls = ReadThroughCache(max_entries=10, ttl=60), []
+    load = lambda: calls.append(1) or "value"
+    assert cache.get_or_load('ns', (1,), load) == "value"
+    assert cache.get_or_load('ns', (1,), load) == "value"
+    assert len(calls) == 1
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+
+def test_invalidate_bumps_version_and_reloads():
+    cache, calls = ReadThroughCache(max_entries=10, ttl=60), []
+    load = lambda: calls.append(1) or len(calls)
+    assert cache.get_or_load('ns', (), load) == 1
+    cache.invalidate('ns')
+    assert cache.version('ns') == 1
+    assert cache.get_or_load('ns', (), load) == 2
+    # Other namespaces are untouched
+    assert cache.get_or_load('other', (), lambda: "x") == "x"
+    cache.invalidate('ns')
+    assert cache.get_or_load('other', (), lambda: "y") == "x"
+
+def test_ttl_expiry():
+    cache = ReadThroughCache(max_entries=10, ttl=0)
+    assert cache.get_or_load('ns', (), lambda: 1) == 1
+    assert cache.get_or_load('ns', (), lambda: 2) == 2
+
+def test_lru_eviction():
+    cache = ReadThroughCache(max_entries=2, ttl=60)
+    for key in (1, 2, 3):
+        cache.get_or_load('ns', (key,), lambda: key)
+    assert cache.stats["evictions"] == 1
+    assert cache.get_or_load('ns', (1,), lambda: "reloaded") == "reloaded"
+
+def test_none_and_uncached_results_are_not_stored():
+    cache, calls = ReadThroughCache(max_entries=10, ttl=60), []
+    assert cache.get_or_load('ns', (), lambda: None) is None
+    load = lambda: calls.append(1) or Uncached({})
+    assert cache.get_or_load('ns', ('err',), load) == {}
+    assert cache.get_or_load('ns', ('err',), load) == {}
+    assert len(calls) == 2
+    assert cache.snapshot()["size"] == 0
+
+def test_cached_decorator_unwraps_fallback():
+    calls = []
+
+    @cached('test_ns')
+    def lookup(x):
+        calls.append(x)
+        return Uncached([]) if len(calls) == 1 else [x]
+
+    assert lookup(5) == [] and lookup.uncached(5) == [5]
+    assert lookup(5) == [5] and lookup(5) == [5]
+    assert len(calls) == 3
+
+def test_query_before_init_db_is_not_cached(data_dir):
+    from src.database import init_db, get_employee_name_map
+    # Engine built before the schema exists: the failed query must not pin an empty map
+    assert get_employee_name_map() == {}
+    init_db()
+    assert get_employee_name_map()['NV-1'] == 'Nguyễn Văn A'
+
+def test_init_db_invalidates_namespaces(data_dir):
+    from src.database import init_db, EMPLOYEES_NS, SESSIONS_NS, SUMMARY_NS
+    before = [query_cache.version(ns) for ns in (EMPLOYEES_NS, SESSIONS_NS, SUMMARY_NS)]
+    init_db()
+    after = [query_cache.version(ns) for ns in (EMPLOYEES_NS, SESSIONS_NS, SUMMARY_NS)]
+    assert all(a > b for a, b in zip(after, before))
+
+def test_writes_invalidate_readers(db):
+    from src.database import (get_employee_name_map, get_employees_page, update_employee_name,
+                              create_new_session, get_latest_session_id, get_sessions_page)
+    assert get_employee_name_map()['NV-2'] == 'Trần Thị B'
+    assert get_employees_page(limit=2)[1] == 3
+    update_employee_name('NV-2', 'Phạm Văn D')
+    assert get_employee_name_map()['NV-2'] == 'Phạm Văn D'
+    assert get_employees_page(limit=2)[0][1]['full_name'] == 'Phạm Văn D'
+
+    assert get_latest_session_id() is None
+    session_id = create_new_session('office_A.mp4')
+    assert get_latest_session_id() == session_id
+    rows, total = get_sessions_page()
+    assert total == 1 and rows[0]['video_name'] == 'office_A.mp4'
+
+@pytest.mark.parametrize('ttl', [0])
+def test_cached_decorator_respects_ttl(ttl):
+    calls = []
+
+    @cached('ttl_ns', ttl=ttl)
+    def lookup():
+        calls.append(1)
+        return len(calls)
+
+    assert lookup() == 1 and lookup() == 2
@@ -0,0 +1,43 @@
+import numpy as np
+from src.detections import DetectionRecorder, DetectionCache, replay
+from src.zones import ZoneGeometry
+
+class Column:
+    def __init__(self, values):
+        self._values = np.asarray(values, dtype=np.float32)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self._values
+
+class Boxes:
+    """The part of Ultralytics' Boxes that DetectionRecorder reads."""
+
+    def __init__(self, xyxy):
+        self.xyxy, self.id, self.conf = Column(xyxy), Column(range(1, len(xyxy) + 1)), Column([0.9] * len(xyxy))
+
+    def __len__(self):
+        return len(self.xyxy.numpy())
+
+GEOMETRY = ZoneGeometry(['Ban_1'], [[[0, 0], [400, 0], [400, 400], [0, 400]]])
+
+def record(tmp_path, present_frames, total_frames, frame_dur=0.1):
+    recorder = DetectionRecorder()
+    for frame in range(1, total_frames + 1):
+        recorder.add(frame, Boxes([[150, 100, 210, 250]]) if frame in present_frames else None)
+    recorder.save(str(tmp_path), total_frames=total_frames, frame_dur=frame_dur)
+    return DetectionCache(str(tmp_path))
+
+def test_replay_closes_stays_open_at_end_of_clip(tmp_path):
+    cache = record(tmp_path, range(1, 51), 50)
+    events = replay(cache, GEOMETRY, min_work_duration=1, patience_limit=5)
+    assert [(f, code, action.split(' (')[0]) for f, code, action in events] == [
+        (11, 'NV-1', 'Làm việc'), (50, 'NV-1', 'Kết thúc phiên')]
+    assert events[-1][2] == 'Kết thúc phiên (tại 00:00:05 - Tổng: 4s)'
+
+def test_replay_without_open_stay_adds_nothing(tmp_path):
+    cache = record(tmp_path, range(1, 21), 60)
+    kinds = [action.split(' (')[0] for _, _, action in replay(cache, GEOMETRY, min_work_duration=1, patience_limit=5)]
+    assert kinds == ['Làm việc', 'Rời bàn']
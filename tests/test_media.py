@@ -0,0 +1,32 @@
+import app as tracker_app
+from src.catalog import FileCatalog
+from src.media import send_video, work_path
+
+def get(path, **headers):
+    with tracker_app.app.test_request_context('/view', headers=headers):
+        response = send_video(str(path))
+        body = b''.join(response.response) if response.status_code in (200, 206) else b''
+        response.close()
+        return response, body
+
+def test_ranges(tmp_path):
+    video = tmp_path / 'result_S1_clip.mp4'
+    video.write_bytes(bytes(range(100)))
+
+    response, body = get(video, Range='bytes=10-19')
+    assert response.status_code == 206 and body == bytes(range(10, 20))
+    assert response.headers['Content-Range'] == 'bytes 10-19/100'
+    # Several ranges: no multipart body, the whole file instead of an error
+    response, body = get(video, Range='bytes=0-9,50-59')
+    assert response.status_code == 200 and body == bytes(range(100))
+    response, _ = get(video, Range='bytes=200-300')
+    assert response.status_code == 416 and response.headers['Content-Range'] == 'bytes */100'
+
+def test_work_files_are_not_listed(tmp_path, monkeypatch):
+    outputs = tmp_path / 'outputs'
+    outputs.mkdir()
+    result = outputs / 'result_S1_clip.mp4'
+    for path in (result, work_path(str(result), 'web'), work_path(str(result), 'faststart')):
+        open(path, 'wb').close()
+    monkeypatch.setitem(FileCatalog.FOLDERS, 'outputs', (str(outputs), FileCatalog.FOLDERS['outputs'][1]))
+    assert FileCatalog().names('outputs') == ['result_S1_clip.mp4']
@@ -0,0 +1,77 @@
+import time
+import pandas as pd
+from src.summary import summarize_actions, event_times
+from src.database import (get_db_connection, create_new_session, summarize_session, set_session_recording_start,
+                          get_daily_summary, get_summary_totals)
+
+def actions(*rows):
+    return pd.DataFrame(rows, columns=['employee_id', 'action', 'timestamp'])
+
+def by_day(frame):
+    return {(r.day, r.employee_id): r for r in frame.itertuples(index=False)}
+
+def test_stays_inside_one_day_fold_as_before():
+    out = by_day(summarize_actions(actions(
+        ('NV-1', 'Làm việc (tại 00:00:03)', '2024-03-01 08:00:03'),
+        ('NV-1', 'Rời bàn (tại 00:10:00 - Tổng: 597s)', '2024-03-01 08:10:00'),
+        ('NV-1', 'Kết thúc phiên (tại 00:20:00 - Tổng: 300s)', '2024-03-01 08:20:00'),
+    )))
+    row = out[('2024-03-01', 'NV-1')]
+    assert (row.first_seen, row.last_seen) == ('2024-03-01 08:00:03', '2024-03-01 08:20:00')
+    assert row.seated_seconds == 897 and row.departures == 1
+
+def test_stay_across_midnight_is_split_per_day():
+    out = by_day(summarize_actions(actions(
+        ('NV-1', 'Làm việc (tại 00:00:00)', '2024-03-01 22:00:00'),
+        ('NV-1', 'Rời bàn (tại 03:00:00 - Tổng: 10800s)', '2024-03-02 01:00:00'),
+    )))
+    before, after = out[('2024-03-01', 'NV-1')], out[('2024-03-02', 'NV-1')]
+    assert before.seated_seconds == 7200 and before.departures == 0
+    assert (before.first_seen, before.last_seen) == ('2024-03-01 22:00:00', '2024-03-01 23:59:59')
+    assert after.seated_seconds == 3600 and after.departures == 1
+    assert (after.first_seen, after.last_seen) == ('2024-03-02 00:00:00', '2024-03-02 01:00:00')
+
+def test_multi_day_stay_fills_whole_days():
+    # Session left running over a weekend: 16:26:40 Saturday -> Tuesday 00:00:00
+    out = by_day(summarize_actions(actions(
+        ('NV-2', 'Kết thúc phiên (tại 55:33:20 - Tổng: 200000s)', '2024-03-05 00:00:00'),
+    )))
+    assert [out[(d, 'NV-2')].seated_seconds for d in ('2024-03-02', '2024-03-03', '2024-03-04')] == [27200, 86400, 86400]
+    assert sum(r.seated_seconds for r in out.values()) == 200000
+
+def insert(session_id, employee_id, action, timestamp):
+    with get_db_connection() as conn:
+        conn.execute('INSERT INTO actions (session_id, employee_id, action, timestamp) VALUES (?, ?, ?, ?)',
+                     (session_id, employee_id, action, timestamp))
+        conn.commit()
+
+def test_footage_time_comes_from_anchor_and_offset():
+    frame = actions(
+        ('NV-1', 'Làm việc (tại 00:00:03)', '2024-03-05 10:00:03'),
+        ('NV-1', 'Rời bàn (tại 27:00:00 - Tổng: 97197s)', '2024-03-05 10:30:00'),
+        ('NV-1', 'Import thủ công', '2024-03-05 11:00:00'),    # No offset: insert time
+    )
+    frame['anchor'] = '2024-03-01 22:00:00'
+    assert list(event_times(frame)) == ['2024-03-01 22:00:03', '2024-03-03 01:00:00', '2024-03-05 11:00:00']
+    frame['anchor'] = None
+    assert list(event_times(frame)) == list(frame['timestamp'])
+
+def test_offline_video_is_summarized_on_recording_days(db):
+    # Yesterday's footage analysed today: rows are inserted "now", the summary follows the video
+    session_id = create_new_session('office_A.mp4')
+    set_session_recording_start(session_id, time.mktime(time.strptime('2024-03-01 22:00:00', '%Y-%m-%d %H:%M:%S')))
+    insert(session_id, 'NV-1', 'Làm việc (tại 00:00:00)', '2024-03-07 09:00:00')
+    assert summarize_session(session_id) == 1
+    insert(session_id, 'NV-1', 'Rời bàn (tại 03:00:00 - Tổng: 10800s)', '2024-03-07 09:00:01')
+    assert summarize_session(session_id) == 1
+
+    items, total = get_daily_summary('2024-03-01', '2024-03-07')
+    assert total == 2
+    by_date = {row['day']: row for row in items}
+    assert by_date['2024-03-01']['seated_seconds'] == 7200 and by_date['2024-03-01']['departures'] == 0
+    assert by_date['2024-03-01']['first_seen'] == '2024-03-01 22:00:00'
+    assert by_date['2024-03-01']['last_seen'] == '2024-03-01 23:59:59'
+    assert by_date['2024-03-02']['seated_seconds'] == 3600 and by_date['2024-03-02']['departures'] == 1
+    assert by_date['2024-03-02']['last_seen'] == '2024-03-02 01:00:00'
+    totals = get_summary_totals('2024-03-01', '2024-03-07')
+    assert totals[0]['days'] == 2 and totals[0]['seated_seconds'] == 10800
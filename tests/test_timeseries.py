@@ -0,0 +1,95 @@
+import os
+import struct
+import numpy as np
+import pytest
+from src.timeseries import OccupancyRecorder, OccupancyStore
+from src.probe import recording_start
+
+START = 1_700_000_000 - 1_700_000_000 % 3600   # Hour-aligned, so every test session fits in one hour
+
+def record(store, session_id, video, seconds, zone_names=('Ban_1', 'Ban_2'), start_epoch=START):
+    """Session whose `seconds` = [(t, mask)] are one frame each at session time t."""
+    recorder = OccupancyRecorder(list(zone_names), start_epoch=start_epoch)
+    for t, mask in seconds:
+        recorder.add(np.asarray(mask, dtype=bool), t)
+    recorder.save(store.session_dir(session_id), video=video, session_id=session_id)
+
+@pytest.fixture
+def store(data_dir):
+    return OccupancyStore(root=str(data_dir / 'occupancy'))
+
+def test_same_zone_name_in_two_sources_is_two_zones(store):
+    record(store, 1, 'office_A.mp4', [(t, [True, False]) for t in range(10)])
+    record(store, 2, 'office_B.mp4', [(t, [False, False]) for t in range(30)])
+    record(store, 3, 'office_A.mp4', [(t, [False, True]) for t in range(10)])
+
+    util = store.utilization()
+    assert util == {'office_A': {'Ban_1': 0.5, 'Ban_2': 0.5}, 'office_B': {'Ban_1': 0.0, 'Ban_2': 0.0}}
+    assert store.utilization(sources={'office_B'}, zones={'Ban_1'}) == {'office_B': {'Ban_1': 0.0}}
+    assert not [f for f in os.listdir(store.session_dir(3)) if f.endswith('.tmp')]
+
+def test_denominator_is_per_zone(store):
+    recorder = OccupancyRecorder(['Ban_1'], start_epoch=START)
+    for t in range(20):
+        if t == 10:
+            recorder.set_zones(['Ban_1', 'Ban_2'])   # Hot reload adds a desk halfway through
+        recorder.add(np.ones(1 if t < 10 else 2, dtype=bool), t)
+    recorder.save(store.session_dir(1), video='cam1', session_id=1)
+    # A session that never had Ban_2 must not count as unoccupied Ban_2 time
+    record(store, 2, 'cam1', [(t, [False]) for t in range(20)], zone_names=['Ban_1'])
+
+    assert store.utilization() == {'cam1': {'Ban_1': 0.5, 'Ban_2': 1.0}}
+    profile, observed = store.hourly_profile()
+    hour = int(np.flatnonzero(observed['cam1']['Ban_1'])[0])
+    assert observed['cam1']['Ban_1'][hour] == 40 and observed['cam1']['Ban_2'][hour] == 10
+    assert store.peak_hours(top=1) == [{"hour": hour, "utilization": 0.6}]
+
+def test_stalled_seconds_are_not_observed(store):
+    # Live camera dropped between t=5 and t=15
+    record(store, 1, 'cam1', [(t, [True, True]) for t in list(range(5)) + list(range(15, 20))])
+    assert store.utilization() == {'cam1': {'Ban_1': 1.0, 'Ban_2': 1.0}}
+    bits, names = store.bitmap(1)
+    assert bits.shape == (2, 20) and bits[:, 5:15].sum() == 0
+
+def test_new_session_is_visible_after_index_was_built(store):
+    record(store, 1, 'office_A.mp4', [(t, [True, True]) for t in range(5)])
+    assert list(store.utilization()) == ['office_A']
+    record(store, 2, 'office_B.mp4', [(t, [True, True]) for t in range(5)])
+    assert sorted(store.utilization()) == ['office_A', 'office_B']
+
+def test_completed_hours_are_written_while_recording(store):
+    # Live camera at 1 frame/s over ~2.5 hours: hours land on disk as they finish, memory holds one hour
+    recorder = OccupancyRecorder(['Ban_1'], start_epoch=START).attach(store.session_dir(1), video='cam1', session_id=1)
+    for t in range(9000):
+        recorder.add(np.array([t % 2 == 0]), t)
+        assert len(recorder._rows) <= 3600
+        if t == 7300:
+            assert store.utilization() == {'cam1': {'Ban_1': 0.5}}
+            bits, _ = store.bitmap(1)
+            assert bits.shape == (1, 7200) and bits[0, :4].tolist() == [True, False, True, False]
+            assert store.peak_hours(top=3)[0]["utilization"] == 0.5
+    recorder.set_zones(['Ban_1', 'Ban_2'])
+    recorder.add(np.array([True, True]), 9000)
+    recorder.save()
+
+    bits, names = store.bitmap(1)
+    assert names == ['Ban_1', 'Ban_2'] and bits.shape == (2, 9001)
+    assert bits[0].sum() == 4501 and bits[1].tolist() == [False] * 9000 + [True]
+    profile, observed = store.hourly_profile()
+    assert sum(observed['cam1']['Ban_1']) == 9001 and sum(observed['cam1']['Ban_2']) == 1
+
+def mp4_box(kind, payload):
+    return struct.pack('>I4s', 8 + len(payload), kind) + payload
+
+def test_recording_start_from_mvhd(tmp_path):
+    created = START + 2082844800
+    mvhd = mp4_box(b'mvhd', b'\x00\x00\x00\x00' + struct.pack('>II', created, created) + b'\x00' * 88)
+    path = tmp_path / 'clip.mp4'
+    path.write_bytes(mp4_box(b'ftyp', b'isom\x00\x00\x02\x00') + mp4_box(b'mdat', b'\x00' * 64)
+                     + mp4_box(b'moov', mvhd))
+    assert recording_start(str(path)) == START
+
+    unset = mp4_box(b'mvhd', b'\x00' * 100)
+    path.write_bytes(mp4_box(b'ftyp', b'isom') + mp4_box(b'moov', unset))
+    assert recording_start(str(path)) is None
+    assert recording_start(str(tmp_path / 'missing.mp4')) is None
@@ -0,0 +1,73 @@
+import pytest
+from src.tuning import event_agreement, pick_fastest, model_input_spec, static_img_size
+
+FRAME_DUR = 0.1   # 10 fps: a 2 s window is 20 frames
+
+REFERENCE = [
+    (100, 'NV-1', 'Làm việc (tại 00:00:10)'),
+    (900, 'NV-1', 'Rời bàn (tại 00:01:30 - Tổng: 80s)'),
+    (300, 'NV-2', 'Làm việc (tại 00:00:30)'),
+]
+
+def test_identical_runs_agree():
+    agreement = event_agreement(REFERENCE, list(REFERENCE), FRAME_DUR)
+    assert agreement == {"precision": 1.0, "recall": 1.0, "f1": 1.0, "matched": 3, "reference": 3, "candidate": 3}
+
+def test_events_match_within_window_on_employee_and_kind():
+    candidate = [
+        (115, 'NV-1', 'Làm việc (tại 00:00:11)'),                # 1.5 s late: matches
+        (960, 'NV-1', 'Rời bàn (tại 00:01:36 - Tổng: 84s)'),    # 6 s late: outside the window
+        (300, 'NV-3', 'Làm việc (tại 00:00:30)'),                # Wrong employee
+        (300, 'NV-2', 'Rời bàn (tại 00:00:30 - Tổng: 0s)'),     # Wrong kind
+    ]
+    agreement = event_agreement(REFERENCE, candidate, FRAME_DUR, window_s=2.0)
+    assert agreement["matched"] == 1
+    assert agreement["precision"] == 0.25 and agreement["recall"] == pytest.approx(0.3333, abs=1e-4)
+
+def test_each_reference_event_matches_once():
+    # Two flickering candidates near one reference event: only one counts
+    candidate = [(100, 'NV-2', 'Làm việc (tại 00:00:10)'), (105, 'NV-2', 'Làm việc (tại 00:00:10)')]
+    agreement = event_agreement([(100, 'NV-2', 'Làm việc (tại 00:00:10)')], candidate, FRAME_DUR)
+    assert agreement["matched"] == 1 and agreement["precision"] == 0.5 and agreement["recall"] == 1.0
+
+def test_empty_runs():
+    assert event_agreement([], [], FRAME_DUR)["f1"] == 1.0
+    assert event_agreement(REFERENCE, [], FRAME_DUR)["f1"] == 0.0
+    assert event_agreement([], REFERENCE, FRAME_DUR)["f1"] == 0.0
+
+def test_pick_fastest_above_threshold():
+    results = [
+        {"img_size": 640, "fps": 40.0, "inferences": 100, "agreement": {"f1": 1.0}},
+        {"img_size": 320, "fps": 150.0, "inferences": 100, "agreement": {"f1": 0.8}},
+        {"img_size": 416, "fps": 90.0, "inferences": 100, "agreement": {"f1": 0.96}},
+        {"img_size": 480, "fps": 70.0, "inferences": 100, "agreement": {"f1": 0.97}},
+    ]
+    assert pick_fastest(results, 0.95)["img_size"] == 416
+    assert pick_fastest(results, 0.99)["img_size"] == 640
+    assert pick_fastest(results, 1.01) is None
+
+def test_pick_fastest_skips_runs_without_inference():
+    # skip_frames longer than the clip: no detection at all, F1 1.0 on an empty reference
+    results = [
+        {"img_size": 640, "fps": 40.0, "inferences": 100, "agreement": {"f1": 1.0}},
+        {"img_size": 640, "fps": 900.0, "inferences": 0, "agreement": {"f1": 1.0}},
+    ]
+    assert pick_fastest(results, 0.95)["fps"] == 40.0
+    assert pick_fastest(results[1:], 0.95) is None
+
+def write_metadata(folder, text):
+    folder.mkdir()
+    (folder / 'metadata.yaml').write_text(text, encoding='utf-8')
+    return str(folder)
+
+def test_model_input_spec(tmp_path):
+    static = write_metadata(tmp_path / 'static_openvino_model', "task: detect\nimgsz:\n- 640\n- 640\nargs:\n  dynamic: false\n")
+    dynamic = write_metadata(tmp_path / 'dynamic_openvino_model', "imgsz:\n- 640\n- 640\nargs:\n  dynamic: true\n")
+    legacy = write_metadata(tmp_path / 'legacy_openvino_model', "imgsz: [480, 480]\n")
+
+    assert model_input_spec(static) == {"imgsz": 640, "dynamic": False}
+    assert static_img_size(static) == 640
+    assert static_img_size(dynamic) is None
+    assert static_img_size(legacy) == 480               # Exports without args default to static
+    assert static_img_size(tmp_path / 'missing') is None
+    assert static_img_size('models/yolov8n.pt') is None